@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Time the loading of a large mesh in each of the text file formats.
+
+Usage::
+
+    python benchmarks/benchmark_mesh_loaders.py [nb_faces_per_direction]
+"""
+
+import os
+import sys
+import tempfile
+from timeit import repeat
+
+from capytaine.bodies.predefined.spheres import Sphere
+from capytaine.io.mesh_loaders import load_mesh
+from capytaine.io.mesh_writers import write_mesh
+
+FORMATS = ["nat", "nem", "gdf", "mar", "hst", "rad", "stl", "inp"]
+
+
+def write_RAD(filename, vertices, faces):
+    with open(filename, 'w') as f:
+        f.write('/NODE\n')
+        for i, vertex in enumerate(vertices):
+            f.write('{:10d}{:20.12f}{:20.12f}{:20.12f}\n'.format(i+1, *vertex))
+        f.write('/SHELL\n')
+        for i, face in enumerate(faces):
+            f.write('{:10d}{:10d}{:10d}{:10d}{:10d}{:10d}{:10d}\n'.format(i+1, 1, 1, *(face+1)))
+
+
+def write_INP(filename, vertices, faces):
+    with open(os.path.splitext(filename)[0] + '.DAT', 'w') as f:
+        for i, vertex in enumerate(vertices):
+            f.write('{:8d} {:.12f} {:.12f} {:.12f}\n'.format(i+1, *vertex))
+        f.write('\n')
+        for i, face in enumerate(faces):
+            f.write(' {} {} {} {} {}\n'.format(i+1, *(face+1)))
+        f.write('\n')
+    with open(filename, 'w') as f:
+        name = os.path.splitext(os.path.basename(filename))[0]
+        f.write('*FRAME,NAME=F\n0.0 0.0 0.0\n')
+        f.write(f'*NODE,INPUT={name},FRAME=F\n*ELEMENT,TYPE=Q4C000,INPUT={name}\n')
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    mesh = Sphere(ntheta=n, nphi=n, clever=False).mesh
+    print(f"Mesh with {mesh.nb_faces} faces")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for file_format in FORMATS:
+            filename = os.path.join(tmp_dir, f"mesh.{file_format}")
+            if file_format == "rad":
+                write_RAD(filename, mesh.vertices, mesh.faces)
+            elif file_format == "inp":
+                write_INP(filename, mesh.vertices, mesh.faces)
+            elif file_format == "stl":
+                triangulated_mesh = mesh.copy()
+                triangulated_mesh.triangulate_quadrangles()
+                write_mesh(filename, triangulated_mesh.vertices, triangulated_mesh.faces, file_format)
+            else:
+                write_mesh(filename, mesh.vertices, mesh.faces, file_format)
+
+            timing = min(repeat(lambda: load_mesh(filename, file_format), number=1, repeat=3))
+            print(f"{file_format:>4}: {timing:.3f} s")
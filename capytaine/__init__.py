@@ -18,7 +18,9 @@ from capytaine.bodies.predefined.cylinders import VerticalCylinder, HorizontalCy
 from capytaine.bodies.predefined.rectangles import Rectangle, RectangularParallelepiped, OpenRectangularParallelepiped
 
 from capytaine.bem.problems_and_results import RadiationProblem, DiffractionProblem
+from capytaine.bem.problem_set import ProblemSet
 from capytaine.bem.nemoh import Nemoh
+from capytaine.bem.green_functions import DelhommeauGreenFunction, FastInfiniteDepthGreenFunction
 from capytaine.post_pro.free_surfaces import FreeSurface
 
 from capytaine.io.xarray import assemble_dataset
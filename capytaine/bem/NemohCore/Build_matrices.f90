@@ -0,0 +1,323 @@
+! Copyright (C) 2017-2019 Matthieu Ancellin
+! See LICENSE file at <https://github.com/mancellin/capytaine>
+MODULE MATRICES
+
+  USE CONSTANTS
+  USE GREEN_RANKINE
+  USE GREEN_WAVE
+
+  IMPLICIT NONE
+
+CONTAINS
+
+  SUBROUTINE RANKINE_TERMS                                          &
+      (M, normal,                                                   &
+      Face_nodes, Face_center, Face_normal, Face_area, Face_radius, &
+      reflection_coef, reflection_z,                                &
+      S0, V0)
+    ! Coefficients of the influence matrices for the Rankine source and its image
+    ! with respect to the plane z = reflection_z.
+
+    ! Inputs
+    REAL(KIND=PRE), DIMENSION(3),    INTENT(IN) :: M, normal
+    REAL(KIND=PRE), DIMENSION(4, 3), INTENT(IN) :: Face_nodes
+    REAL(KIND=PRE), DIMENSION(3),    INTENT(IN) :: Face_center, Face_normal
+    REAL(KIND=PRE),                  INTENT(IN) :: Face_area, Face_radius
+    REAL(KIND=PRE),                  INTENT(IN) :: reflection_coef, reflection_z
+
+    ! Outputs
+    REAL(KIND=PRE), INTENT(OUT) :: S0, V0
+
+    ! Local variables
+    REAL(KIND=PRE)               :: SP1
+    REAL(KIND=PRE), DIMENSION(3) :: VSP1, M_REFLECTION, NORMAL_REFLECTION
+
+    CALL COMPUTE_INTEGRAL_OF_RANKINE_SOURCE &
+      (M, Face_nodes, Face_center, Face_normal, Face_area, Face_radius, SP1, VSP1)
+    S0 = -SP1/(4*PI)
+    V0 = -DOT_PRODUCT(normal, VSP1)/(4*PI)
+
+    IF (reflection_coef /= ZERO) THEN
+      M_REFLECTION(1:2) = M(1:2)
+      M_REFLECTION(3) = 2*reflection_z - M(3)
+      NORMAL_REFLECTION(1:2) = normal(1:2)
+      NORMAL_REFLECTION(3) = -normal(3)
+
+      CALL COMPUTE_INTEGRAL_OF_RANKINE_SOURCE &
+        (M_REFLECTION, Face_nodes, Face_center, Face_normal, Face_area, Face_radius, SP1, VSP1)
+      S0 = S0 - reflection_coef*SP1/(4*PI)
+      V0 = V0 - reflection_coef*DOT_PRODUCT(NORMAL_REFLECTION, VSP1)/(4*PI)
+    END IF
+
+  END SUBROUTINE RANKINE_TERMS
+
+  ! =========================
+
+  SUBROUTINE WAVE_TERMS            &
+      (wavenumber, depth, XI, XJ,  &
+      XR, XZ, APD,                 &
+      NEXP, AMBDA, AR,             &
+      SP2, VSP2_SYM, VSP2_ANTISYM)
+    ! Wave part of the Green function and of its gradient, in finite or infinite depth.
+
+    REAL(KIND=PRE),                           INTENT(IN) :: wavenumber, depth
+    REAL(KIND=PRE), DIMENSION(3),             INTENT(IN) :: XI, XJ
+    REAL(KIND=PRE), DIMENSION(328),           INTENT(IN) :: XR
+    REAL(KIND=PRE), DIMENSION(46),            INTENT(IN) :: XZ
+    REAL(KIND=PRE), DIMENSION(328, 46, 2, 2), INTENT(IN) :: APD
+    INTEGER,                                  INTENT(IN) :: NEXP
+    REAL(KIND=PRE), DIMENSION(NEXP),          INTENT(IN) :: AMBDA, AR
+
+    COMPLEX(KIND=PRE),               INTENT(OUT) :: SP2
+    COMPLEX(KIND=PRE), DIMENSION(3), INTENT(OUT) :: VSP2_SYM, VSP2_ANTISYM
+
+    IF (depth == INFINITE_DEPTH) THEN
+      CALL WAVE_PART_INFINITE_DEPTH(wavenumber, XI, XJ, XR, XZ, APD, SP2, VSP2_SYM)
+      VSP2_ANTISYM(:) = ZERO
+    ELSE
+      CALL WAVE_PART_FINITE_DEPTH(wavenumber, XI, XJ, depth, XR, XZ, APD, NEXP, AMBDA, AR, &
+                                  SP2, VSP2_SYM, VSP2_ANTISYM)
+    END IF
+
+  END SUBROUTINE WAVE_TERMS
+
+  ! =========================
+
+  SUBROUTINE BUILD_MATRICES_FULL                                      &
+      (nb_faces_1,                                                    &
+      centers_1, normals_1,                                           &
+      nb_vertices_2, nb_faces_2,                                      &
+      vertices_2, faces_2, centers_2, normals_2, areas_2, radiuses_2, &
+      reflection_coef, reflection_z,                                  &
+      wave_part, wavenumber, depth,                                   &
+      XR, XZ, APD,                                                    &
+      NEXP, AMBDA, AR,                                                &
+      same_body,                                                      &
+      S, V)
+    ! Fill the full influence matrices S and K = V + I/2 (if same_body) in a single traversal:
+    ! Rankine source, its image with respect to the free surface or the sea bottom and wave part.
+    ! The matrices S and V are given by the caller and overwritten.
+
+    ! Mesh data
+    INTEGER,                                     INTENT(IN) :: nb_faces_1, nb_faces_2, nb_vertices_2
+    REAL(KIND=PRE), DIMENSION(nb_faces_1, 3),    INTENT(IN) :: centers_1, normals_1
+    REAL(KIND=PRE), DIMENSION(nb_vertices_2, 3), INTENT(IN) :: vertices_2
+    INTEGER,        DIMENSION(nb_faces_2, 4),    INTENT(IN) :: faces_2
+    REAL(KIND=PRE), DIMENSION(nb_faces_2, 3),    INTENT(IN) :: centers_2, normals_2
+    REAL(KIND=PRE), DIMENSION(nb_faces_2),       INTENT(IN) :: areas_2, radiuses_2
+
+    ! Image of the Rankine source: coefficient (0, 1 or -1) and position of the plane of symmetry
+    REAL(KIND=PRE),                           INTENT(IN) :: reflection_coef, reflection_z
+
+    ! Wave part
+    LOGICAL,                                  INTENT(IN) :: wave_part
+    REAL(KIND=PRE),                           INTENT(IN) :: wavenumber, depth
+
+    ! Tabulated integrals
+    REAL(KIND=PRE), DIMENSION(328),           INTENT(IN) :: XR
+    REAL(KIND=PRE), DIMENSION(46),            INTENT(IN) :: XZ
+    REAL(KIND=PRE), DIMENSION(328, 46, 2, 2), INTENT(IN) :: APD
+
+    ! Prony decomposition for finite depth
+    INTEGER,                                  INTENT(IN) :: NEXP
+    REAL(KIND=PRE), DIMENSION(NEXP),          INTENT(IN) :: AMBDA, AR
+
+    ! Whether the two meshes are the same (diagonal term and symmetry of the wave part)
+    LOGICAL,                                  INTENT(IN) :: same_body
+
+    ! Output
+    COMPLEX(KIND=PRE), DIMENSION(nb_faces_1, nb_faces_2), INTENT(INOUT) :: S
+    COMPLEX(KIND=PRE), DIMENSION(nb_faces_1, nb_faces_2), INTENT(INOUT) :: V
+
+    ! Local variables
+    INTEGER                         :: I, J, J_START
+    REAL(KIND=PRE)                  :: S0, V0
+    COMPLEX(KIND=PRE)               :: SP2
+    COMPLEX(KIND=PRE), DIMENSION(3) :: VSP2_SYM, VSP2_ANTISYM
+
+    DO I = 1, nb_faces_1
+
+      IF (same_body) THEN
+        ! Only the upper triangle is traversed, the wave part being symmetric
+        ! (up to the sign of the horizontal part of its gradient).
+        J_START = I
+      ELSE
+        J_START = 1
+      END IF
+
+      !$OMP PARALLEL DO PRIVATE(J, S0, V0, SP2, VSP2_SYM, VSP2_ANTISYM)
+      DO J = J_START, nb_faces_2
+
+        CALL RANKINE_TERMS                                               &
+          (centers_1(I, :), normals_1(I, :),                             &
+          vertices_2(faces_2(J, :), :), centers_2(J, :), normals_2(J, :), &
+          areas_2(J), radiuses_2(J),                                     &
+          reflection_coef, reflection_z,                                 &
+          S0, V0)
+        S(I, J) = S0
+        V(I, J) = V0
+
+        IF (wave_part) THEN
+          CALL WAVE_TERMS(wavenumber, depth, centers_1(I, :), centers_2(J, :), &
+                          XR, XZ, APD, NEXP, AMBDA, AR,                        &
+                          SP2, VSP2_SYM, VSP2_ANTISYM)
+          S(I, J) = S(I, J) - 1/(4*PI) * SP2*areas_2(J)
+          V(I, J) = V(I, J) - 1/(4*PI) * DOT_PRODUCT(normals_1(I, :), VSP2_SYM + VSP2_ANTISYM)*areas_2(J)
+        END IF
+
+        IF (same_body .AND. I == J) THEN
+          V(I, J) = V(I, J) + ONE/2
+        ELSE IF (same_body) THEN
+          CALL RANKINE_TERMS                                               &
+            (centers_1(J, :), normals_1(J, :),                             &
+            vertices_2(faces_2(I, :), :), centers_2(I, :), normals_2(I, :), &
+            areas_2(I), radiuses_2(I),                                     &
+            reflection_coef, reflection_z,                                 &
+            S0, V0)
+          S(J, I) = S0
+          V(J, I) = V0
+
+          IF (wave_part) THEN
+            VSP2_SYM(1:2) = -VSP2_SYM(1:2)
+            S(J, I) = S(J, I) - 1/(4*PI) * SP2*areas_2(I)
+            V(J, I) = V(J, I) - 1/(4*PI) * DOT_PRODUCT(normals_1(J, :), VSP2_SYM - VSP2_ANTISYM)*areas_2(I)
+          END IF
+        END IF
+
+      END DO
+      !$OMP END PARALLEL DO
+    END DO
+
+  END SUBROUTINE BUILD_MATRICES_FULL
+
+  ! =========================
+
+  SUBROUTINE RANKINE_TERMS_AT_POINT                                 &
+      (M,                                                           &
+      Face_nodes, Face_center, Face_normal, Face_area, Face_radius, &
+      reflection_coef, reflection_z,                                &
+      S0, VS0)
+    ! Rankine source and its image with respect to the plane z = reflection_z,
+    ! and their gradient with respect to the position of the point M.
+
+    ! Inputs
+    REAL(KIND=PRE), DIMENSION(3),    INTENT(IN) :: M
+    REAL(KIND=PRE), DIMENSION(4, 3), INTENT(IN) :: Face_nodes
+    REAL(KIND=PRE), DIMENSION(3),    INTENT(IN) :: Face_center, Face_normal
+    REAL(KIND=PRE),                  INTENT(IN) :: Face_area, Face_radius
+    REAL(KIND=PRE),                  INTENT(IN) :: reflection_coef, reflection_z
+
+    ! Outputs
+    REAL(KIND=PRE),               INTENT(OUT) :: S0
+    REAL(KIND=PRE), DIMENSION(3), INTENT(OUT) :: VS0
+
+    ! Local variables
+    REAL(KIND=PRE)               :: SP1
+    REAL(KIND=PRE), DIMENSION(3) :: VSP1, M_REFLECTION
+
+    CALL COMPUTE_INTEGRAL_OF_RANKINE_SOURCE &
+      (M, Face_nodes, Face_center, Face_normal, Face_area, Face_radius, SP1, VSP1)
+    S0 = -SP1/(4*PI)
+    VS0(:) = -VSP1(:)/(4*PI)
+
+    IF (reflection_coef /= ZERO) THEN
+      M_REFLECTION(1:2) = M(1:2)
+      M_REFLECTION(3) = 2*reflection_z - M(3)
+
+      CALL COMPUTE_INTEGRAL_OF_RANKINE_SOURCE &
+        (M_REFLECTION, Face_nodes, Face_center, Face_normal, Face_area, Face_radius, SP1, VSP1)
+      S0 = S0 - reflection_coef*SP1/(4*PI)
+      VS0(1:2) = VS0(1:2) - reflection_coef*VSP1(1:2)/(4*PI)
+      VS0(3) = VS0(3) + reflection_coef*VSP1(3)/(4*PI)
+    END IF
+
+  END SUBROUTINE RANKINE_TERMS_AT_POINT
+
+  ! =========================
+
+  SUBROUTINE BUILD_MATRICES_AT_POINTS                                 &
+      (nb_points, points,                                             &
+      nb_vertices_2, nb_faces_2,                                      &
+      vertices_2, faces_2, centers_2, normals_2, areas_2, radiuses_2, &
+      reflection_coef, reflection_z,                                  &
+      wave_part, wavenumber, depth,                                   &
+      XR, XZ, APD,                                                    &
+      NEXP, AMBDA, AR,                                                &
+      nb_gradient_points,                                             &
+      S, GRAD_S)
+    ! Fill the matrix S of the Green function integrated on the faces of a mesh for a cloud of points
+    ! (for instance to compute the potential at these points from a distribution of sources on the mesh).
+    ! The gradient of S with respect to the position of the points is also computed
+    ! if nb_gradient_points is equal to nb_points (otherwise GRAD_S is ignored).
+
+    ! Points
+    INTEGER,                                     INTENT(IN) :: nb_points, nb_gradient_points
+    REAL(KIND=PRE), DIMENSION(nb_points, 3),     INTENT(IN) :: points
+
+    ! Mesh data
+    INTEGER,                                     INTENT(IN) :: nb_faces_2, nb_vertices_2
+    REAL(KIND=PRE), DIMENSION(nb_vertices_2, 3), INTENT(IN) :: vertices_2
+    INTEGER,        DIMENSION(nb_faces_2, 4),    INTENT(IN) :: faces_2
+    REAL(KIND=PRE), DIMENSION(nb_faces_2, 3),    INTENT(IN) :: centers_2, normals_2
+    REAL(KIND=PRE), DIMENSION(nb_faces_2),       INTENT(IN) :: areas_2, radiuses_2
+
+    ! Image of the Rankine source: coefficient (0, 1 or -1) and position of the plane of symmetry
+    REAL(KIND=PRE),                           INTENT(IN) :: reflection_coef, reflection_z
+
+    ! Wave part
+    LOGICAL,                                  INTENT(IN) :: wave_part
+    REAL(KIND=PRE),                           INTENT(IN) :: wavenumber, depth
+
+    ! Tabulated integrals
+    REAL(KIND=PRE), DIMENSION(328),           INTENT(IN) :: XR
+    REAL(KIND=PRE), DIMENSION(46),            INTENT(IN) :: XZ
+    REAL(KIND=PRE), DIMENSION(328, 46, 2, 2), INTENT(IN) :: APD
+
+    ! Prony decomposition for finite depth
+    INTEGER,                                  INTENT(IN) :: NEXP
+    REAL(KIND=PRE), DIMENSION(NEXP),          INTENT(IN) :: AMBDA, AR
+
+    ! Outputs
+    COMPLEX(KIND=PRE), DIMENSION(nb_points, nb_faces_2),             INTENT(INOUT) :: S
+    COMPLEX(KIND=PRE), DIMENSION(nb_gradient_points, nb_faces_2, 3), INTENT(INOUT) :: GRAD_S
+
+    ! Local variables
+    INTEGER                         :: I, J
+    LOGICAL                         :: gradient
+    REAL(KIND=PRE)                  :: S0
+    REAL(KIND=PRE), DIMENSION(3)    :: VS0
+    COMPLEX(KIND=PRE)               :: SP2
+    COMPLEX(KIND=PRE), DIMENSION(3) :: VSP2_SYM, VSP2_ANTISYM
+
+    gradient = (nb_gradient_points == nb_points)
+
+    !$OMP PARALLEL DO PRIVATE(J, S0, VS0, SP2, VSP2_SYM, VSP2_ANTISYM)
+    DO I = 1, nb_points
+      DO J = 1, nb_faces_2
+
+        CALL RANKINE_TERMS_AT_POINT                                      &
+          (points(I, :),                                                 &
+          vertices_2(faces_2(J, :), :), centers_2(J, :), normals_2(J, :), &
+          areas_2(J), radiuses_2(J),                                     &
+          reflection_coef, reflection_z,                                 &
+          S0, VS0)
+        S(I, J) = S0
+        IF (gradient) GRAD_S(I, J, :) = VS0(:)
+
+        IF (wave_part) THEN
+          CALL WAVE_TERMS(wavenumber, depth, points(I, :), centers_2(J, :), &
+                          XR, XZ, APD, NEXP, AMBDA, AR,                     &
+                          SP2, VSP2_SYM, VSP2_ANTISYM)
+          S(I, J) = S(I, J) - 1/(4*PI) * SP2*areas_2(J)
+          IF (gradient) GRAD_S(I, J, :) = GRAD_S(I, J, :) - 1/(4*PI) * (VSP2_SYM(:) + VSP2_ANTISYM(:))*areas_2(J)
+        END IF
+
+      END DO
+    END DO
+    !$OMP END PARALLEL DO
+
+  END SUBROUTINE BUILD_MATRICES_AT_POINTS
+
+  ! =========================
+
+END MODULE MATRICES
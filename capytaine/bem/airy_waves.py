@@ -6,7 +6,8 @@
 
 import numpy as np
 
-from capytaine.bem.problems_and_results import DiffractionProblem
+from capytaine.bem.dispersion_relation import solve_dispersion_relation
+from capytaine.bem.problems_and_results import DiffractionProblem, DiffractionResult
 
 
 def airy_waves_potential(points, pb: DiffractionProblem, convention="Nemoh"):
@@ -29,22 +30,43 @@ def airy_waves_potential(points, pb: DiffractionProblem, convention="Nemoh"):
     assert convention.lower() in ["nemoh", "wamit"], \
         "Convention for wave field should be either Nemoh or WAMIT."
 
-    x, y, z = points.T
-    k = pb.wavenumber
-    h = pb.depth
-    wbar = x * np.cos(pb.wave_direction) + y * np.sin(pb.wave_direction)
+    return _airy_waves_potential(points, pb.wave_direction, pb.omega, pb.wavenumber, pb.depth, pb.g, convention)
+
+
+def _airy_waves_potential(points, wave_direction, omega, k, h, g, convention="Nemoh"):
+    """Compute the potential for Airy waves, possibly for several wave directions at once.
+
+    Parameters
+    ----------
+    points: array of shape (3) or (N x 3)
+        coordinates of the points in which to evaluate the potential.
+    wave_direction: float or array of shape (M)
+        the direction(s) of the incoming waves
+    omega, k, h, g: floats
+        the frequency, the wavenumber, the water depth and the acceleration of gravity
+    convention: str, optional
+        convention for the incoming wave field. Accepted values: "Nemoh", "WAMIT".
+
+    Returns
+    -------
+    complex or array of shape (N), (M) or (N x M)
+        the potential
+    """
+    points = np.asarray(points)
+    wave_direction = np.asarray(wave_direction)
+    x, y, z = (points[..., i].reshape(points.shape[:-1] + (1,)*wave_direction.ndim) for i in range(3))
+
+    wbar = x * np.cos(wave_direction) + y * np.sin(wave_direction)
 
     if 0 <= k*h < 20:
         cih = np.cosh(k*(z+h))/np.cosh(k*h)
-        # sih = np.sinh(k*(z+h))/np.cosh(k*h)
     else:
         cih = np.exp(k*z)
-        # sih = np.exp(k*z)
 
     if convention.lower() == "wamit":
-        return  1j*pb.g/pb.omega * cih * np.exp(-1j * k * wbar)
+        return  1j*g/omega * cih * np.exp(-1j * k * wbar)
     else:
-        return -1j*pb.g/pb.omega * cih * np.exp(1j * k * wbar)
+        return -1j*g/omega * cih * np.exp(1j * k * wbar)
 
 
 def airy_waves_velocity(points, pb: DiffractionProblem, convention="Nemoh"):
@@ -67,11 +89,33 @@ def airy_waves_velocity(points, pb: DiffractionProblem, convention="Nemoh"):
     assert convention.lower() in ["nemoh", "wamit"], \
         "Convention for wave field should be either Nemoh or WAMIT."
 
-    x, y, z = points.T
-    k = pb.wavenumber
-    h = pb.depth
+    return _airy_waves_velocity(points, pb.wave_direction, pb.omega, pb.wavenumber, pb.depth, pb.g, convention)
+
+
+def _airy_waves_velocity(points, wave_direction, omega, k, h, g, convention="Nemoh"):
+    """Compute the fluid velocity for Airy waves, possibly for several wave directions at once.
+
+    Parameters
+    ----------
+    points: array of shape (3) or (N x 3)
+        coordinates of the points in which to evaluate the velocity.
+    wave_direction: float or array of shape (M)
+        the direction(s) of the incoming waves
+    omega, k, h, g: floats
+        the frequency, the wavenumber, the water depth and the acceleration of gravity
+    convention: str, optional
+        convention for the incoming wave field. Accepted values: "Nemoh", "WAMIT".
+
+    Returns
+    -------
+    array of shape (3), (N x 3), (M x 3) or (N x M x 3)
+        the velocity vectors
+    """
+    points = np.asarray(points)
+    wave_direction = np.asarray(wave_direction)
+    x, y, z = (points[..., i].reshape(points.shape[:-1] + (1,)*wave_direction.ndim) for i in range(3))
 
-    wbar = x * np.cos(pb.wave_direction) + y * np.sin(pb.wave_direction)
+    wbar = x * np.cos(wave_direction) + y * np.sin(wave_direction)
 
     if 0 <= k*h < 20:
         cih = np.cosh(k*(z+h))/np.cosh(k*h)
@@ -80,22 +124,75 @@ def airy_waves_velocity(points, pb: DiffractionProblem, convention="Nemoh"):
         cih = np.exp(k*z)
         sih = np.exp(k*z)
 
-    v = pb.g*k/pb.omega * \
-        np.exp(1j * k * wbar) * \
-        np.array([np.cos(pb.wave_direction) * cih, np.sin(pb.wave_direction) * cih, -1j * sih])
+    v = g*k/omega * np.exp(1j * k * wbar)[..., np.newaxis] * \
+        np.stack(np.broadcast_arrays(np.cos(wave_direction) * cih, np.sin(wave_direction) * cih, -1j * sih), axis=-1)
 
     if convention.lower() == "wamit":
-        return np.conjugate(v.T)
+        return np.conjugate(v)
     else:
-        return v.T
+        return v
 
 
 def froude_krylov_force(pb: DiffractionProblem, convention="Nemoh"):
     pressure = -1j * pb.omega * pb.rho * airy_waves_potential(pb.body.mesh.faces_centers, pb, convention=convention)
-    forces = {}
-    for dof in pb.influenced_dofs:
-        # Scalar product on each face:
-        normal_dof_amplitude_on_face = np.sum(pb.body.dofs[dof] * pb.body.mesh.faces_normals, axis=1)
-        # Sum over all faces:
-        forces[dof] = np.sum(pressure * normal_dof_amplitude_on_face * pb.body.mesh.faces_areas)
+    # Integral of the pressure projected on each dof of the body:
+    forces = dict(zip(pb.body.dofs, pb.body.dofs_weighted_normals @ pressure))
+    return {dof: forces[dof] for dof in pb.influenced_dofs}
+
+
+def froude_krylov_forces(body, omega, wave_direction, depth=np.infty, g=9.81, rho=1000.0, convention="Nemoh"):
+    """Compute the Froude-Krylov forces on all the dofs of a body for several frequencies and wave directions at once.
+
+    Parameters
+    ----------
+    body: FloatingBody
+        the body
+    omega: float or array of shape (W)
+        the angular frequencies of the incoming waves
+    wave_direction: float or array of shape (M)
+        the directions of the incoming waves
+    depth, g, rho: floats, optional
+        the water depth, the acceleration of gravity and the density of the water
+    convention: str, optional
+        convention for the incoming wave field. Accepted values: "Nemoh", "WAMIT".
+
+    Returns
+    -------
+    array of shape (W, M, nb_dofs)
+        the forces
+    """
+    omega = np.atleast_1d(np.asarray(omega, dtype=np.float64))
+    wave_direction = np.atleast_1d(np.asarray(wave_direction, dtype=np.float64))
+    wavenumber = np.atleast_1d(solve_dispersion_relation(omega, depth, g))
+
+    forces = np.empty((len(omega), len(wave_direction), body.nb_dofs), dtype=np.complex128)
+    for i, (w, k) in enumerate(zip(omega, wavenumber)):
+        # pressure.shape = (nb_faces, nb_directions)
+        pressure = -1j * w * rho * _airy_waves_potential(body.mesh.faces_centers, wave_direction, w, k, depth, g,
+                                                         convention=convention)
+        forces[i] = (body.dofs_weighted_normals @ pressure).T
     return forces
+
+
+def precompute_froude_krylov_forces(results, convention="Nemoh"):
+    """Compute the Froude-Krylov forces of several diffraction results at once and store them in the results,
+    where they are used by :attr:`DiffractionResult.records`.
+
+    The results are grouped by body, environment and frequency, and the forces of each group are computed for
+    the wave directions of the group with :func:`froude_krylov_forces`.
+    The other results in the list, and the results whose forces are already stored, are ignored.
+    """
+    groups = {}
+    for result in results:
+        if isinstance(result, DiffractionResult) and result.froude_krylov_forces is None:
+            groups.setdefault((id(result.body), result.depth, result.g, result.rho, result.omega), []).append(result)
+
+    for group in groups.values():
+        first = group[0]
+        # Only the wave directions of the group, in case the test matrix is not a full grid.
+        wave_directions, direction_ids = np.unique([result.wave_direction for result in group], return_inverse=True)
+        forces = froude_krylov_forces(first.body, first.omega, wave_directions, first.depth, first.g, first.rho,
+                                      convention=convention)[0]
+        for result, j in zip(group, direction_ids):
+            all_forces = dict(zip(result.body.dofs, forces[j]))
+            result.froude_krylov_forces = {dof: all_forces[dof] for dof in result.influenced_dofs}
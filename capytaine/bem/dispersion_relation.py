@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Vectorized resolution of the dispersion relation of linear water waves.
+
+Example
+-------
+
+::
+
+    omegas = np.linspace(0.1, 4.0, 40)
+    wavenumbers = solve_dispersion_relation(omegas, depth=10.0)
+
+"""
+# Copyright (C) 2017-2019 Matthieu Ancellin
+# See LICENSE file at <https://github.com/mancellin/capytaine>
+
+import logging
+
+import numpy as np
+
+LOG = logging.getLogger(__name__)
+
+# Above this value of the dimensionless frequency omega^2 h/g, the water is considered as deep.
+DEEP_WATER_LIMIT = 20
+
+NEWTON_MAX_ITERATIONS = 50
+NEWTON_RELATIVE_TOLERANCE = 1e-14
+
+
+def solve_dispersion_relation(omega, depth=np.infty, g=9.81):
+    r"""Compute the wavenumber :math:`k` of the waves such that :math:`\omega^2 = g k \tanh(k h)`.
+
+    The arguments can be scalars or arrays, which are broadcasted together.
+    In finite depth, the relation is solved with Newton iterations on all the values at once,
+    starting from an explicit approximation of the solution.
+
+    Parameters
+    ----------
+    omega: float or array of floats
+        the angular frequency of the waves
+    depth: float or array of floats, optional
+        the water depth :math:`h` (default: infinite depth)
+    g: float or array of floats, optional
+        the acceleration of gravity (default: 9.81)
+
+    Returns
+    -------
+    float or array of floats
+        the wavenumbers, with the broadcasted shape of the inputs
+    """
+    omega, depth, g = np.broadcast_arrays(*(np.asarray(x, dtype=np.float64) for x in (omega, depth, g)))
+    shape = omega.shape
+    omega, depth, g = (x.ravel() for x in (omega, depth, g))
+    wavenumber = omega**2/g  # Deep water
+
+    with np.errstate(invalid='ignore', over='ignore'):
+        dimensionless_omega = omega**2*depth/g
+    finite_depth = (depth < np.infty) & (dimensionless_omega <= DEEP_WATER_LIMIT)
+
+    if np.any(finite_depth):
+        wavenumber[finite_depth] = _solve_dimensionless_dispersion_relation(dimensionless_omega[finite_depth])/depth[finite_depth]
+
+    if len(shape) == 0:
+        return float(wavenumber[0])
+    else:
+        return wavenumber.reshape(shape)
+
+
+def _solve_dimensionless_dispersion_relation(y):
+    r"""Solve :math:`x \tanh(x) = y` for an array of non-negative :math:`y`."""
+    x = np.zeros_like(y)
+    positive = y > 0
+    y = y[positive]
+
+    # Explicit approximation of the solution (Fenton and McKee, 1990), with a relative error below 2%.
+    xk = y / np.tanh(y**0.75)**(2/3)
+
+    for _ in range(NEWTON_MAX_ITERATIONS):
+        tanh_xk = np.tanh(xk)
+        step = (xk*tanh_xk - y)/(tanh_xk + xk*(1 - tanh_xk**2))
+        xk -= step
+        if np.all(np.abs(step) <= NEWTON_RELATIVE_TOLERANCE*xk):
+            break
+    else:
+        LOG.warning("The resolution of the dispersion relation has not converged.")
+
+    x[positive] = xk
+    return x
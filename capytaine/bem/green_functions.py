@@ -0,0 +1,604 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Engines for the evaluation of the Green function and of the influence matrices of the BEM.
+
+A Green function engine is an object with the following methods, all taking as arguments two meshes
+and the parameters of the environment (:code:`free_surface`, :code:`sea_bottom`, :code:`wavenumber`):
+
+* :code:`evaluate_rankine` returns the real-valued Rankine part of the influence matrices S and V,
+* :code:`evaluate_wave` returns the complex-valued frequency-dependent part of the same matrices,
+* :code:`evaluate` returns the full matrices S and K, that is the sum of the two above and of the identity term,
+* :code:`evaluate_rows` and :code:`evaluate_columns` return some rows or columns of the full matrices,
+* :code:`evaluate_at_points` returns the matrix S and its gradient for a cloud of points instead of a first mesh.
+
+Example
+-------
+
+::
+
+    solver = Nemoh(green_function=FastInfiniteDepthGreenFunction(nb_quadrature_points=6))
+
+"""
+# Copyright (C) 2017-2019 Matthieu Ancellin
+# See LICENSE file at <https://github.com/mancellin/capytaine>
+
+import logging
+from functools import lru_cache
+
+import numpy as np
+from numpy.polynomial.legendre import leggauss
+from scipy import special
+
+import capytaine.bem.NemohCore as NemohCore
+from capytaine.bem.prony_decomposition import find_best_exponential_decomposition
+from capytaine.io.cache import load_or_compute
+
+LOG = logging.getLogger(__name__)
+
+# Version of the content of the tabulation of the integrals saved on disk.
+TABULATED_INTEGRALS_VERSION = 1
+
+
+@lru_cache(maxsize=1)
+def tabulated_integrals(nb_points_r, nb_points_z, nb_integration_points):
+    """Tabulation of the integrals for Delhommeau's Green function.
+    It is cached in memory and on disk (see :mod:`capytaine.io.cache`), such that it is computed only once."""
+    def compute():
+        LOG.info("Compute the tabulated integrals of Nemoh's Green function.")
+        return dict(zip(('XR', 'XZ', 'APD'), NemohCore.initialize_green_wave.initialize_tabulated_integrals(
+            nb_points_r, nb_points_z, nb_integration_points)))
+
+    filename = f"tabulated_integrals_v{TABULATED_INTEGRALS_VERSION}_{nb_points_r}_{nb_points_z}_{nb_integration_points}.npz"
+    table = load_or_compute(filename, compute, version=TABULATED_INTEGRALS_VERSION)
+    return table['XR'], table['XZ'], table['APD']
+
+
+class AbstractGreenFunction:
+    """Interface of the Green function engines used by :class:`~capytaine.bem.nemoh.Nemoh`.
+
+    The subclasses should implement :meth:`evaluate_rankine` and :meth:`evaluate_wave`.
+    They can also override :meth:`evaluate` with a more efficient computation of the full matrices.
+    """
+
+    def __str__(self):
+        return f"{self.__class__.__name__}()"
+
+    def evaluate_rankine(self, mesh1, mesh2, free_surface=0.0, sea_bottom=-np.infty, wavenumber=1.0):
+        r"""Build the Rankine part of the S and V influence matrices between mesh1 and mesh2.
+
+        Parameters
+        ----------
+        mesh1: Mesh or CollectionOfMeshes
+            mesh of the receiving body (where the potential is measured)
+        mesh2: Mesh or CollectionOfMeshes
+            mesh of the source body (over which the source distribution is integrated)
+        free_surface: float, optional
+            position of the free surface (default: :math:`z = 0`)
+        sea_bottom: float, optional
+            position of the sea bottom (default: :math:`z = -\infty`)
+        wavenumber: float, optional
+            wavenumber (default: 1.0)
+
+        Returns
+        -------
+        couple of real-valued arrays
+            couple of influence matrices
+        """
+        raise NotImplementedError
+
+    def evaluate_wave(self, mesh1, mesh2, free_surface, sea_bottom, wavenumber):
+        r"""Build the wave part of the influence matrices between mesh1 and mesh2.
+
+        Parameters
+        ----------
+        mesh1: Mesh or CollectionOfMeshes
+            mesh of the receiving body (where the potential is measured)
+        mesh2: Mesh or CollectionOfMeshes
+            mesh of the source body (over which the source distribution is integrated)
+        free_surface: float
+            position of the free surface
+        sea_bottom: float
+            position of the sea bottom
+        wavenumber: float
+            wavenumber
+
+        Returns
+        -------
+        couple of complex-valued arrays
+            couple of influence matrices
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def has_wave_part(free_surface, sea_bottom, wavenumber):
+        """Whether the Green function has a frequency-dependent part in this environment."""
+        return not (free_surface == np.infty or
+                    (free_surface - sea_bottom == np.infty and wavenumber in (0, np.infty)))
+
+    def evaluate_rows(self, ids, mesh1, mesh2, free_surface=0.0, sea_bottom=-np.infty, wavenumber=1.0):
+        """Build some rows of the full influence matrices S and K between mesh1 and mesh2,
+        that is the sum of the Rankine part, of the wave part and of the identity term.
+
+        Parameters
+        ----------
+        ids: list of ints
+            indices of the faces of mesh1 corresponding to the rows
+        mesh1, mesh2, free_surface, sea_bottom, wavenumber:
+            see :meth:`evaluate_rankine`
+
+        Returns
+        -------
+        couple of arrays of shape (len(ids), mesh2.nb_faces)
+        """
+        ids = np.asarray(ids, dtype=int)
+        S, V = self.evaluate(mesh1.extract_faces(ids), mesh2, free_surface, sea_bottom, wavenumber)
+        if mesh1 is mesh2:
+            V[np.arange(len(ids)), ids] += 1/2
+        return S, V
+
+    def evaluate_columns(self, ids, mesh1, mesh2, free_surface=0.0, sea_bottom=-np.infty, wavenumber=1.0):
+        """Build some columns of the full influence matrices S and K between mesh1 and mesh2.
+
+        Parameters
+        ----------
+        ids: list of ints
+            indices of the faces of mesh2 corresponding to the columns
+        mesh1, mesh2, free_surface, sea_bottom, wavenumber:
+            see :meth:`evaluate_rankine`
+
+        Returns
+        -------
+        couple of arrays of shape (mesh1.nb_faces, len(ids))
+        """
+        ids = np.asarray(ids, dtype=int)
+        S, V = self.evaluate(mesh1, mesh2.extract_faces(ids), free_surface, sea_bottom, wavenumber)
+        if mesh1 is mesh2:
+            V[ids, np.arange(len(ids))] += 1/2
+        return S, V
+
+    def evaluate(self, mesh1, mesh2, free_surface=0.0, sea_bottom=-np.infty, wavenumber=1.0):
+        r"""Build the full influence matrices S and K between mesh1 and mesh2, that is the sum of the Rankine part,
+        of the wave part and, if mesh1 and mesh2 are the same object, of the identity term :math:`\mathbb{I}/2`.
+
+        Parameters
+        ----------
+        mesh1, mesh2, free_surface, sea_bottom, wavenumber:
+            see :meth:`evaluate_rankine`
+
+        Returns
+        -------
+        couple of arrays of shape (mesh1.nb_faces, mesh2.nb_faces)
+        """
+        S, V = self.evaluate_rankine(mesh1, mesh2, free_surface, sea_bottom, wavenumber)
+        if self.has_wave_part(free_surface, sea_bottom, wavenumber):
+            Swave, Vwave = self.evaluate_wave(mesh1, mesh2, free_surface, sea_bottom, wavenumber)
+            S, V = S + Swave, V + Vwave
+        if mesh1 is mesh2:
+            V[np.diag_indices_from(V)] += 1/2
+        return S, V
+
+    def evaluate_at_points(self, points, mesh, free_surface=0.0, sea_bottom=-np.infty, wavenumber=1.0,
+                           gradient=False):
+        r"""Build the matrix S of the Green function integrated on the faces of a mesh, for a cloud of points
+        (and optionally its gradient with respect to the position of the points).
+        Contrary to :meth:`evaluate`, the matrix K is not computed.
+
+        Parameters
+        ----------
+        points: array of shape (nb_points, 3)
+            the points where the Green function is evaluated
+        mesh: Mesh or CollectionOfMeshes
+            mesh of the source body (over which the source distribution is integrated)
+        free_surface, sea_bottom, wavenumber:
+            see :meth:`evaluate_rankine`
+        gradient: bool, optional
+            if True, also return the gradient of S (default: False)
+
+        Returns
+        -------
+        array of shape (nb_points, mesh.nb_faces), and if gradient is True array of shape (nb_points, mesh.nb_faces, 3)
+        """
+        # Generic implementation: the gradient is computed component by component as the matrix V
+        # of a cloud of points whose normal vectors are the vectors of the basis.
+        S, V = self.evaluate(_PointCloud(points, (1, 0, 0)), mesh, free_surface, sea_bottom, wavenumber)
+        if not gradient:
+            return S
+        grad_S = np.empty(S.shape + (3,), dtype=np.complex128)
+        grad_S[..., 0] = V
+        for i, direction in ((1, (0, 1, 0)), (2, (0, 0, 1))):
+            _, grad_S[..., i] = self.evaluate(_PointCloud(points, direction), mesh, free_surface, sea_bottom, wavenumber)
+        return S, grad_S
+
+
+class _PointCloud:
+    """Minimal mesh-like object made of points with the same normal vector, for the evaluation of the influence
+    matrices on a cloud of points with :meth:`AbstractGreenFunction.evaluate`."""
+
+    def __init__(self, points, normal):
+        self.faces_centers = np.asarray(points, dtype=np.float64).reshape((-1, 3))
+        self.faces_normals = np.empty_like(self.faces_centers)
+        self.faces_normals[:, :] = normal
+        self.nb_faces = len(self.faces_centers)
+        self.name = "point_cloud"
+
+
+class DelhommeauGreenFunction(AbstractGreenFunction):
+    """The Green function of Nemoh, based on the tabulation of some integrals by Delhommeau and on a Prony
+    decomposition in finite depth. The computations are done by the compiled Fortran core.
+
+    Parameters
+    ----------
+    tabulation_nb_integration_points: int, optional
+        Number of points for the evaluation of the tabulated elementary integrals w.r.t. :math:`theta`
+        used for the computation of the Green function (default: 251)
+    finite_depth_prony_decomposition_method: string, optional
+        The implementation of the Prony decomposition used to compute the finite depth Green function:
+        'fortran' (default), 'python' or 'tabulated'.
+
+    Attributes
+    ----------
+    tabulated_integrals: 3-ple of arrays
+        Tabulated integrals for the computation of the Green function.
+        They are only loaded (or computed) when they are first needed.
+    """
+
+    def __init__(self, tabulation_nb_integration_points=251, finite_depth_prony_decomposition_method='fortran'):
+        self.tabulation_nb_integration_points = tabulation_nb_integration_points
+        self.finite_depth_prony_decomposition_method = finite_depth_prony_decomposition_method
+        self._tabulated_integrals = None  # Lazily initialized, see the property below.
+
+    def __str__(self):
+        return (f"{self.__class__.__name__}("
+                f"tabulation_nb_integration_points={self.tabulation_nb_integration_points}, "
+                f"finite_depth_prony_decomposition_method='{self.finite_depth_prony_decomposition_method}')")
+
+    @property
+    def tabulated_integrals(self):
+        if self._tabulated_integrals is None:
+            LOG.info("Initialize Nemoh's Green function.")
+            self._tabulated_integrals = tabulated_integrals(328, 46, self.tabulation_nb_integration_points)
+        return self._tabulated_integrals
+
+    def evaluate_rankine(self, mesh1, mesh2, free_surface=0.0, sea_bottom=-np.infty, wavenumber=1.0):
+        # RANKINE TERM
+
+        S, V = NemohCore.green_rankine.build_matrices_rankine_source(
+            mesh1.faces_centers, mesh1.faces_normals,
+            mesh2.vertices,      mesh2.faces + 1,
+            mesh2.faces_centers, mesh2.faces_normals,
+            mesh2.faces_areas,   mesh2.faces_radiuses,
+                                 )
+
+        reflection_coef, reflection_z = self._reflection(free_surface, sea_bottom, wavenumber)
+        if reflection_coef == 0.0:
+            # No free surface, no more terms in the Green function
+            return S, V
+
+        # REFLECTION TERM
+
+        def reflect_vector(x):
+            y = x.copy()
+            y[:, 2] *= -1
+            return y
+
+        def reflect_point(x):
+            y = x.copy()
+            # y[:, 2] = 2*reflection_z - x[:, 2]
+            y[:, 2] *= -1
+            y[:, 2] += 2*reflection_z
+            return y
+
+        Srefl, Vrefl = NemohCore.green_rankine.build_matrices_rankine_source(
+            reflect_point(mesh1.faces_centers), reflect_vector(mesh1.faces_normals),
+            mesh2.vertices,      mesh2.faces + 1,
+            mesh2.faces_centers, mesh2.faces_normals,
+            mesh2.faces_areas,   mesh2.faces_radiuses,
+                                 )
+
+        S += reflection_coef*Srefl
+        V += reflection_coef*Vrefl
+
+        return S, V
+
+    def evaluate_wave(self, mesh1, mesh2, free_surface, sea_bottom, wavenumber):
+        depth = free_surface - sea_bottom
+        return NemohCore.green_wave.build_matrices_wave_source(
+            mesh1.faces_centers, mesh1.faces_normals,
+            mesh2.faces_centers, mesh2.faces_areas,
+            wavenumber, 0.0 if depth == np.infty else depth,
+            *self.tabulated_integrals,
+            *self._prony_decomposition(wavenumber, depth),
+            mesh1 is mesh2
+        )
+
+    def evaluate(self, mesh1, mesh2, free_surface=0.0, sea_bottom=-np.infty, wavenumber=1.0):
+        # All the terms are computed by a single call to the Fortran core,
+        # which writes them directly in the output arrays.
+        S = np.empty((mesh1.nb_faces, mesh2.nb_faces), dtype=np.complex128, order='F')
+        V = np.empty((mesh1.nb_faces, mesh2.nb_faces), dtype=np.complex128, order='F')
+
+        depth = free_surface - sea_bottom
+        wave_part = self.has_wave_part(free_surface, sea_bottom, wavenumber)
+        if wave_part:
+            tabulation = self.tabulated_integrals
+            lamda_exp, a_exp = self._prony_decomposition(wavenumber, depth)
+        else:
+            tabulation = (np.zeros(328), np.zeros(46), np.zeros((328, 46, 2, 2)))  # Not used by the Fortran core.
+            lamda_exp, a_exp = np.empty(1), np.empty(1)
+
+        NemohCore.matrices.build_matrices_full(
+            mesh1.faces_centers, mesh1.faces_normals,
+            mesh2.vertices,      mesh2.faces + 1,
+            mesh2.faces_centers, mesh2.faces_normals,
+            mesh2.faces_areas,   mesh2.faces_radiuses,
+            *self._reflection(free_surface, sea_bottom, wavenumber),
+            wave_part, wavenumber, 0.0 if depth == np.infty else depth,
+            *tabulation,
+            lamda_exp, a_exp,
+            mesh1 is mesh2,
+            S, V
+        )
+        return S, V
+
+    def evaluate_at_points(self, points, mesh, free_surface=0.0, sea_bottom=-np.infty, wavenumber=1.0,
+                           gradient=False):
+        S, grad_S = self._evaluate_at_points(points, mesh, free_surface, sea_bottom, wavenumber, gradient,
+                                             wave_part=self.has_wave_part(free_surface, sea_bottom, wavenumber))
+        return (S, grad_S) if gradient else S
+
+    def _evaluate_at_points(self, points, mesh, free_surface, sea_bottom, wavenumber, gradient, wave_part):
+        points = np.asarray(points, dtype=np.float64).reshape((-1, 3))
+        S = np.empty((len(points), mesh.nb_faces), dtype=np.complex128, order='F')
+        # A dummy array is given to the Fortran core when the gradient is not needed.
+        grad_S = np.empty((len(points) if gradient else 1, mesh.nb_faces, 3), dtype=np.complex128, order='F')
+
+        depth = free_surface - sea_bottom
+        if wave_part:
+            tabulation = self.tabulated_integrals
+            lamda_exp, a_exp = self._prony_decomposition(wavenumber, depth)
+        else:
+            tabulation = (np.zeros(328), np.zeros(46), np.zeros((328, 46, 2, 2)))  # Not used by the Fortran core.
+            lamda_exp, a_exp = np.empty(1), np.empty(1)
+
+        NemohCore.matrices.build_matrices_at_points(
+            points,
+            mesh.vertices,      mesh.faces + 1,
+            mesh.faces_centers, mesh.faces_normals,
+            mesh.faces_areas,   mesh.faces_radiuses,
+            *self._reflection(free_surface, sea_bottom, wavenumber),
+            wave_part, wavenumber, 0.0 if depth == np.infty else depth,
+            *tabulation,
+            lamda_exp, a_exp,
+            S, grad_S
+        )
+        return S, (grad_S if gradient else None)
+
+    @staticmethod
+    def _reflection(free_surface, sea_bottom, wavenumber):
+        """Coefficient and position of the plane of the image of the Rankine source."""
+        if free_surface == np.infty:
+            return 0.0, 0.0
+        elif free_surface - sea_bottom == np.infty:
+            # INFINITE DEPTH
+            return (1.0 if wavenumber == 0.0 else -1.0), free_surface
+        else:
+            # FINITE DEPTH
+            return 1.0, sea_bottom
+
+    def _prony_decomposition(self, wavenumber, depth):
+        """Exponents and coefficients of the approximation of the finite depth Green function."""
+        if depth == np.infty:
+            return np.empty(1), np.empty(1)  # Dummy arrays that won't actually be used by the fortran code.
+        else:
+            a_exp, lamda_exp = find_best_exponential_decomposition(
+                wavenumber*depth*np.tanh(wavenumber*depth),
+                wavenumber*depth,
+                method=self.finite_depth_prony_decomposition_method,
+            )
+            return lamda_exp, a_exp
+
+
+# Tabulation of the functions of the horizontal distance used by FastInfiniteDepthGreenFunction.
+FAST_GREEN_FUNCTION_TABLE_VERSION = 1
+FAST_GREEN_FUNCTION_TABLE_R_MAX = 64.0
+FAST_GREEN_FUNCTION_TABLE_STEP = 1/512
+
+# Above this distance, the integrand of the vertical integral is neglected (e^{-14} < 1e-6).
+FAST_GREEN_FUNCTION_INTEGRATION_LENGTH = 14.0
+
+
+class FastInfiniteDepthGreenFunction(DelhommeauGreenFunction):
+    r"""A cheaper evaluation of the wave part of the infinite depth Green function, vectorized with numpy.
+
+    The wave part of the Green function is written with the principal value integral
+
+    .. math::
+        F(r, z) = \mathrm{PV} \int_0^\infty \frac{e^{kz} J_0(kr)}{k - 1} dk
+        = - \frac{\pi}{2} e^z (\mathbf{H}_0(r) + Y_0(r)) - \int_z^0 \frac{e^{z-t}}{\sqrt{r^2 + t^2}} dt
+
+    (in dimensionless variables), whose imaginary counterpart is :math:`\pi e^z J_0(r)`.
+    The functions of :math:`r` are tabulated once on a fine regular grid (and replaced by their asymptotic expansions
+    for large :math:`r`), the singular part of the integral with respect to :math:`t` is computed analytically and
+    its regular part is approximated by a Gauss-Legendre quadrature.
+    Unlike the tabulation of Delhommeau, this approximation is global: the same expression is used for all the
+    couples of faces, such that all the coefficients of the matrices are computed at once.
+
+    With the default number of quadrature points, the absolute error on the dimensionless integral is below
+    :math:`2 \times 10^{-5}`. The hydrodynamic coefficients of the verification cases of Nemoh differ by up to 2%
+    from the ones of :class:`DelhommeauGreenFunction` (see ``pytest/test_consistency_with_Nemoh_2.py``).
+    The matrices are built about as fast as with :class:`DelhommeauGreenFunction` for a few hundred faces and
+    about 1.4 times faster for 1600 faces.
+
+    In finite depth, the computation falls back to the method of :class:`DelhommeauGreenFunction`.
+    The Rankine part is also the same.
+
+    Parameters
+    ----------
+    nb_quadrature_points: int, optional
+        number of points of the Gauss-Legendre quadrature of the regular part of the integral (default: 10)
+    block_size: int, optional
+        number of couples of faces processed at once (default: 100000), to limit the memory usage
+    **kwargs
+        parameters of :class:`DelhommeauGreenFunction`, used in finite depth
+    """
+
+    def __init__(self, nb_quadrature_points=10, block_size=100_000, **kwargs):
+        super().__init__(**kwargs)
+        self.nb_quadrature_points = nb_quadrature_points
+        self.block_size = block_size
+        nodes, weights = leggauss(nb_quadrature_points)
+        self._quadrature = (nodes + 1)/2, weights/2  # On [0, 1].
+
+    def __str__(self):
+        return f"{self.__class__.__name__}(nb_quadrature_points={self.nb_quadrature_points})"
+
+    def evaluate(self, mesh1, mesh2, free_surface=0.0, sea_bottom=-np.infty, wavenumber=1.0):
+        if free_surface - sea_bottom < np.infty or not self.has_wave_part(free_surface, sea_bottom, wavenumber):
+            return super().evaluate(mesh1, mesh2, free_surface, sea_bottom, wavenumber)
+        else:
+            return AbstractGreenFunction.evaluate(self, mesh1, mesh2, free_surface, sea_bottom, wavenumber)
+
+    def evaluate_at_points(self, points, mesh, free_surface=0.0, sea_bottom=-np.infty, wavenumber=1.0,
+                           gradient=False):
+        if free_surface - sea_bottom < np.infty or not self.has_wave_part(free_surface, sea_bottom, wavenumber):
+            return super().evaluate_at_points(points, mesh, free_surface, sea_bottom, wavenumber, gradient)
+
+        # Rankine part from the Fortran core, wave part from the vectorized functions below.
+        S, grad_S = self._evaluate_at_points(points, mesh, free_surface, sea_bottom, wavenumber, gradient,
+                                             wave_part=False)
+        points = np.asarray(points, dtype=np.float64).reshape((-1, 3)) - (0, 0, free_surface)
+        centers, areas = mesh.faces_centers - (0, 0, free_surface), mesh.faces_areas
+        coef = -1/(4*np.pi)
+        nb_rows = max(1, self.block_size // max(1, mesh.nb_faces))
+        for i in range(0, len(points), nb_rows):
+            rows = slice(i, i+nb_rows)
+            SP, VSP = self._wave_part(points[rows], centers, wavenumber)
+            S[rows, :] += coef * SP * areas
+            if gradient:
+                grad_S[rows, :, :] += coef * VSP * areas[:, np.newaxis]
+        return (S, grad_S) if gradient else S
+
+    def evaluate_wave(self, mesh1, mesh2, free_surface, sea_bottom, wavenumber):
+        if free_surface - sea_bottom < np.infty:
+            return super().evaluate_wave(mesh1, mesh2, free_surface, sea_bottom, wavenumber)
+
+        centers_1, normals_1 = mesh1.faces_centers - (0, 0, free_surface), mesh1.faces_normals
+        centers_2, areas_2 = mesh2.faces_centers - (0, 0, free_surface), mesh2.faces_areas
+
+        S = np.empty((mesh1.nb_faces, mesh2.nb_faces), dtype=np.complex128)
+        V = np.empty((mesh1.nb_faces, mesh2.nb_faces), dtype=np.complex128)
+        coef = -1/(4*np.pi)
+
+        if mesh1 is mesh2:
+            # The Green function is symmetric and the horizontal part of its gradient is antisymmetric:
+            # only the coefficients above the diagonal are computed.
+            nb_rows = max(1, self.block_size // max(1, mesh2.nb_faces))
+            for i in range(0, mesh1.nb_faces, nb_rows):
+                rows = slice(i, i+nb_rows)
+                SP, VSP = self._wave_part(centers_1[rows], centers_2[i:], wavenumber)
+                S[rows, i:] = coef * SP * areas_2[i:]
+                V[rows, i:] = coef * np.einsum('ijk,ik->ij', VSP, normals_1[rows]) * areas_2[i:]
+                VSP[:, :, :2] *= -1
+                S[i:, rows] = coef * SP.T * areas_2[rows]
+                V[i:, rows] = coef * np.einsum('ijk,jk->ji', VSP, normals_1[i:]) * areas_2[rows]
+        else:
+            nb_rows = max(1, self.block_size // max(1, mesh2.nb_faces))
+            for i in range(0, mesh1.nb_faces, nb_rows):
+                rows = slice(i, i+nb_rows)
+                SP, VSP = self._wave_part(centers_1[rows], centers_2, wavenumber)
+                S[rows, :] = coef * SP * areas_2
+                V[rows, :] = coef * np.einsum('ijk,ik->ij', VSP, normals_1[rows]) * areas_2
+
+        return S, V
+
+    def _wave_part(self, points_1, points_2, wavenumber):
+        """Wave part of the Green function and of its gradient (w.r.t. the first point) for all the couples of points,
+        with the free surface at z=0. Same as the Fortran subroutine WAVE_PART_INFINITE_DEPTH."""
+        horizontal = points_1[:, np.newaxis, :2] - points_2[np.newaxis, :, :2]
+        z = points_1[:, np.newaxis, 2] + points_2[np.newaxis, :, 2]
+        r = np.hypot(horizontal[..., 0], horizontal[..., 1])
+
+        re, im, d_re, d_im = self._dimensionless_integrals((wavenumber*r).ravel(), (wavenumber*z).ravel())
+
+        SP = 2*wavenumber*(re/np.pi + 1j*im).reshape(r.shape)
+
+        VSP = np.empty(r.shape + (3,), dtype=np.complex128)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            radial = np.where(r[..., np.newaxis] > 0, horizontal/r[..., np.newaxis], 0.0)
+        VSP[..., :2] = radial * (2*wavenumber**2*(d_re/np.pi + 1j*d_im).reshape(r.shape))[..., np.newaxis]
+        VSP[..., 2] = wavenumber*SP
+
+        # Gradient of the image source
+        VSP[..., :2] -= 2*horizontal/((r**2 + z**2)**1.5)[..., np.newaxis]
+        VSP[..., 2] -= 2*z/(r**2 + z**2)**1.5
+
+        return SP, VSP
+
+    def _dimensionless_integrals(self, r, z):
+        r"""Real and imaginary parts of :math:`\pi (F(r, z) + 1/\sqrt{r^2+z^2})` (see the class docstring)
+        and the derivatives of the real and imaginary parts of :math:`\pi F` with respect to :math:`r`
+        (the derivative of the image source is added separately)."""
+        r = np.maximum(r, 1e-9)  # The singularities of the terms below compensate each other at r=0.
+        a = -z
+        R = np.sqrt(r*r + a*a)
+        ez = np.exp(z)
+
+        A, B, j0, j1 = _functions_of_horizontal_distance(r)
+
+        # Regular part of the integral with respect to the vertical coordinate:
+        # J = ∫_0^a (e^{-w} - e^{-a}(1 + a - w))/√(r² + (a-w)²) dw
+        length = np.minimum(a, FAST_GREEN_FUNCTION_INTEGRATION_LENGTH)
+        J, dJ = np.zeros_like(r), np.zeros_like(r)
+        r2 = r*r
+        for node, weight in zip(*self._quadrature):
+            w = length*node
+            s = a - w
+            inverse_distance = 1/np.sqrt(r2 + s*s)
+            g = weight*(np.exp(-w) - ez*(1 + s))*inverse_distance
+            J += g
+            dJ += g*inverse_distance*inverse_distance
+        J *= length
+        dJ *= length*r
+
+        # Singular part of the integral computed analytically (asinh, R and r terms) and logarithms of the functions of r.
+        F = -np.pi/2*ez*A - ez*(np.log(r) + np.arcsinh(a/r) + R - r) - J
+        dF = -np.pi/2*ez*B - ez*(1/r - a/(r*R) + r/R - 1) + dJ
+
+        return np.pi*(F + 1/R), np.pi*ez*j0, np.pi*dF, -np.pi*ez*j1
+
+
+def _functions_of_horizontal_distance(r):
+    r"""Return :math:`\mathbf{H}_0(r) + Y_0(r) - 2\log(r)/\pi`, :math:`2/\pi - \mathbf{H}_1(r) - Y_1(r) - 2/(\pi r)`,
+    :math:`J_0(r)` and :math:`J_1(r)`, interpolated in a table or from their asymptotic expansions."""
+    table = _fast_green_function_table()
+    x = r/FAST_GREEN_FUNCTION_TABLE_STEP
+    i = np.minimum(x.astype(np.int64), len(table) - 2)
+    t = (x - i)[:, np.newaxis]
+    values = table[i]*(1 - t) + table[i+1]*t
+
+    far = r > FAST_GREEN_FUNCTION_TABLE_R_MAX
+    if np.any(far):
+        x = r[far]
+        struve_minus_y0 = 2/np.pi*(1/x - 1/x**3 + 9/x**5 - 225/x**7)
+        struve_minus_y1 = 2/np.pi*(1 + 1/x**2 - 3/x**4 + 45/x**6)
+        y0, y1 = special.y0(x), special.y1(x)
+        values[far] = np.stack([struve_minus_y0 + 2*y0 - 2/np.pi*np.log(x),
+                                2/np.pi - struve_minus_y1 - 2*y1 - 2/(np.pi*x),
+                                special.j0(x), special.j1(x)], axis=1)
+    return values.T
+
+
+@lru_cache(maxsize=1)
+def _fast_green_function_table():
+    def compute():
+        LOG.info("Compute the tabulated functions of the fast infinite depth Green function.")
+        r = np.arange(0.0, FAST_GREEN_FUNCTION_TABLE_R_MAX + 2*FAST_GREEN_FUNCTION_TABLE_STEP, FAST_GREEN_FUNCTION_TABLE_STEP)
+        r[0] = 1.0  # Dummy value, the limits at r=0 are set below.
+        table = np.stack([special.struve(0, r) + special.y0(r) - 2/np.pi*np.log(r),
+                          2/np.pi - special.struve(1, r) - special.y1(r) - 2/(np.pi*r),
+                          special.j0(r), special.j1(r)], axis=1)
+        table[0, :] = (2/np.pi*(np.euler_gamma - np.log(2)), 2/np.pi, 1.0, 0.0)
+        return {'table': table}
+
+    filename = f"fast_green_function_table_v{FAST_GREEN_FUNCTION_TABLE_VERSION}.npz"
+    return load_or_compute(filename, compute, version=FAST_GREEN_FUNCTION_TABLE_VERSION)['table']
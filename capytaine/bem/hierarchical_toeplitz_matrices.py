@@ -5,6 +5,7 @@
 # See LICENSE file at <https://github.com/mancellin/capytaine>
 
 import logging
+import hashlib
 from functools import wraps
 
 import numpy as np
@@ -49,7 +50,7 @@ def hierarchical_toeplitz_matrices(build_matrices, ACA_distance=8.0, ACA_tol=1e-
         function_description_for_logging = ""  # irrelevant
 
     @wraps(build_matrices)  # Is this decorator really necessary?
-    def build_hierarchical_toeplitz_matrix(mesh1, mesh2, *args, _rec_depth=1, **kwargs):
+    def build_hierarchical_toeplitz_matrix(mesh1, mesh2, *args, _rec_depth=1, _reusable_blocks=None, **kwargs):
         """Assemble hierarchical Toeplitz matrices.
 
         The method is basically an ugly multiple dispatch on the kind of mesh.
@@ -65,6 +66,9 @@ def hierarchical_toeplitz_matrices(build_matrices, ACA_distance=8.0, ACA_tol=1e-
             Other arguments, passed to the actual evaluation of the coefficients
         _rec_depth: int, optional
             internal parameter: recursion accumulator, used only for pretty logging
+        _reusable_blocks: dict, optional
+            internal parameter: the blocks already computed during this assembly,
+            indexed by the shapes of the two meshes and their relative horizontal position
 
         Returns
         -------
@@ -72,6 +76,9 @@ def hierarchical_toeplitz_matrices(build_matrices, ACA_distance=8.0, ACA_tol=1e-
             influence matrices
         """
 
+        if _reusable_blocks is None:
+            _reusable_blocks = {}
+
         if logging.getLogger().isEnabledFor(logging.DEBUG):
             log_entry = "\t" * (_rec_depth+1) + function_description_for_logging.format(
                 mesh1=mesh1.name, mesh2=(mesh2.name if mesh2 is not mesh1 else 'itself')
@@ -92,10 +99,10 @@ def hierarchical_toeplitz_matrices(build_matrices, ACA_distance=8.0, ACA_tol=1e-
 
             S_a, V_a = build_hierarchical_toeplitz_matrix(
                 mesh1[0], mesh2[0], *args, **kwargs,
-                _rec_depth=_rec_depth+1)
+                _rec_depth=_rec_depth+1, _reusable_blocks=_reusable_blocks)
             S_b, V_b = build_hierarchical_toeplitz_matrix(
                 mesh1[0], mesh2[1], *args, **kwargs,
-                _rec_depth=_rec_depth+1)
+                _rec_depth=_rec_depth+1, _reusable_blocks=_reusable_blocks)
 
             return BlockSymmetricToeplitzMatrix([[S_a, S_b]]), BlockSymmetricToeplitzMatrix([[V_a, V_b]])
 
@@ -110,13 +117,13 @@ def hierarchical_toeplitz_matrices(build_matrices, ACA_distance=8.0, ACA_tol=1e-
             for submesh in mesh2:
                 S, V = build_hierarchical_toeplitz_matrix(
                     mesh1[0], submesh, *args, **kwargs,
-                    _rec_depth=_rec_depth+1)
+                    _rec_depth=_rec_depth+1, _reusable_blocks=_reusable_blocks)
                 S_list.append(S)
                 V_list.append(V)
             for submesh in mesh1[1:][::-1]:
                 S, V = build_hierarchical_toeplitz_matrix(
                     submesh, mesh2[0], *args, **kwargs,
-                    _rec_depth=_rec_depth+1)
+                    _rec_depth=_rec_depth+1, _reusable_blocks=_reusable_blocks)
                 S_list.append(S)
                 V_list.append(V)
 
@@ -133,7 +140,7 @@ def hierarchical_toeplitz_matrices(build_matrices, ACA_distance=8.0, ACA_tol=1e-
             for submesh in mesh2[:mesh2.nb_submeshes]:
                 S, V = build_hierarchical_toeplitz_matrix(
                     mesh1[0], submesh, *args, **kwargs,
-                    _rec_depth=_rec_depth+1)
+                    _rec_depth=_rec_depth+1, _reusable_blocks=_reusable_blocks)
                 S_line.append(S)
                 V_line.append(V)
 
@@ -165,13 +172,28 @@ def hierarchical_toeplitz_matrices(build_matrices, ACA_distance=8.0, ACA_tol=1e-
 
             LOG.debug(log_entry + " using block matrix structure.")
 
+            # The interaction between two meshes only depends on their shapes and their relative
+            # horizontal position, hence identical blocks can be reused (e.g. in irregular farms).
+            signatures1 = [_shape_signature(submesh1) for submesh1 in mesh1]
+            signatures2 = signatures1 if mesh2 is mesh1 else [_shape_signature(submesh2) for submesh2 in mesh2]
+
             S_matrix, V_matrix = [], []
-            for submesh1 in mesh1:
+            for submesh1, signature1 in zip(mesh1, signatures1):
                 S_line, V_line = [], []
-                for submesh2 in mesh2:
-                    S, V = build_hierarchical_toeplitz_matrix(
-                        submesh1, submesh2, *args, **kwargs,
-                        _rec_depth=_rec_depth+1)
+                for submesh2, signature2 in zip(mesh2, signatures2):
+                    # The interaction of a mesh with itself is distinguished from the interaction with a copy.
+                    key = (signature1, signature2, _relative_horizontal_position(submesh1, submesh2),
+                           submesh1 is submesh2)
+
+                    if key in _reusable_blocks:
+                        LOG.debug("\t" * (_rec_depth+2) + f"Reuse the block computed for a pair of meshes "
+                                  f"with the same relative position as {submesh1.name} and {submesh2.name}.")
+                        S, V = _reusable_blocks[key]
+                    else:
+                        S, V = build_hierarchical_toeplitz_matrix(
+                            submesh1, submesh2, *args, **kwargs,
+                            _rec_depth=_rec_depth+1, _reusable_blocks=_reusable_blocks)
+                        _reusable_blocks[key] = (S, V)
 
                     S_line.append(S)
                     V_line.append(V)
@@ -188,3 +210,31 @@ def hierarchical_toeplitz_matrices(build_matrices, ACA_distance=8.0, ACA_tol=1e-
             return build_matrices(mesh1, mesh2, *args, **kwargs)
 
     return build_hierarchical_toeplitz_matrix
+
+
+# Number of decimals kept when comparing coordinates, to absorb the round-off errors of the translations.
+_SIGNATURE_DECIMALS = 8
+
+
+def _horizontal_reference_point(mesh):
+    return np.array([*mesh.center_of_mass_of_nodes[:2], 0.0])
+
+
+def _shape_signature(mesh):
+    """Hashable signature of a mesh, invariant by horizontal translation.
+    Two meshes with the same signature are made of the same faces, in the same order and with the same
+    hierarchical structure, up to an horizontal translation."""
+    if isinstance(mesh, CollectionOfMeshes):
+        structure = (mesh.__class__.__name__, tuple(_shape_signature(submesh)[0] for submesh in mesh))
+    else:
+        structure = (mesh.nb_faces,)
+    relative_vertices = np.round(mesh.vertices - _horizontal_reference_point(mesh), _SIGNATURE_DECIMALS) + 0.0
+    # A cryptographic digest, since a collision would silently reuse a wrong block of the matrices.
+    return (structure,
+            hashlib.sha256(relative_vertices.tobytes()).digest(),
+            hashlib.sha256(np.ascontiguousarray(mesh.faces).tobytes()).digest())
+
+
+def _relative_horizontal_position(mesh1, mesh2):
+    relative_position = _horizontal_reference_point(mesh2) - _horizontal_reference_point(mesh1)
+    return tuple(np.round(relative_position[:2], _SIGNATURE_DECIMALS) + 0.0)
@@ -18,21 +18,31 @@ import logging
 from datetime import datetime
 from functools import lru_cache
 
+import attr
 import numpy as np
 import xarray as xr
 
 from capytaine.matrices import linear_solvers
 from capytaine.matrices.builders import identity_like
 from capytaine.bem.hierarchical_toeplitz_matrices import hierarchical_toeplitz_matrices
-from capytaine.bem.prony_decomposition import find_best_exponential_decomposition
-import capytaine.bem.NemohCore as NemohCore
-from capytaine.io.xarray import problems_from_dataset, assemble_dataset, kochin_data_array
+from capytaine.bem.green_functions import DelhommeauGreenFunction, FastInfiniteDepthGreenFunction
+from capytaine.bem.problems_and_results import (DiffractionProblem, RadiationProblem, RadiationResult,
+                                                _without_validators)
+from capytaine.bem.problem_set import ProblemSet
+from capytaine.bem.airy_waves import _airy_waves_potential
+from capytaine.meshes.symmetric import horizontal_isometries
+from capytaine.post_pro.kochin import far_field_potential
+from capytaine.io.xarray import assemble_dataset, kochin_data_array
+from capytaine.io.checkpoints import Checkpoint
 
 
 LOG = logging.getLogger(__name__)
 
-# Caching the tabulation of the integrals for Delhommeau's Green function.
-tabulated_integrals = lru_cache(maxsize=1)(NemohCore.initialize_green_wave.initialize_tabulated_integrals)
+# Relative tolerance on the normal component of a radiating dof to be considered as a linear combination of other dofs.
+DOFS_SUPERPOSITION_TOLERANCE = 1e-10
+
+# Maximum size in bytes of the blocks of the matrix S (and of its gradient) evaluated at once by get_potential_at_points.
+POTENTIAL_AT_POINTS_MEMORY_BUDGET = 100_000_000
 
 
 class Nemoh:
@@ -44,7 +54,12 @@ class Nemoh:
         Number of points for the evaluation of the tabulated elementary integrals w.r.t. :math:`theta`
         used for the computation of the Green function (default: 251)
     finite_depth_prony_decomposition_method: string, optional
-        The implementation of the Prony decomposition used to compute the finite depth Green function.
+        The implementation of the Prony decomposition used to compute the finite depth Green function:
+        'fortran' (default), 'python' or 'tabulated' (read in a precomputed table, stored on disk after its first computation).
+    green_function: str or Green function engine, optional
+        The engine used to evaluate the Green function (see :mod:`capytaine.bem.green_functions`).
+        It can be set with the name of a preexisting engine (available: "Delhommeau" [default], "FastInfiniteDepth")
+        or by passing directly an engine object. The two settings above are only used by the named engines.
     use_symmetries: bool, optional
         if True, use the symmetries of the meshes when computing matrices and solving linear system
     ACA_distance: float, optional
@@ -60,11 +75,29 @@ class Nemoh:
         Setting of the numerical solver for linear problems Ax = b.
         It can be set with the name of a preexisting solver (available: "direct" [default], "gmres", "store_lu")
         or by passing directly a solver function.
+    adaptive_mesh_coarsening: bool, optional
+        If True, a hierarchy of coarsened meshes is built for each body and each problem is solved
+        on the coarsest mesh that is fine enough for its wavelength (8×max_radius < wavelength).
+        The hierarchies of the last `matrix_cache_size` bodies (at least one) are kept in cache.
+        The results then refer to the problem on the coarse body. (default: False)
+    wave_direction_symmetries: bool, optional
+        If True, when several diffraction problems with the same body and environment are solved together,
+        the vertical planes of symmetry and the discrete rotational symmetries around a vertical axis found in
+        the structure of the mesh are used to deduce the results of a wave direction from the results of
+        a symmetric wave direction, instead of solving a new problem.
+        The symmetries of the last `matrix_cache_size` meshes (at least one) are kept in cache. (default: False)
+    dofs_superposition: bool, optional
+        If True, when several radiation problems with the same body and environment are solved together,
+        the results of a radiating dof whose normal component is a linear combination of the ones of the dofs
+        already solved are deduced by superposition, instead of solving a new problem. (default: False)
 
     Attributes
     ----------
+    green_function: Green function engine
+        The engine used to evaluate the influence matrices.
     tabulated_integrals: 3-ple of arrays
-        Tabulated integrals for the computation of the Green function.
+        Tabulated integrals for the computation of the Green function (for the engines deriving from Delhommeau's).
+        They are only loaded (or computed) when they are first needed.
     """
 
     defaults_settings = dict(
@@ -76,11 +109,18 @@ class Nemoh:
         ACA_tol=1e-2,
         matrix_cache_size=1,
         cache_rankine_matrices=False,
+        adaptive_mesh_coarsening=False,
+        wave_direction_symmetries=False,
+        dofs_superposition=False,
+        green_function='Delhommeau',
     )
 
     available_linear_solvers = {'direct': linear_solvers.solve_directly,
                                 'gmres': linear_solvers.solve_gmres}
 
+    available_green_functions = {'Delhommeau': DelhommeauGreenFunction,
+                                 'FastInfiniteDepth': FastInfiniteDepthGreenFunction}
+
     def __init__(self, **settings):
 
         # Check that all the given settings are relevant.
@@ -92,8 +132,13 @@ class Nemoh:
 
         self.settings = settings  # Keep a copy for saving in output dataset
 
-        LOG.info("Initialize Nemoh's Green function.")
-        self.tabulated_integrals = tabulated_integrals(328, 46, settings['tabulation_nb_integration_points'])
+        if settings['green_function'] in Nemoh.available_green_functions:
+            self.green_function = Nemoh.available_green_functions[settings['green_function']](
+                tabulation_nb_integration_points=settings['tabulation_nb_integration_points'],
+                finite_depth_prony_decomposition_method=settings['finite_depth_prony_decomposition_method'],
+            )
+        else:
+            self.green_function = settings['green_function']
 
         if settings['linear_solver'] in Nemoh.available_linear_solvers:
             self.linear_solver = Nemoh.available_linear_solvers[settings['linear_solver']]
@@ -137,6 +182,19 @@ class Nemoh:
             if settings['matrix_cache_size'] > 0:
                 self.build_matrices = lru_cache(maxsize=settings['matrix_cache_size'])(self.build_matrices)
 
+        if settings['adaptive_mesh_coarsening']:
+            # The coarse versions of the most recent bodies are kept, not the ones of all the bodies ever solved.
+            self._coarsening_hierarchy = lru_cache(maxsize=max(1, settings['matrix_cache_size']))(
+                self._coarsening_hierarchy)
+
+        if settings['wave_direction_symmetries']:
+            self._horizontal_isometries = lru_cache(maxsize=max(1, settings['matrix_cache_size']))(
+                self._horizontal_isometries)
+
+    @property
+    def tabulated_integrals(self):
+        return self.green_function.tabulated_integrals
+
     def exportable_settings(self):
         settings = self.settings.copy()
         if not settings['hierarchical_matrices']:
@@ -145,6 +203,7 @@ class Nemoh:
         if settings['matrix_cache_size'] == 0:
             del settings['cache_rankine_matrices']
         settings['linear_solver'] = str(settings['linear_solver'])
+        settings['green_function'] = str(settings['green_function'])
         return settings
 
     def solve(self, problem, keep_details=True):
@@ -166,6 +225,9 @@ class Nemoh:
 
         LOG.info("Solve %s.", problem)
 
+        if self.settings['adaptive_mesh_coarsening']:
+            problem = self._coarsest_suitable_problem(problem)
+
         if problem.wavelength < 8*problem.body.mesh.faces_radiuses.max():
             LOG.warning(f"Resolution of the mesh (8×max_radius={8*problem.body.mesh.faces_radiuses.max():.2e}) "
                         f"might be insufficient for this wavelength (wavelength={problem.wavelength:.2e})!")
@@ -183,37 +245,214 @@ class Nemoh:
             result.sources = sources
             result.potential = potential
 
-        for influenced_dof_name, influenced_dof_vectors in problem.influenced_dofs.items():
-            # Scalar product on each face:
-            influenced_dof_normal = np.sum(influenced_dof_vectors * problem.body.mesh.faces_normals, axis=1)
-            # Sum over all faces:
-            integrated_potential = - problem.rho * np.sum(potential * influenced_dof_normal * problem.body.mesh.faces_areas)
-            # Store result:
-            result.store_force(influenced_dof_name, integrated_potential)
-            # Depending of the type of problem, the force will be kept as a complex-valued Froude-Krylov force
-            # or stored as a couple of added mass and radiation damping coefficients.
+        self._store_forces(result, potential)
 
         LOG.debug("Done!")
 
         return result
 
-    def solve_all(self, problems, **kwargs):
+    @staticmethod
+    def _store_forces(result, potential):
+        """Integrate the pressure on the body for each influenced dof and store it in the result container."""
+        problem = result.problem
+        # Integral of the potential projected on each dof of the body:
+        integrated_potentials = dict(zip(problem.body.dofs,
+                                         - problem.rho * problem.body.dofs_weighted_normals @ potential))
+        for influenced_dof_name in problem.influenced_dofs:
+            result.store_force(influenced_dof_name, integrated_potentials[influenced_dof_name])
+            # Depending of the type of problem, the force will be kept as a complex-valued Froude-Krylov force
+            # or stored as a couple of added mass and radiation damping coefficients.
+
+    def _coarsening_hierarchy(self, body, free_surface):
+        return body.coarsening_hierarchy(free_surface=free_surface)
+
+    def _hierarchy_of(self, problem):
+        """The bodies on which the problem might be solved, or None without adaptive mesh coarsening."""
+        if not self.settings['adaptive_mesh_coarsening']:
+            return None
+        return self._coarsening_hierarchy(problem.body, problem.free_surface)
+
+    def _coarsest_suitable_problem(self, problem):
+        """Return a copy of the problem with the coarsest version of the body
+        whose mesh is fine enough for the wavelength of the problem."""
+        if not isinstance(problem, (DiffractionProblem, RadiationProblem)) or problem.free_surface == np.infty:
+            return problem
+        for body in reversed(self._coarsening_hierarchy(problem.body, problem.free_surface)):
+            if problem.wavelength >= 8*body.mesh.faces_radiuses.max():
+                if body is not problem.body:
+                    LOG.debug(f"Solve {problem} on a coarse mesh with {body.mesh.nb_faces} faces.")
+                    problem = attr.evolve(problem, body=body)
+                break
+        return problem
+
+    def solve_all(self, problems, checkpoint_directory=None, **kwargs):
         """Solve several problems.
         Optional keyword arguments are passed to `Nemoh.solve`.
 
         Parameters
         ----------
-        problems: list of LinearPotentialFlowProblem
+        problems: list of LinearPotentialFlowProblem or ProblemSet
             several problems to be solved
+        checkpoint_directory: str, optional
+            only for a ProblemSet: if given, the results are stored in this directory as they are computed,
+            and the problems whose results have been stored by a previous run with the same problems, bodies
+            and settings are not solved again (see :mod:`capytaine.io.checkpoints`).
 
         Returns
         -------
         list of LinearPotentialFlowResult
             the solved problems
         """
+        if isinstance(problems, ProblemSet):
+            return self._solve_problem_set(problems, checkpoint_directory=checkpoint_directory, **kwargs)
+        if checkpoint_directory is not None:
+            raise NotImplementedError("Checkpoints are only supported for the resolution of a ProblemSet.")
+        if self.settings['wave_direction_symmetries'] or self.settings['dofs_superposition']:
+            previous_results = {}
+            return [self._solve_or_deduce(problem, previous_results, **kwargs) for problem in sorted(problems)]
         return [self.solve(problem, **kwargs) for problem in sorted(problems)]
 
-    def fill_dataset(self, dataset, bodies, **kwargs):
+    def _solve_problem_set(self, problem_set, checkpoint_directory=None, **kwargs):
+        """Solve the problems of a ProblemSet, by groups of problems sharing the same influence matrices.
+        The boundary conditions of a group are computed at once and are discarded after the resolution."""
+        if checkpoint_directory is not None:
+            checkpoint = Checkpoint(checkpoint_directory, problem_set, {**self.exportable_settings(), **kwargs})
+            stored_results = checkpoint.load()
+        else:
+            checkpoint, stored_results = None, {}
+
+        results = []
+        previous_results = {}
+        for ids in problem_set.groups():
+            ids_to_solve = np.array([i for i in ids if i not in stored_results], dtype=int)
+            if self.settings['adaptive_mesh_coarsening'] or len(ids_to_solve) == 0:
+                # The problems might be solved on another mesh.
+                boundary_conditions = {}
+            else:
+                boundary_conditions = dict(zip(ids_to_solve, problem_set.boundary_conditions(ids_to_solve)))
+            for i in ids:
+                if i in stored_results:
+                    results.append(checkpoint.restore(i, stored_results.pop(i), self._hierarchy_of(problem_set[i])))
+                    continue
+                problem = problem_set[i]
+                if i in boundary_conditions:
+                    problem.boundary_condition = boundary_conditions.pop(i)
+                if self.settings['wave_direction_symmetries'] or self.settings['dofs_superposition']:
+                    results.append(self._solve_or_deduce(problem, previous_results, **kwargs))
+                else:
+                    results.append(self.solve(problem, **kwargs))
+                del problem.boundary_condition
+                if checkpoint is not None:
+                    hierarchy = self._hierarchy_of(problem)
+                    coarsening_level = [body is results[-1].body for body in hierarchy].index(True) if hierarchy else 0
+                    checkpoint.append(i, results[-1], coarsening_level)
+        return results
+
+    def _horizontal_isometries(self, mesh):
+        return horizontal_isometries(mesh)
+
+    def _solve_or_deduce(self, problem, previous_results, keep_details=True):
+        """Solve a problem, or deduce its results from the results of the problems with the same body and
+        environment that have already been solved: by symmetry for a diffraction problem
+        (setting `wave_direction_symmetries`) or by superposition for a radiation problem (setting `dofs_superposition`).
+
+        Parameters
+        ----------
+        problem: LinearPotentialFlowProblem
+            the problem to be solved
+        previous_results: dict
+            the results already computed for the current body and environment,
+            updated by this method (its content is discarded when the environment changes)
+        keep_details: bool, optional
+            if True, store the sources and the potential on the floating body in the output object
+            (default: True)
+
+        Returns
+        -------
+        LinearPotentialFlowResult
+        """
+        key = (problem.body, problem.free_surface, problem.sea_bottom, problem.omega, problem.g, problem.rho)
+        if previous_results.get('key') != key:
+            previous_results.clear()
+            previous_results.update(key=key, diffraction=[], radiation=[])
+
+        if isinstance(problem, DiffractionProblem) and self.settings['wave_direction_symmetries']:
+            return self._solve_or_deduce_diffraction(problem, previous_results['diffraction'], keep_details)
+        elif isinstance(problem, RadiationProblem) and self.settings['dofs_superposition']:
+            return self._solve_or_deduce_radiation(problem, previous_results['radiation'], keep_details)
+        else:
+            return self.solve(problem, keep_details=keep_details)
+
+    def _solve_or_deduce_diffraction(self, problem, previous_results, keep_details):
+        result = None
+        for previous_result in previous_results:
+            if previous_result.convention != problem.convention:
+                continue
+            result = self._deduce_diffraction_result(previous_result, problem.wave_direction)
+            if result is not None:
+                LOG.info(f"Deduce the results of {problem} from the results of {previous_result.problem} by symmetry.")
+                break
+        else:
+            result = self.solve(problem, keep_details=True)
+            previous_results.append(result)
+
+        if not keep_details:
+            # The details are kept in previous_results, but not in the returned object.
+            light_result = result.problem.make_results_container()
+            light_result.forces = result.forces
+            return light_result
+        return result
+
+    def _deduce_diffraction_result(self, result, wave_direction):
+        """Build the result of the diffraction problem with another wave direction,
+        if the latter is the image of the wave direction of the result by a symmetry of the mesh.
+        Otherwise, return None."""
+        problem = result.problem
+        incoming_direction = np.array([np.cos(problem.wave_direction), np.sin(problem.wave_direction)])
+        for matrix, shift, images_ids in self._horizontal_isometries(problem.body.mesh):
+            image_direction = matrix[:2, :2] @ incoming_direction
+            new_direction = np.arctan2(image_direction[1], image_direction[0])
+            if abs(np.angle(np.exp(1j*(new_direction - wave_direction)))) < 1e-8:
+                break
+        else:
+            return None
+
+        # The incoming wave field of the new problem at the image of a point is the incoming wave field of
+        # the original problem at this point times a constant phase factor.
+        # So are the sources, the potential and the boundary condition on the image of a face.
+        phase = (_airy_waves_potential(shift, wave_direction, problem.omega, problem.wavenumber,
+                                       problem.depth, problem.g, problem.convention)
+                 / _airy_waves_potential(np.zeros(3), wave_direction, problem.omega, problem.wavenumber,
+                                         problem.depth, problem.g, problem.convention))
+
+        with _without_validators():
+            new_problem = attr.evolve(problem, wave_direction=wave_direction)
+        new_result = new_problem.make_results_container()
+        new_result.sources = np.empty_like(result.sources)
+        new_result.sources[images_ids] = phase*result.sources
+        new_result.potential = np.empty_like(result.potential)
+        new_result.potential[images_ids] = phase*result.potential
+        self._store_forces(new_result, new_result.potential)
+        return new_result
+
+    def _solve_or_deduce_radiation(self, problem, previous_results, keep_details):
+        if len(previous_results) > 0:
+            # The radiation problem only depends on the normal component of the radiating dof.
+            dofs = list(problem.body.dofs)
+            dofs_normals = problem.body.dofs_normals
+            basis = dofs_normals[[dofs.index(result.radiating_dof) for result in previous_results]].toarray().T
+            target = dofs_normals[dofs.index(problem.radiating_dof)].toarray().ravel()
+            coefficients, *_ = np.linalg.lstsq(basis, target, rcond=None)
+            if np.linalg.norm(basis @ coefficients - target) <= DOFS_SUPERPOSITION_TOLERANCE*np.linalg.norm(target):
+                LOG.info(f"Deduce the results of {problem} by superposition of the results of the dofs "
+                         f"{[result.radiating_dof for result in previous_results]}.")
+                return RadiationResult.linear_combination(previous_results, coefficients, problem.radiating_dof)
+
+        result = self.solve(problem, keep_details=keep_details)
+        previous_results.append(result)
+        return result
+
+    def fill_dataset(self, dataset, bodies, haskind=False, checkpoint_directory=None, **kwargs):
         """Solve a set of problems defined by the coordinates of an xarray dataset.
 
         Parameters
@@ -222,6 +461,15 @@ class Nemoh:
             dataset containing the problems parameters: frequency, radiating_dof, water_depth, ...
         bodies : list of FloatingBody
             the bodies involved in the problems
+        haskind : bool, optional
+            if True, the diffraction forces are computed from the radiation problems with the Haskind relation
+            instead of solving the diffraction problems. The radiation problems are then solved for all the dofs
+            of the bodies. It is ignored when the Kochin function is requested (coordinate 'theta').
+            (default: False)
+        checkpoint_directory : str, optional
+            if given, the results are stored in this directory as soon as they are computed.
+            When the computation is run again with the same test matrix, bodies and settings,
+            the problems already solved are not solved again. (default: None)
 
         Returns
         -------
@@ -229,25 +477,51 @@ class Nemoh:
         """
         attrs = {'start_of_computation': datetime.now().isoformat(),
                  **self.exportable_settings()}
-        problems = problems_from_dataset(dataset, bodies)
+        if haskind and 'wave_direction' in dataset and 'theta' not in dataset.coords:
+            return self._fill_dataset_with_haskind(dataset, bodies, attrs, checkpoint_directory, **kwargs)
+        problems = ProblemSet.from_dataset(dataset, bodies)
         if 'theta' in dataset.coords:
-            results = self.solve_all(problems, keep_details=True)
+            results = self.solve_all(problems, keep_details=True, checkpoint_directory=checkpoint_directory)
             kochin = kochin_data_array(results, dataset.coords['theta'])
             dataset = assemble_dataset(results, attrs=attrs, **kwargs)
             dataset['kochin'] = kochin
         else:
-            results = self.solve_all(problems, keep_details=False)
+            results = self.solve_all(problems, keep_details=False, checkpoint_directory=checkpoint_directory)
             dataset = assemble_dataset(results, attrs=attrs, **kwargs)
         return dataset
 
+    def _fill_dataset_with_haskind(self, dataset, bodies, attrs, checkpoint_directory=None, **kwargs):
+        """Solve the radiation problems of all the dofs of the bodies and deduce the diffraction forces."""
+        if 'body_name' in dataset:
+            bodies = [body for body in bodies if body.name in dataset['body_name'].data]
+
+        environment = dataset.drop([name for name in ('wave_direction', 'radiating_dof', 'body_name')
+                                    if name in dataset])
+        results = []
+        for body in bodies:
+            problems = ProblemSet.from_dataset(environment.assign_coords(radiating_dof=list(body.dofs)), [body])
+            results.extend(self.solve_all(problems, keep_details=True, checkpoint_directory=checkpoint_directory))
+
+        filled_dataset = assemble_dataset(results, attrs=attrs,
+                                          haskind_wave_direction=dataset['wave_direction'].data, **kwargs)
+
+        # Keep only the radiation problems that have been requested.
+        if 'radiating_dof' in dataset:
+            filled_dataset = filled_dataset.sel(radiating_dof=np.atleast_1d(dataset['radiating_dof'].data))
+        else:
+            filled_dataset = filled_dataset.drop(['added_mass', 'radiation_damping', 'radiating_dof'])
+        return filled_dataset
+
     #######################
     #  Building matrices  #
     #######################
 
     def build_matrices(self, mesh1, mesh2, free_surface=0.0, sea_bottom=-np.infty, wavenumber=1.0):
         r"""Build the S and K influence matrices between mesh1 and mesh2.
-        In brief, it calls `build_matrices_rankine` and `build_matrices_wave` and sum their outputs.
-        It also adds :math:`\mathbb{I}/2` matrix to :math:`V` to get :math:`K`.
+        In brief, it calls the :code:`evaluate` method of the Green function engine, that computes at once the
+        Rankine part, the wave part and the :math:`\mathbb{I}/2` matrix added to :math:`V` to get :math:`K`.
+        When the Rankine part is cached separately, it calls instead `build_matrices_rankine` and
+        `build_matrices_wave` and sum their outputs.
 
         Parameters
         ----------
@@ -271,6 +545,9 @@ class Nemoh:
         LOG.debug(f"\tEvaluating matrix of {mesh1.name} on {'itself' if mesh2 is mesh1 else mesh2.name} "
                   f"for depth={free_surface-sea_bottom} and wavenumber={wavenumber}.")
 
+        if not (self.settings['matrix_cache_size'] > 0 and self.settings['cache_rankine_matrices']):
+            return self.green_function.evaluate(mesh1, mesh2, free_surface, sea_bottom, wavenumber)
+
         Srankine, Vrankine = self.build_matrices_rankine(mesh1, mesh2, free_surface, sea_bottom, wavenumber)
 
         if (free_surface == np.infty or
@@ -309,58 +586,7 @@ class Nemoh:
         couple of real-valued matrix-like objects (either 2D arrays or BlockMatrix objects)
             couple of influence matrices
         """
-        # RANKINE TERM
-
-        S, V = NemohCore.green_rankine.build_matrices_rankine_source(
-            mesh1.faces_centers, mesh1.faces_normals,
-            mesh2.vertices,      mesh2.faces + 1,
-            mesh2.faces_centers, mesh2.faces_normals,
-            mesh2.faces_areas,   mesh2.faces_radiuses,
-                                 )
-
-        if free_surface == np.infty:
-            # No free surface, no more terms in the Green function
-            return S, V
-
-        # REFLECTION TERM
-
-        def reflect_vector(x):
-            y = x.copy()
-            y[:, 2] *= -1
-            return y
-
-        if free_surface - sea_bottom == np.infty:
-            # INFINITE DEPTH
-            def reflect_point(x):
-                y = x.copy()
-                # y[:, 2] = 2*free_surface - x[:, 2]
-                y[:, 2] *= -1
-                y[:, 2] += 2*free_surface
-                return y
-        else:
-            # FINITE DEPTH
-            def reflect_point(x):
-                y = x.copy()
-                # y[:, 2] = 2*sea_bottom - x[:, 2]
-                y[:, 2] *= -1
-                y[:, 2] += 2*sea_bottom
-                return y
-
-        Srefl, Vrefl = NemohCore.green_rankine.build_matrices_rankine_source(
-            reflect_point(mesh1.faces_centers), reflect_vector(mesh1.faces_normals),
-            mesh2.vertices,      mesh2.faces + 1,
-            mesh2.faces_centers, mesh2.faces_normals,
-            mesh2.faces_areas,   mesh2.faces_radiuses,
-                                 )
-
-        if free_surface - sea_bottom < np.infty or wavenumber == 0.0:
-            S += Srefl
-            V += Vrefl
-        else:
-            S -= Srefl
-            V -= Vrefl
-
-        return S, V
+        return self.green_function.evaluate_rankine(mesh1, mesh2, free_surface, sea_bottom, wavenumber)
 
     def build_matrices_wave(self, mesh1, mesh2, free_surface, sea_bottom, wavenumber):
         r"""Build the wave part of the influence matrices between mesh1 and mesh2.
@@ -383,36 +609,99 @@ class Nemoh:
         couple of complex-valued matrix-like objects (either 2D arrays or BlockMatrix objects)
             couple of influence matrices
         """
-        depth = free_surface - sea_bottom
-        if depth == np.infty:
-            return NemohCore.green_wave.build_matrices_wave_source(
-                mesh1.faces_centers, mesh1.faces_normals,
-                mesh2.faces_centers, mesh2.faces_areas,
-                wavenumber, 0.0,
-                *self.tabulated_integrals,
-                np.empty(1), np.empty(1),  # Dummy arrays that won't actually be used by the fortran code.
-                mesh1 is mesh2
-            )
-        else:
-            a_exp, lamda_exp = find_best_exponential_decomposition(
-                wavenumber*depth*np.tanh(wavenumber*depth),
-                wavenumber*depth,
-                method=self.settings['finite_depth_prony_decomposition_method'],
-            )
-
-            return NemohCore.green_wave.build_matrices_wave_source(
-                mesh1.faces_centers, mesh1.faces_normals,
-                mesh2.faces_centers, mesh2.faces_areas,
-                wavenumber, depth,
-                *self.tabulated_integrals,
-                lamda_exp, a_exp,
-                mesh1 is mesh2
-                )
+        return self.green_function.evaluate_wave(mesh1, mesh2, free_surface, sea_bottom, wavenumber)
 
     #######################
     #  Compute potential  #
     #######################
 
+    def get_potential_at_points(self, results, points, velocity=False, chunk_size=None):
+        """Compute the potential (and optionally the velocity) at a cloud of points
+        for the potential field of previously solved problems.
+        Only the matrix S of the Green function (and its gradient) between the points and the faces of the body
+        is evaluated, a few lines at a time to reduce the memory cost of the operation:
+        by default, each block of the matrices uses at most :code:`POTENTIAL_AT_POINTS_MEMORY_BUDGET` bytes.
+        When several results are given, each block of the matrix is used for all of them.
+
+        Parameters
+        ----------
+        results : LinearPotentialFlowResult or list of LinearPotentialFlowResult
+            the return of Nemoh's solver; several results should share the same body and the same environment
+            (as for instance the radiation problems of all the dofs of a body at a given frequency)
+        points : array of shape (nb_points, 3)
+            the points where the potential is computed
+        velocity : bool, optional
+            if True, also return the velocity, that is the gradient of the potential (default: False)
+        chunk_size : int, optional
+            Number of points for which the matrix is computed at the same time
+            (default: derived from the memory budget and the number of faces of the body).
+
+        Returns
+        -------
+        array of shape (nb_points,) or (nb_results, nb_points)
+            potential at the points
+        array of shape (nb_points, 3) or (nb_results, nb_points, 3)
+            velocity at the points (only if velocity is True)
+
+        Raises
+        ------
+        Exception: if the :code:`Result` objects given as input do not contain the source distribution.
+        """
+        single_result = not isinstance(results, (list, tuple))
+        if single_result:
+            results = [results]
+
+        for result in results:
+            if result.sources is None:
+                raise Exception(f"""The values of the sources of {result} cannot been found.
+                They probably have not been stored by the solver because the option keep_details=True have not been set.
+                Please re-run the resolution with this option.""")
+
+        reference = results[0]
+        for result in results[1:]:
+            if (result.body is not reference.body or result.wavenumber != reference.wavenumber
+                    or result.free_surface != reference.free_surface or result.sea_bottom != reference.sea_bottom):
+                raise ValueError("The results given to get_potential_at_points should share the same body and environment.")
+
+        points = np.asarray(points, dtype=np.float64).reshape((-1, 3))
+        LOG.info(f"Compute potential at {len(points)} points for {len(results)} result(s) on {reference.body.name}.")
+
+        sources = np.array([result.sources for result in results]).T  # shape (nb_faces, nb_results)
+        phi = np.empty((len(points), len(results)), dtype=np.complex128)
+        if velocity:
+            u = np.empty((len(points), 3, len(results)), dtype=np.complex128)
+
+        if chunk_size is None:
+            # Complex-valued S and, if needed, its three components of the gradient.
+            bytes_per_point = 16 * reference.body.mesh.nb_faces * (4 if velocity else 1)
+            chunk_size = max(1, POTENTIAL_AT_POINTS_MEMORY_BUDGET // max(1, bytes_per_point))
+
+        for i in range(0, len(points), chunk_size):
+            rows = slice(i, i+chunk_size)
+            S = self.green_function.evaluate_at_points(
+                points[rows],
+                reference.body.mesh,
+                free_surface=reference.free_surface,
+                sea_bottom=reference.sea_bottom,
+                wavenumber=reference.wavenumber,
+                gradient=velocity,
+            )
+            if velocity:
+                S, grad_S = S
+                u[rows] = np.einsum('ijk,jl->ikl', grad_S, sources)
+            phi[rows] = S @ sources
+
+        LOG.debug(f"Done computing potential at {len(points)} points.")
+
+        phi = phi.T
+        if velocity:
+            u = np.moveaxis(u, 2, 0)
+        if single_result:
+            phi = phi[0]
+            if velocity:
+                u = u[0]
+        return (phi, u) if velocity else phi
+
     def get_potential_on_mesh(self, result, mesh, chunk_size=50):
         """Compute the potential on a mesh for the potential field of a previously solved problem.
         Since the interaction matrix does not need to be computed in full to compute the matrix-vector product,
@@ -437,40 +726,9 @@ class Nemoh:
         Exception: if the :code:`Result` object given as input does not contain the source distribution.
         """
         LOG.info(f"Compute potential on {mesh.name} for {result}.")
+        return self.get_potential_at_points(result, mesh.faces_centers, chunk_size=chunk_size)
 
-        if result.sources is None:
-            raise Exception(f"""The values of the sources of {result} cannot been found.
-            They probably have not been stored by the solver because the option keep_details=True have not been set.
-            Please re-run the resolution with this option.""")
-
-        if chunk_size > mesh.nb_faces:
-            S, _ = self.build_matrices(
-                mesh,
-                result.body.mesh,
-                free_surface=result.free_surface,
-                sea_bottom=result.sea_bottom,
-                wavenumber=result.wavenumber
-            )
-            phi = S @ result.sources
-
-        else:
-            phi = np.empty((mesh.nb_faces,), dtype=np.complex128)
-
-            for i in range(0, mesh.nb_faces, chunk_size):
-                S, _ = self.build_matrices(
-                    mesh.extract_faces(list(range(i, i+chunk_size))),
-                    result.body.mesh,
-                    free_surface=result.free_surface,
-                    sea_bottom=result.sea_bottom,
-                    wavenumber=result.wavenumber
-                )
-                phi[i:i+chunk_size] = S @ result.sources
-
-        LOG.debug(f"Done computing potential on {mesh.name} for {result}.")
-
-        return phi
-
-    def get_free_surface_elevation(self, result, free_surface, keep_details=False):
+    def get_free_surface_elevation(self, result, free_surface, keep_details=False, far_field_radius=None):
         """Compute the elevation of the free surface on a mesh for a previously solved problem.
 
         Parameters
@@ -481,6 +739,10 @@ class Nemoh:
             a meshed free surface
         keep_details : bool, optional
             if True, keep the free surface elevation in the LinearPotentialFlowResult (default:False)
+        far_field_radius : float, optional
+            if set, the elevation at a horizontal distance from the center of the body larger than this radius
+            is approximated from the Kochin function (see :func:`~capytaine.post_pro.kochin.far_field_potential`).
+            The radius should be several wavelengths. (default: None, that is the exact computation everywhere)
 
         Returns
         -------
@@ -491,7 +753,19 @@ class Nemoh:
         ------
         Exception: if the :code:`Result` object given as input does not contain the source distribution.
         """
-        fs_elevation = 1j*result.omega/result.g * self.get_potential_on_mesh(result, free_surface.mesh)
+        if far_field_radius is None:
+            potential = self.get_potential_on_mesh(result, free_surface.mesh)
+        else:
+            points = free_surface.mesh.faces_centers
+            center = np.mean(result.body.mesh.faces_centers[:, 0:2], axis=0)
+            far = np.linalg.norm(points[:, 0:2] - center, axis=1) > far_field_radius
+            LOG.info(f"Compute potential on {free_surface.mesh.name} for {result}, "
+                     f"with far field approximation for {np.count_nonzero(far)} faces.")
+            potential = np.empty(free_surface.mesh.nb_faces, dtype=np.complex128)
+            potential[~far] = self.get_potential_at_points(result, points[~far])
+            potential[far] = far_field_potential(result, points[far], ref_point=center)
+
+        fs_elevation = 1j*result.omega/result.g * potential
         if keep_details:
             result.fs_elevation[free_surface] = fs_elevation
         return fs_elevation
@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Compact storage of a large set of radiation and diffraction problems.
+
+Example
+-------
+
+::
+
+    problems = ProblemSet.from_dataset(test_matrix, [body])
+    results = Nemoh().solve_all(problems)
+
+"""
+# Copyright (C) 2017-2019 Matthieu Ancellin
+# See LICENSE file at <https://github.com/mancellin/capytaine>
+
+import logging
+from itertools import product
+
+import numpy as np
+
+from capytaine.bem.problems_and_results import (LinearPotentialFlowProblem, DiffractionProblem, RadiationProblem,
+                                                _without_validators)
+from capytaine.bem.airy_waves import _airy_waves_velocity
+from capytaine.bem.dispersion_relation import solve_dispersion_relation
+
+LOG = logging.getLogger(__name__)
+
+
+class ProblemSet:
+    """A set of radiation and diffraction problems stored as columns of parameters.
+
+    The problems are sorted in the same order as a sorted list of problems, such that the problems
+    sharing the same influence matrices are next to each other. The problem objects are only built
+    when they are accessed, without running again the checks of their parameters, and their
+    boundary conditions can be computed at once for a group of problems.
+
+    Parameters
+    ----------
+    bodies: list of FloatingBody
+        the bodies involved in the problems
+    body_id: array of ints
+        index of the body of each problem in the list of bodies
+    omega: array of floats
+        angular frequency of each problem
+    wave_direction: array of floats, optional
+        direction of the incoming waves of the diffraction problems, NaN for the radiation problems
+    radiating_dof: array of str, optional
+        radiating dof of the radiation problems, None for the diffraction problems
+    free_surface, sea_bottom, g, rho: arrays of floats, optional
+        the other parameters of the problems, with the same default values as in the problem classes
+
+    All the arrays are broadcasted together.
+    """
+
+    def __init__(self, bodies, body_id, omega, wave_direction=np.nan, radiating_dof=None,
+                 free_surface=LinearPotentialFlowProblem.default_parameters['free_surface'],
+                 sea_bottom=LinearPotentialFlowProblem.default_parameters['sea_bottom'],
+                 g=LinearPotentialFlowProblem.default_parameters['g'],
+                 rho=LinearPotentialFlowProblem.default_parameters['rho']):
+        self.bodies = list(bodies)
+
+        radiating_dof = np.asarray(radiating_dof, dtype=object)
+        body_id, omega, wave_direction, radiating_dof, free_surface, sea_bottom, g, rho = (
+            np.array(column).ravel() for column in np.broadcast_arrays(
+                body_id, omega, wave_direction, radiating_dof, free_surface, sea_bottom, g, rho))
+        is_radiation = np.array([dof is not None for dof in radiating_dof], dtype=bool)
+        assert np.all(np.isnan(wave_direction[is_radiation].astype(float))), \
+            "A problem cannot have both a wave direction and a radiating dof."
+        assert not np.any(np.isnan(wave_direction[~is_radiation].astype(float))), \
+            "Each problem should have either a wave direction or a radiating dof."
+
+        # Same order as sorted(list_of_problems).
+        body_rank = np.argsort(np.argsort([body.name for body in self.bodies], kind='stable'))
+        order = np.lexsort((rho, g, omega, sea_bottom, free_surface, body_rank[body_id.astype(int)]))
+
+        self.body_id = body_id[order].astype(int)
+        self.omega = omega[order].astype(float)
+        self.wave_direction = wave_direction[order].astype(float)
+        self.radiating_dof = radiating_dof[order]
+        self.free_surface = free_surface[order].astype(float)
+        self.sea_bottom = sea_bottom[order].astype(float)
+        self.g = g[order].astype(float)
+        self.rho = rho[order].astype(float)
+
+        self._check_parameters()
+
+    def _check_parameters(self):
+        """Check once each set of parameters, instead of once for each problem."""
+        environments = set(zip(self.body_id, self.free_surface, self.sea_bottom, self.omega, self.g, self.rho))
+        for body_id, free_surface, sea_bottom, omega, g, rho in environments:
+            LinearPotentialFlowProblem(body=self.bodies[body_id], free_surface=free_surface,
+                                       sea_bottom=sea_bottom, omega=omega, g=g, rho=rho)
+
+        radiating_dofs = set(zip(self.body_id, self.radiating_dof))
+        for body_id, dof in radiating_dofs:
+            if dof is not None:
+                RadiationProblem(body=self.bodies[body_id], radiating_dof=dof)
+
+    @classmethod
+    def from_dataset(cls, dataset, bodies):
+        """Build the set of problems defined by the coordinates of a test matrix.
+        See :func:`~capytaine.io.xarray.problems_from_dataset`."""
+        from capytaine.io.xarray import _unsqueeze_dimensions
+
+        assert len(list(set(body.name for body in bodies))) == len(bodies), \
+            "All bodies should have different names."
+
+        dataset = _unsqueeze_dimensions(dataset)
+
+        omega_range = dataset['omega'].data if 'omega' in dataset else [LinearPotentialFlowProblem.default_parameters['omega']]
+        water_depth_range = dataset['water_depth'].data if 'water_depth' in dataset else [-LinearPotentialFlowProblem.default_parameters['sea_bottom']]
+        rho_range = dataset['rho'].data if 'rho' in dataset else [LinearPotentialFlowProblem.default_parameters['rho']]
+
+        wave_direction_range = dataset['wave_direction'].data if 'wave_direction' in dataset else []
+        radiating_dofs = dataset['radiating_dof'].data if 'radiating_dof' in dataset else []
+
+        if 'body_name' in dataset:
+            assert set(dataset['body_name'].data) <= {body.name for body in bodies}, \
+                "Some body named in the dataset was not given as argument to `problems_from_dataset`."
+            bodies = [body for body in bodies if body.name in dataset['body_name'].data]
+            # Only the bodies listed in the dataset have been kept
+        body_ids = range(len(bodies))
+
+        columns = {'omega': [], 'wave_direction': [], 'radiating_dof': [], 'water_depth': [], 'body_id': [], 'rho': []}
+        for omega, wave_direction, water_depth, body_id, rho \
+                in product(omega_range, wave_direction_range, water_depth_range, body_ids, rho_range):
+            for name, value in zip(columns, (omega, wave_direction, None, water_depth, body_id, rho)):
+                columns[name].append(value)
+        for omega, radiating_dof, water_depth, body_id, rho \
+                in product(omega_range, radiating_dofs, water_depth_range, body_ids, rho_range):
+            for name, value in zip(columns, (omega, np.nan, radiating_dof, water_depth, body_id, rho)):
+                columns[name].append(value)
+
+        radiating_dof = np.empty(len(columns['radiating_dof']), dtype=object)
+        radiating_dof[:] = columns['radiating_dof']
+        return cls(bodies, body_id=columns['body_id'], omega=columns['omega'],
+                   wave_direction=columns['wave_direction'], radiating_dof=radiating_dof,
+                   sea_bottom=-np.asarray(columns['water_depth'], dtype=float), rho=columns['rho'])
+
+    def __len__(self):
+        return len(self.omega)
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def __getitem__(self, i):
+        parameters = dict(body=self.bodies[self.body_id[i]], omega=self.omega[i],
+                          free_surface=self.free_surface[i], sea_bottom=self.sea_bottom[i],
+                          g=self.g[i], rho=self.rho[i])
+        with _without_validators():
+            if self.radiating_dof[i] is None:
+                return DiffractionProblem(wave_direction=self.wave_direction[i], **parameters)
+            else:
+                return RadiationProblem(radiating_dof=self.radiating_dof[i], **parameters)
+
+    def __repr__(self):
+        nb_radiation_problems = sum(dof is not None for dof in self.radiating_dof)
+        return (f"{self.__class__.__name__}({len(self) - nb_radiation_problems} diffraction problems, "
+                f"{nb_radiation_problems} radiation problems, "
+                f"bodies={{{', '.join(body.name for body in self.bodies)}}})")
+
+    def groups(self):
+        """Iterate over groups of consecutive problems involving the same influence matrices.
+
+        Yields
+        ------
+        array of ints
+            indices of the problems of the group
+        """
+        keys = np.column_stack([self.body_id, self.free_surface, self.sea_bottom, self.omega, self.g])
+        if len(keys) == 0:
+            return
+        new_group = np.ones(len(keys), dtype=bool)
+        new_group[1:] = np.any(keys[1:] != keys[:-1], axis=1)
+        boundaries = np.append(np.flatnonzero(new_group), len(keys))
+        for start, end in zip(boundaries[:-1], boundaries[1:]):
+            yield np.arange(start, end)
+
+    def boundary_conditions(self, ids):
+        """Compute at once the boundary conditions of a group of problems sharing the same body and environment.
+
+        Parameters
+        ----------
+        ids: array of ints
+            indices of the problems, for instance as given by :meth:`groups`
+
+        Returns
+        -------
+        array of shape (len(ids), nb_faces)
+            the boundary conditions of the problems
+        """
+        i = ids[0]
+        assert all(np.all(column[ids] == column[i]) for column in (self.body_id, self.free_surface, self.sea_bottom, self.omega, self.g)), \
+            "The boundary conditions can only be computed at once for problems with the same body and environment."
+
+        mesh = self.bodies[self.body_id[i]].mesh
+        dofs = self.bodies[self.body_id[i]].dofs
+        boundary_conditions = np.empty((len(ids), mesh.nb_faces), dtype=np.complex128)
+
+        is_diffraction = np.array([dof is None for dof in self.radiating_dof[ids]], dtype=bool)
+        if np.any(is_diffraction):
+            depth = self.free_surface[i] - self.sea_bottom[i]
+            velocities = _airy_waves_velocity(
+                mesh.faces_centers, self.wave_direction[ids[is_diffraction]], self.omega[i],
+                solve_dispersion_relation(self.omega[i], depth, self.g[i]), depth, self.g[i],
+            )
+            boundary_conditions[is_diffraction, :] = -np.einsum('ijk,ik->ji', velocities, mesh.faces_normals)
+
+        if not np.all(is_diffraction):
+            dofs_normals = self.bodies[self.body_id[i]].dofs_normals
+            dofs_ids = [list(dofs).index(dof) for dof in self.radiating_dof[ids[~is_diffraction]]]
+            boundary_conditions[~is_diffraction, :] = dofs_normals[dofs_ids, :].toarray()
+
+        return boundary_conditions
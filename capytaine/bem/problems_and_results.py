@@ -5,16 +5,26 @@
 # See LICENSE file at <https://github.com/mancellin/capytaine>
 
 import logging
+from contextlib import contextmanager
 
-from attr import attrs, attrib, astuple, Factory, asdict
+from attr import attrs, attrib, astuple, Factory, asdict, evolve, validators
 
 import numpy as np
-from scipy.optimize import newton
+
+from capytaine.bem.dispersion_relation import solve_dispersion_relation
 
 
 LOG = logging.getLogger(__name__)
 
 
+@contextmanager
+def _without_validators():
+    """Context manager to build problems from parameters that have already been checked,
+    such as the ones of another problem, without running the validators again (requires attrs>=21.3)."""
+    with validators.disabled():
+        yield
+
+
 @attrs(cmp=False)
 class LinearPotentialFlowProblem:
     """General class of a potential flow problem.
@@ -102,10 +112,13 @@ class LinearPotentialFlowProblem:
 
     @property
     def wavenumber(self):
-        if self.depth == np.infty or self.omega**2*self.depth/self.g > 20:
-            return self.omega**2/self.g
-        else:
-            return newton(lambda x: x*np.tanh(x) - self.omega**2*self.depth/self.g, x0=1.0)/self.depth
+        # The result is memoised, as long as the parameters of the problem are unchanged.
+        parameters = (self.omega, self.depth, self.g)
+        cache = self.__dict__.get('_wavenumber_cache')
+        if cache is None or cache[0] != parameters:
+            cache = (parameters, solve_dispersion_relation(*parameters))
+            self._wavenumber_cache = cache
+        return cache[1]
 
     @property
     def wavelength(self):
@@ -135,6 +148,26 @@ class LinearPotentialFlowProblem:
         else:
             raise AttributeError("Dimensionless wavenumber is defined only for finite depth problems.")
 
+    @property
+    def boundary_condition(self):
+        """Normal velocity on the faces of the body.
+        Unless it has been set explicitly, it is computed at the first access."""
+        if '_boundary_condition' not in self.__dict__:
+            self._boundary_condition = self._compute_boundary_condition()
+        return self._boundary_condition
+
+    @boundary_condition.setter
+    def boundary_condition(self, value):
+        self._boundary_condition = value
+
+    @boundary_condition.deleter
+    def boundary_condition(self):
+        """Free the memory used by the boundary condition. It will be computed again if needed."""
+        self.__dict__.pop('_boundary_condition', None)
+
+    def _compute_boundary_condition(self):
+        raise AttributeError(f"No boundary condition has been defined for {self}.")
+
     @property
     def influenced_dofs(self):
         # TODO: let the user choose the influenced dofs
@@ -153,16 +186,19 @@ class DiffractionProblem(LinearPotentialFlowProblem):
     convention = attrib(default="Nemoh", repr=False)
 
     def __attrs_post_init__(self):
-        from capytaine.bem.airy_waves import airy_waves_velocity
         if self.body is not None:
-            self.boundary_condition = -(
-                    airy_waves_velocity(self.body.mesh.faces_centers, self, convention=self.convention)
-                    * self.body.mesh.faces_normals
-            ).sum(axis=1)
-
             if len(self.body.dofs) == 0:
                 LOG.warning(f"The body {self.body.name} used in diffraction problem has no dofs!")
 
+    def _compute_boundary_condition(self):
+        from capytaine.bem.airy_waves import airy_waves_velocity
+        if self.body is None:
+            return super()._compute_boundary_condition()
+        return -(
+                airy_waves_velocity(self.body.mesh.faces_centers, self, convention=self.convention)
+                * self.body.mesh.faces_normals
+        ).sum(axis=1)
+
     def _str_other_attributes(self):
         return [f"wave_direction={self.wave_direction:.3f}"]
 
@@ -190,7 +226,7 @@ class RadiationProblem(LinearPotentialFlowProblem):
         return "RadiationProblem(" + ''.join(parameters)[:-2] + ")"
 
     def __attrs_post_init__(self):
-        """Set the boundary condition"""
+        """Check the radiating dof"""
         if self.body is None:
             self.boundary_condition = None
             return
@@ -207,8 +243,8 @@ class RadiationProblem(LinearPotentialFlowProblem):
                       f"The dofs of the body are {list(self.body.dofs.keys())}")
             raise ValueError("Unrecognized degree of freedom name.")
 
-        dof = self.body.dofs[self.radiating_dof]
-        self.boundary_condition = np.sum(dof * self.body.mesh.faces_normals, axis=1)
+    def _compute_boundary_condition(self):
+        return self.body.dofs_normals[list(self.body.dofs).index(self.radiating_dof)].toarray().ravel()
 
     def _str_other_attributes(self):
         return [f"radiating_dof={self.radiating_dof}"]
@@ -251,14 +287,18 @@ class LinearPotentialFlowResult:
 @attrs
 class DiffractionResult(LinearPotentialFlowResult):
     forces = attrib(default=Factory(dict), init=False, repr=False)
+    # Computed when first needed, or for several results at once by precompute_froude_krylov_forces.
+    froude_krylov_forces = attrib(default=None, init=False, repr=False)
 
     def store_force(self, dof, force):
         self.forces[dof] = 1j*self.omega*force
 
     @property
     def records(self):
-        from capytaine.bem.airy_waves import froude_krylov_force
-        FK = froude_krylov_force(self.problem)
+        if self.froude_krylov_forces is None:
+            from capytaine.bem.airy_waves import froude_krylov_force
+            self.froude_krylov_forces = froude_krylov_force(self.problem)
+        FK = self.froude_krylov_forces
         return [dict(self.settings_dict, influenced_dof=dof,
                      diffraction_force=self.forces[dof], Froude_Krylov_force=FK[dof])
                 for dof in self.influenced_dofs]
@@ -276,6 +316,48 @@ class RadiationResult(LinearPotentialFlowResult):
         else:
             self.radiation_dampings[dof] = self.problem.omega * force.imag
 
+    def force(self, dof):
+        """Complex-valued integral of the potential on the influenced dof, as given to :meth:`store_force`."""
+        if self.problem.omega in {0, np.infty}:
+            return self.added_masses[dof]
+        else:
+            return self.added_masses[dof] + 1j*self.radiation_dampings[dof]/self.problem.omega
+
+    @staticmethod
+    def linear_combination(results, coefficients, radiating_dof):
+        """Deduce the result of the radiation problem of a dof that is a linear combination
+        of the radiating dofs of some other results, by superposition.
+
+        Parameters
+        ----------
+        results: list of RadiationResult
+            results of radiation problems with the same body and environment
+        coefficients: list of complex
+            coefficients of the linear combination, one for each result
+        radiating_dof: str
+            name of the dof of the body that is the linear combination of the radiating dofs of the results
+
+        Returns
+        -------
+        RadiationResult
+        """
+        first = results[0]
+        assert all(result.body is first.body and
+                   (result.omega, result.free_surface, result.sea_bottom, result.g, result.rho) ==
+                   (first.omega, first.free_surface, first.sea_bottom, first.g, first.rho)
+                   for result in results), \
+            "Only the results of radiation problems with the same body and environment can be combined."
+
+        with _without_validators():
+            combined = evolve(first.problem, radiating_dof=radiating_dof).make_results_container()
+        for dof in combined.influenced_dofs:
+            combined.store_force(dof, sum(c*result.force(dof) for c, result in zip(coefficients, results)))
+        if all(result.sources is not None for result in results):
+            combined.sources = sum(c*result.sources for c, result in zip(coefficients, results))
+        if all(result.potential is not None for result in results):
+            combined.potential = sum(c*result.potential for c, result in zip(coefficients, results))
+        return combined
+
     @property
     def records(self):
         return [dict(self.settings_dict, influenced_dof=dof,
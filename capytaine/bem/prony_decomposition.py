@@ -15,9 +15,19 @@ from scipy.optimize import curve_fit
 from scipy.linalg import toeplitz
 
 import capytaine.bem.NemohCore as NemohCore
+from capytaine.io.cache import cache_directory, load_or_compute
 
 LOG = logging.getLogger(__name__)
 
+# Tabulation of the decompositions, see `tabulated_exponential_decompositions`.
+# The version number should be incremented whenever the content of the table is changed.
+PRONY_TABLE_VERSION = 1
+PRONY_TABLE_RANGE = (1e-3, 25.0)  # Range of dimensionless wavenumbers kh covered by the table.
+PRONY_TABLE_SIZE = 2001
+
+# Maximum absolute error on the approximated function, as in the Fortran implementation.
+PRONY_PRECISION = 1e-2
+
 
 @lru_cache(maxsize=128)
 def find_best_exponential_decomposition(dimensionless_omega, dimensionless_wavenumber, method='fortran'):
@@ -28,6 +38,10 @@ def find_best_exponential_decomposition(dimensionless_omega, dimensionless_waven
     Until the problem is better understood, the Fortran implementation is the default one, to ensure consistency with Nemoh.
     The Fortran version is also significantly faster...
 
+    With the method 'tabulated', the decomposition is read in a precomputed table of decompositions
+    (see :func:`tabulated_exponential_decompositions`), after checking its accuracy.
+    The Fortran implementation is used when no suitable decomposition is found in the table.
+
     Results are cached.
 
     Parameters
@@ -49,7 +63,14 @@ def find_best_exponential_decomposition(dimensionless_omega, dimensionless_waven
               f"for dimless_omega=%.2e and dimless_wavenumber=%.2e",
               dimensionless_omega, dimensionless_wavenumber)
 
-    if method.lower() == 'python':
+    if method.lower() == 'tabulated':
+        decomposition = _read_tabulated_decomposition(dimensionless_omega, dimensionless_wavenumber)
+        if decomposition is None:
+            LOG.debug("\tNo suitable decomposition in the table, use the Fortran implementation instead.")
+            return find_best_exponential_decomposition(dimensionless_omega, dimensionless_wavenumber, method='fortran')
+        a, lamda = decomposition
+
+    elif method.lower() == 'python':
         # The function that will be approximated.
         @np.vectorize
         def f(x):
@@ -88,6 +109,108 @@ def find_best_exponential_decomposition(dimensionless_omega, dimensionless_waven
     return a, lamda
 
 
+def tabulated_exponential_decompositions():
+    """Table of the decompositions computed by the Fortran implementation for a range of
+    dimensionless wavenumbers :math:`kh` (with :math:`\\omega^2 h/g = kh \\tanh(kh)`).
+
+    The table is computed at the first call and saved on disk in the directory given by the environment
+    variable CAPYTAINE_CACHE_DIR (default: ~/.cache/capytaine), such that it is only computed once.
+
+    Returns
+    -------
+    dict of arrays
+        'dimensionless_wavenumber': the kh values (log-spaced) of the table,
+        'a' and 'lamda': the coefficients of the exponentials (padded with zeros),
+        'nexp': the number of exponentials,
+        'error': the maximum error of the decomposition.
+    """
+    return _load_or_compute_table(cache_directory(), f"prony_table_v{PRONY_TABLE_VERSION}.npz")
+
+
+@lru_cache(maxsize=1)
+def _load_or_compute_table(directory, filename):
+    # The directory is an argument such that it is part of the key of the lru_cache.
+    return load_or_compute(filename, _compute_table, version=PRONY_TABLE_VERSION, directory=directory)
+
+
+def _compute_table():
+    LOG.info("Compute the table of Prony decompositions for the finite depth Green function.")
+    wavenumbers = np.geomspace(*PRONY_TABLE_RANGE, PRONY_TABLE_SIZE)
+    table = {'dimensionless_wavenumber': wavenumbers,
+             'a': np.zeros((PRONY_TABLE_SIZE, 31)),
+             'lamda': np.zeros((PRONY_TABLE_SIZE, 31)),
+             'nexp': np.zeros(PRONY_TABLE_SIZE, dtype=int),
+             'error': np.zeros(PRONY_TABLE_SIZE)}
+    for i, kh in enumerate(wavenumbers):
+        lamda, a, nexp = NemohCore.old_prony_decomposition.lisc(kh*np.tanh(kh), kh)
+        table['lamda'][i, :nexp] = lamda[:nexp]
+        table['a'][i, :nexp] = a[:nexp]
+        table['nexp'][i] = nexp
+        table['error'][i] = _decomposition_error(kh*np.tanh(kh), kh, a[:nexp], lamda[:nexp])
+    return table
+
+
+def _read_tabulated_decomposition(dimensionless_omega, dimensionless_wavenumber):
+    """Look for an accurate decomposition in the table.
+    The decompositions of the two closest dimensionless wavenumbers of the table are tried,
+    then a linear interpolation between them, which is also a sum of exponentials.
+    Returns None if none of them is accurate enough."""
+    kh = dimensionless_wavenumber
+    if not (PRONY_TABLE_RANGE[0] <= kh <= PRONY_TABLE_RANGE[1]
+            and np.isclose(dimensionless_omega, kh*np.tanh(kh), rtol=1e-6)):
+        return None
+
+    table = tabulated_exponential_decompositions()
+    wavenumbers = table['dimensionless_wavenumber']
+    i = min(np.searchsorted(wavenumbers, kh, side='right') - 1, len(wavenumbers) - 2)
+
+    def read(i):
+        return table['a'][i, :table['nexp'][i]], table['lamda'][i, :table['nexp'][i]]
+
+    tolerance = max(PRONY_PRECISION, 1.1*min(table['error'][i], table['error'][i+1]))
+
+    t = np.log(kh/wavenumbers[i])/np.log(wavenumbers[i+1]/wavenumbers[i])
+    (a_0, lamda_0), (a_1, lamda_1) = read(i), read(i+1)
+    candidates = [(a_0, lamda_0), (a_1, lamda_1)] if t < 0.5 else [(a_1, lamda_1), (a_0, lamda_0)]
+    candidates.append((np.concatenate([(1-t)*a_0, t*a_1]), np.concatenate([lamda_0, lamda_1])))
+
+    for a, lamda in candidates:
+        if _decomposition_error(dimensionless_omega, kh, a, lamda) <= tolerance:
+            return a, lamda
+    return None
+
+
+def _ff(x, dimensionless_omega, dimensionless_wavenumber):
+    """Vectorized version of the function that is decomposed (see the Fortran function FF)."""
+    ak, am = dimensionless_omega, dimensionless_wavenumber
+    coef = (am+ak)**2/(am**2-ak**2+ak)
+
+    def far_from_pole(x):
+        return (x+ak)*np.exp(x)/(x*np.sinh(x)-ak*np.cosh(x)) - coef/(x-am) - 2
+
+    tol = max(0.1, 0.1*am)
+    x = np.asarray(x, dtype=np.float64)
+    near = np.abs(x - am) <= tol
+    y = np.empty_like(x)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        y[~near] = far_from_pole(x[~near])
+
+    # Quadratic interpolation in the neighborhood of the pole.
+    a, b, c = am - tol, am, am + tol
+    d, f = far_from_pole(a), far_from_pole(c)
+    e = coef/(am+ak)*(am+ak+1) - (coef/(am+ak))**2*am - 2
+    xn = x[near]
+    y[near] = (d*(xn-b)*(xn-c)/((a-b)*(a-c)) + e*(xn-c)*(xn-a)/((b-c)*(b-a)) + f*(xn-a)*(xn-b)/((c-a)*(c-b)))
+    return y
+
+
+def _decomposition_error(dimensionless_omega, dimensionless_wavenumber, a, lamda):
+    """Maximum absolute error of the decomposition on the range where it is checked by the Fortran implementation."""
+    X = np.linspace(0.0, 20.0, 241)
+    approximation = np.sum(np.asarray(a)[:, np.newaxis] * np.exp(np.asarray(lamda)[:, np.newaxis] * X), axis=0)
+    return np.max(np.abs(approximation - _ff(X, dimensionless_omega, dimensionless_wavenumber)))
+
+
 def exponential_decomposition(X, F, m):
     """Use Prony's method to approximate the sampled real function F=f(X) as a sum of m
     exponential functions x → Σ a_i exp(lamda_i x).
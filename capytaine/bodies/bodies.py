@@ -10,11 +10,13 @@ from itertools import chain, accumulate, product, zip_longest
 
 import numpy as np
 import xarray as xr
+from scipy import sparse
 
-from capytaine.meshes.geometry import Abstract3DObject, Plane, inplace_transformation
+from capytaine.meshes.geometry import Abstract3DObject, Axis, Plane, inplace_transformation
 from capytaine.meshes.meshes import Mesh
 from capytaine.meshes.symmetric import build_regular_array_of_meshes
 from capytaine.meshes.collections import CollectionOfMeshes
+from capytaine.bodies.dofs import AbstractDof, TranslationDof, RotationDof, DofOnSubMesh, DofOnFaces, DofsDict
 
 LOG = logging.getLogger(__name__)
 
@@ -32,6 +34,8 @@ class FloatingBody(Abstract3DObject):
     a complex-valued array of shape (nb_faces, 3). To each face of the body
     (as indexed in the mesh) corresponds a complex-valued 3d vector, which
     defines the displacement of the center of the face in frequency domain.
+    The rigid body dofs are stored in a parametric form (see :mod:`capytaine.bodies.dofs`)
+    and these arrays are only built when they are accessed.
 
     Parameters
     ----------
@@ -57,6 +61,7 @@ class FloatingBody(Abstract3DObject):
             name = mesh.name
 
         assert isinstance(mesh, Mesh) or isinstance(mesh, CollectionOfMeshes)
+        self.__internals__ = dict()  # Cached properties, deleted by the in-place transformations.
         self.mesh = mesh
         self.full_body = None
         self.dofs = dofs
@@ -65,12 +70,17 @@ class FloatingBody(Abstract3DObject):
         LOG.info(f"New floating body: {self.name}.")
 
     @staticmethod
-    def from_file(filename: str, file_format=None, name=None) -> 'FloatingBody':
-        """Create a FloatingBody from a mesh file using meshmagick."""
+    def from_file(filename: str, file_format=None, name=None, detect_symmetries=False) -> 'FloatingBody':
+        """Create a FloatingBody from a mesh file using meshmagick.
+        If detect_symmetries is True, the symmetries of the mesh are looked for with
+        :func:`~capytaine.meshes.symmetric.detect_symmetries`, in order to speed up the resolution."""
         from capytaine.io.mesh_loaders import load_mesh
+        from capytaine.meshes.symmetric import detect_symmetries as build_symmetric_mesh
         if name is None:
             name = filename
         mesh = load_mesh(filename, file_format, name=f"{name}_mesh")
+        if detect_symmetries:
+            mesh = build_symmetric_mesh(mesh)
         return FloatingBody(mesh, name=name)
 
     def __lt__(self, other: 'FloatingBody') -> bool:
@@ -81,11 +91,79 @@ class FloatingBody(Abstract3DObject):
     #  Dofs  #
     ##########
 
+    @property
+    def mesh(self):
+        """The mesh of the body."""
+        return self._mesh
+
+    @mesh.setter
+    def mesh(self, mesh):
+        if hasattr(self, '_dofs'):
+            # The dofs defined with respect to the structure of the previous mesh are evaluated on it.
+            # A new container is created, in case the previous one is shared with a shallow copy of the body.
+            self._dofs = DofsDict(self, {
+                name: dof.evaluate_motion(self._mesh) if isinstance(dof, (DofOnSubMesh, DofOnFaces)) else dof
+                for name, dof in self._dofs.definitions()})
+        self._mesh = mesh
+
+    @property
+    def dofs(self) -> DofsDict:
+        """The degrees of freedom of the body, as a dict-like object associating their names
+        to arrays of shape (nb_faces, 3)."""
+        return self._dofs
+
+    @dofs.setter
+    def dofs(self, dofs):
+        # The dofs of another body are evaluated on the mesh of the other body.
+        self._dofs = DofsDict(self, dofs)
+
     @property
     def nb_dofs(self) -> int:
         """Number of degrees of freedom."""
         return len(self.dofs)
 
+    @property
+    def dofs_normals(self) -> sparse.csr_matrix:
+        """Normal component of the dofs on each face of the mesh, as a sparse matrix of shape (nb_dofs, nb_faces).
+        The rows are in the same order as the dofs.
+        The radiation boundary condition of a dof is the corresponding row.
+        The dofs of the bodies of a joined body are only stored on the faces of their own body."""
+        return self._dofs_normals()[0]
+
+    @property
+    def dofs_weighted_normals(self) -> sparse.csr_matrix:
+        """Normal component of the dofs weighted by the area of the faces,
+        as a sparse matrix of shape (nb_dofs, nb_faces).
+        The integrals on the hull of a pressure field projected on all the dofs are computed at once
+        by a product with this matrix."""
+        return self._dofs_normals()[1]
+
+    def _dofs_normals(self):
+        # The result is memoised until the next in-place transformation of the body, as long as the geometry of the
+        # faces of the mesh and the definitions of the dofs are the same.
+        # The geometry is compared by value, since the mesh might have been transformed directly.
+        # The dofs are expected to be replaced (and not modified in place) when they are changed.
+        internals = self.__dict__.setdefault('__internals__', dict())
+        cache = internals.get('dofs_normals')
+        geometry = (self.mesh.faces_centers, self.mesh.faces_normals, self.mesh.faces_areas)
+        definitions = tuple(dof for _, dof in self.dofs.definitions())
+        if (cache is None or cache[0] != tuple(self.dofs) or len(cache[1]) != len(definitions)
+                or any(cached is not dof for cached, dof in zip(cache[1], definitions))
+                or not all(np.array_equal(cached, array) for cached, array in zip(cache[2], geometry))):
+            faces_ids, values = [np.zeros(0, dtype=int)], [np.zeros(0)]
+            for dof_name in self.dofs:
+                dof_faces_ids, dof_values = self.dofs.sparse_normal_motion(dof_name)
+                faces_ids.append(dof_faces_ids)
+                values.append(dof_values)  # Might be complex-valued.
+            # Each row only stores the faces where the dof might be non-zero (the faces of its own body in a farm).
+            indptr = np.cumsum([len(ids) for ids in faces_ids])
+            normals = sparse.csr_matrix((np.concatenate(values), np.concatenate(faces_ids), indptr),
+                                        shape=(self.nb_dofs, self.mesh.nb_faces))
+            cache = (tuple(self.dofs), definitions, tuple(array.copy() for array in geometry),
+                     normals, normals @ sparse.diags(geometry[2]))
+            internals['dofs_normals'] = cache
+        return cache[3], cache[4]
+
     def add_translation_dof(self, direction=None, name=None, amplitude=1.0) -> None:
         """Add a new translation dof (in place).
         If no direction is given, the code tries to infer it from the name.
@@ -111,9 +189,7 @@ class FloatingBody(Abstract3DObject):
         direction = np.asarray(direction)
         assert direction.shape == (3,)
 
-        motion = np.empty((self.mesh.nb_faces, 3))
-        motion[:, :] = direction
-        self.dofs[name] = amplitude * motion
+        self.dofs[name] = TranslationDof(amplitude * direction)
 
     def add_rotation_dof(self, axis=None, name=None, amplitude=1.0) -> None:
         """Add a new rotation dof (in place).
@@ -150,11 +226,7 @@ class FloatingBody(Abstract3DObject):
         if name is None:
             name = f"dof_{self.nb_dofs}_rotation"
 
-        if self.mesh.nb_faces == 0:
-            self.dofs[name] = np.empty((self.mesh.nb_faces, 3))
-        else:
-            motion = np.cross(axis_point - self.mesh.faces_centers, axis_direction)
-            self.dofs[name] = amplitude * motion
+        self.dofs[name] = RotationDof(Axis(vector=axis_direction, point=axis_point), amplitude=amplitude)
 
     def add_all_rigid_body_dofs(self) -> None:
         """Add the six degrees of freedom of rigid bodies (in place)."""
@@ -215,9 +287,13 @@ class FloatingBody(Abstract3DObject):
         for body, nbf in zip(bodies, cum_nb_faces):
             # nbf is the cumulative number of faces of the previous subbodies,
             # that is the offset of the indices of the faces of the current body.
-            for name, dof in body.dofs.items():
-                new_dof = np.zeros((total_nb_faces, 3))
-                new_dof[nbf:nbf+len(dof), :] = dof
+            for name, dof in body.dofs.definitions():
+                if isinstance(dof, AbstractDof):
+                    # Only evaluated on the faces of the body, when needed.
+                    new_dof = DofOnSubMesh(dof, body.mesh)
+                else:
+                    new_dof = np.zeros((total_nb_faces, 3))
+                    new_dof[nbf:nbf+len(dof), :] = dof
                 if '__' not in name:
                     new_dof_name = '__'.join([body.name, name])
                 else:
@@ -296,8 +372,128 @@ class FloatingBody(Abstract3DObject):
     def sliced_by_plane(self, plane):
         return FloatingBody(mesh=self.mesh.sliced_by_plane(plane), dofs=self.dofs, name=self.name)
 
+    def decomposed_as_octree(self, leaf_size=100, name=None):
+        """Decompose the mesh as a balanced hierarchical structure, for instance to speed up
+        the resolution of large problems with the Adaptive Cross Approximation.
+
+        The faces are split at the medians of their centers and are not clipped.
+        See :meth:`~capytaine.meshes.meshes.Mesh.decomposed_as_octree` for details.
+
+        Parameters
+        ----------
+        leaf_size: int, optional
+            the maximum number of faces in the smallest sub-meshes (default: 100)
+        name: str, optional
+            a name for the new body
+
+        Returns
+        -------
+        FloatingBody
+            a body whose mesh is a nested CollectionOfMeshes
+        """
+        decomposed_body = copy.copy(self)  # Shallow copy, to keep the other attributes of the body.
+        decomposed_body.__internals__ = dict()
+        decomposed_body.dofs = {}  # Set below. Before the mesh, such that the setter of the mesh does not evaluate them.
+        decomposed_body.mesh, ids = self.mesh.decomposed_as_octree(leaf_size=leaf_size, return_index=True)
+        new_positions = np.empty_like(ids)
+        new_positions[ids] = np.arange(len(ids))
+
+        # The parametric dofs are evaluated on the new mesh, the other ones follow the new ordering of the faces.
+        dofs = {}
+        for dof_name, dof in self.dofs.definitions():
+            if isinstance(dof, (DofOnSubMesh, DofOnFaces)):
+                dof = DofOnFaces.from_dof(dof, self.mesh)
+                dofs[dof_name] = DofOnFaces(dof.dof, np.sort(new_positions[dof.faces_ids]))
+            elif isinstance(dof, AbstractDof):
+                dofs[dof_name] = dof
+            else:
+                dofs[dof_name] = dof[ids]
+        decomposed_body.dofs = dofs
+        if name is not None:
+            decomposed_body.name = name
+        return decomposed_body
+
+    def coarsened(self, cell_size, free_surface=0.0, name=None):
+        """Return a body with a coarser mesh, for instance to solve the problems at long wavelengths.
+
+        The mesh is coarsened by clustering its vertices, such that the waterline is preserved.
+        See :meth:`~capytaine.meshes.meshes.Mesh.coarsened` for details.
+        The dofs of a coarse face are the area-weighted mean of the dofs of the original faces
+        that are the closest to this coarse face.
+
+        Parameters
+        ----------
+        cell_size: float
+            the size of the cells of the coarsening grid, that is roughly the size of the new faces
+        free_surface: float, optional
+            position of the free surface (default: :math:`z = 0`)
+        name: str, optional
+            a name for the new body
+
+        Returns
+        -------
+        FloatingBody
+        """
+        from scipy.spatial import cKDTree
+
+        coarse_body = copy.copy(self)  # Shallow copy, to keep the other attributes of the body.
+        coarse_body.__internals__ = dict()
+        coarse_body.dofs = {}  # Set below. Before the mesh, such that the setter of the mesh does not evaluate them.
+        coarse_body.mesh = self.mesh.coarsened(cell_size, free_surface=free_surface)
+        if name is not None:
+            coarse_body.name = name
+
+        # Each original face contributes to the closest coarse face.
+        _, coarse_ids = cKDTree(coarse_body.mesh.faces_centers).query(self.mesh.faces_centers)
+        weights = np.bincount(coarse_ids, weights=self.mesh.faces_areas, minlength=coarse_body.mesh.nb_faces)
+        # The coarse faces that do not get any contribution use the dofs of the closest original face.
+        _, closest_ids = cKDTree(self.mesh.faces_centers).query(coarse_body.mesh.faces_centers[weights == 0])
+
+        for dof_name, dof in self.dofs.items():
+            coarse_dof = np.zeros((coarse_body.mesh.nb_faces, 3), dtype=np.asarray(dof).dtype)
+            np.add.at(coarse_dof, coarse_ids, self.mesh.faces_areas[:, np.newaxis] * dof)
+            coarse_dof[weights > 0] /= weights[weights > 0, np.newaxis]
+            coarse_dof[weights == 0] = np.asarray(dof)[closest_ids]
+            coarse_body.dofs[dof_name] = coarse_dof
+
+        return coarse_body
+
+    def coarsening_hierarchy(self, free_surface=0.0, nb_levels=4, min_nb_faces=50):
+        """Build a sequence of coarser and coarser versions of the body.
+
+        The size of the cells of the coarsening grid is doubled at each level,
+        starting from twice the typical size of the faces of the original mesh.
+
+        Parameters
+        ----------
+        free_surface: float, optional
+            position of the free surface (default: :math:`z = 0`)
+        nb_levels: int, optional
+            the maximum number of coarse versions of the body (default: 4)
+        min_nb_faces: int, optional
+            the coarsening stops before the number of faces goes below this value (default: 50)
+
+        Returns
+        -------
+        list of FloatingBody
+            the bodies from the finest (the body itself) to the coarsest
+        """
+        hierarchy = [self]
+        cell_size = 2*np.sqrt(np.median(self.mesh.faces_areas))
+        for _ in range(nb_levels):
+            coarse_body = self.coarsened(cell_size, free_surface=free_surface)
+            if coarse_body.mesh.nb_faces < min_nb_faces:
+                break
+            if coarse_body.mesh.nb_faces < 0.8*hierarchy[-1].mesh.nb_faces:
+                hierarchy.append(coarse_body)
+            cell_size *= 2
+        LOG.info(f"Coarsening hierarchy of {self.name}: "
+                 f"{', '.join(str(body.mesh.nb_faces) for body in hierarchy)} faces.")
+        return hierarchy
+
     def minced(self, nb_slices=(8, 8, 4)):
         """Experimental method decomposing the mesh as a hierarchical structure.
+        See also :meth:`decomposed_as_octree` for a decomposition balanced by number of faces.
 
         Parameters
         ----------
@@ -355,8 +551,11 @@ class FloatingBody(Abstract3DObject):
     @inplace_transformation
     def mirror(self, plane):
         self.mesh.mirror(plane)
-        for dof in self.dofs:
-            self.dofs[dof] -= 2 * np.outer(np.dot(self.dofs[dof], plane.normal), plane.normal)
+        for name, dof in list(self.dofs.definitions()):
+            if isinstance(dof, AbstractDof):
+                self.dofs[name] = dof.mirrored(plane)
+            else:
+                self.dofs[name] = dof - 2 * np.outer(np.dot(dof, plane.normal), plane.normal)
         for point_attr in ('geometric_center', 'rotation_center', 'center_of_mass'):
             if point_attr in self.__dict__:
                 self.__dict__[point_attr] -= 2 * (np.dot(self.__dict__[point_attr], plane.normal) - plane.c) * plane.normal
@@ -365,6 +564,9 @@ class FloatingBody(Abstract3DObject):
     @inplace_transformation
     def translate(self, *args):
         self.mesh.translate(*args)
+        for name, dof in list(self.dofs.definitions()):
+            if isinstance(dof, AbstractDof):
+                self.dofs[name] = dof.translated(*args)
         for point_attr in ('geometric_center', 'rotation_center', 'center_of_mass'):
             if point_attr in self.__dict__:
                 self.__dict__[point_attr] += args[0]
@@ -377,8 +579,11 @@ class FloatingBody(Abstract3DObject):
         for point_attr in ('geometric_center', 'rotation_center', 'center_of_mass'):
             if point_attr in self.__dict__:
                 self.__dict__[point_attr] = matrix @ self.__dict__[point_attr]
-        for dof in self.dofs:
-            self.dofs[dof] = (matrix @ self.dofs[dof].T).T
+        for name, dof in list(self.dofs.definitions()):
+            if isinstance(dof, AbstractDof):
+                self.dofs[name] = dof.rotated(axis, angle)
+            else:
+                self.dofs[name] = (matrix @ dof.T).T
         return self
 
     @inplace_transformation
@@ -391,13 +596,17 @@ class FloatingBody(Abstract3DObject):
         LOG.info(f"Clipping {self.name} with respect to {plane}")
         self.mesh.clip(plane)
 
-        # Clip dofs
+        # Clip dofs (the parametric dofs are evaluated on the clipped mesh)
         ids = self.mesh._clipping_data['faces_ids']
-        for dof in self.dofs:
-            if len(ids) > 0:
-                self.dofs[dof] = self.dofs[dof][ids]
+        for name, dof in list(self.dofs.definitions()):
+            if isinstance(dof, DofOnFaces):
+                self.dofs[name] = DofOnFaces(dof.dof, np.flatnonzero(np.isin(ids, dof.faces_ids)))
+            elif isinstance(dof, AbstractDof):
+                continue
+            elif len(ids) > 0:
+                self.dofs[name] = dof[ids]
             else:
-                self.dofs[dof] = np.empty((0, 3))
+                self.dofs[name] = np.empty((0, 3))
         return self
 
     def clipped(self, plane, **kwargs):
@@ -0,0 +1,313 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Parametric definitions of the degrees of freedom of the floating bodies.
+
+The motion of a dof on the faces of a mesh is only evaluated when it is needed,
+such that the memory used by the rigid body dofs does not depend on the size of the mesh.
+
+Example
+-------
+
+::
+
+    body.dofs["Heave"] = TranslationDof(direction=(0, 0, 1))
+    body.dofs["Heave"]  # array of shape (nb_faces, 3)
+
+"""
+# Copyright (C) 2017-2019 Matthieu Ancellin
+# See LICENSE file at <https://github.com/mancellin/capytaine>
+
+import logging
+from abc import ABC, abstractmethod
+from collections.abc import MutableMapping
+
+import numpy as np
+
+LOG = logging.getLogger(__name__)
+
+
+class AbstractDof(ABC):
+    """Definition of a degree of freedom, independent of the discretization of the body.
+
+    The objects are immutable: the transformations return new objects.
+    """
+
+    @abstractmethod
+    def evaluate_motion(self, mesh):
+        """Motion of the dof at the center of each face of the mesh, as an array of shape (nb_faces, 3)."""
+
+    def evaluate_normal_motion(self, mesh):
+        """Normal component of the motion of the dof on each face of the mesh, as an array of shape (nb_faces,)."""
+        return np.sum(self.evaluate_motion(mesh) * mesh.faces_normals, axis=1)
+
+    def evaluate_sparse_normal_motion(self, mesh):
+        """Normal component of the motion of the dof on the faces of the mesh where it might be non-zero,
+        as a couple of arrays (indices of the faces, normal motion on these faces)."""
+        return np.arange(mesh.nb_faces), self.evaluate_normal_motion(mesh)
+
+    @abstractmethod
+    def translated(self, vector):
+        pass
+
+    @abstractmethod
+    def rotated(self, axis, angle):
+        pass
+
+    @abstractmethod
+    def mirrored(self, plane):
+        pass
+
+
+class TranslationDof(AbstractDof):
+    """Rigid body translation.
+
+    Parameters
+    ----------
+    direction: array of shape (3,)
+        the direction of the translation, scaled by its amplitude
+    """
+
+    def __init__(self, direction):
+        self.direction = np.asarray(direction, dtype=np.float64)
+        assert self.direction.shape == (3,)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(direction={self.direction})"
+
+    def evaluate_motion(self, mesh):
+        motion = np.empty((mesh.nb_faces, 3))
+        motion[:, :] = self.direction
+        return motion
+
+    def evaluate_normal_motion(self, mesh):
+        return mesh.faces_normals @ self.direction
+
+    def translated(self, vector):
+        return self
+
+    def rotated(self, axis, angle):
+        return TranslationDof(axis.rotation_matrix(angle) @ self.direction)
+
+    def mirrored(self, plane):
+        return TranslationDof(self.direction - 2 * (self.direction @ plane.normal) * plane.normal)
+
+
+class RotationDof(AbstractDof):
+    """Rigid body rotation.
+
+    Parameters
+    ----------
+    axis: Axis
+        the axis of the rotation
+    amplitude: float, optional
+        amplitude of the rotation (default: 1.0)
+    """
+
+    def __init__(self, axis, amplitude=1.0):
+        self.axis = axis
+        self.amplitude = amplitude
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(axis={self.axis}, amplitude={self.amplitude})"
+
+    def evaluate_motion(self, mesh):
+        if mesh.nb_faces == 0:
+            return np.empty((0, 3))
+        return self.amplitude * np.cross(self.axis.point - mesh.faces_centers, self.axis.vector)
+
+    def translated(self, vector):
+        return RotationDof(self.axis.translated(vector), self.amplitude)
+
+    def rotated(self, axis, angle):
+        return RotationDof(self.axis.rotated(axis, angle), self.amplitude)
+
+    def mirrored(self, plane):
+        # The mirror image of a rotation is a rotation in the opposite direction around the image of the axis.
+        return RotationDof(self.axis.mirrored(plane), -self.amplitude)
+
+
+class DofOnSubMesh(AbstractDof):
+    """Dof of a body that is part of a larger body, such as a body of a farm joined with
+    :meth:`~capytaine.bodies.bodies.FloatingBody.join_bodies`. The motion is zero on the other faces.
+
+    Parameters
+    ----------
+    dof: AbstractDof
+        the dof of the sub-body
+    submesh: Mesh or CollectionOfMeshes
+        the mesh of the sub-body, that is one of the submeshes of the meshes on which the dof is evaluated
+    """
+
+    def __init__(self, dof, submesh):
+        self.dof = dof
+        self.submesh = submesh
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.dof}, submesh={self.submesh.name})"
+
+    def _faces_of_submesh(self, mesh):
+        for i, submesh in enumerate(mesh):
+            if submesh is self.submesh:
+                return mesh.indices_of_mesh(i)
+        return slice(0, 0)  # The submesh has been removed, for instance by clipping.
+
+    def evaluate_motion(self, mesh):
+        motion = np.zeros((mesh.nb_faces, 3))
+        motion[self._faces_of_submesh(mesh)] = self.dof.evaluate_motion(self.submesh)
+        return motion
+
+    def evaluate_normal_motion(self, mesh):
+        normal_motion = np.zeros(mesh.nb_faces)
+        normal_motion[self._faces_of_submesh(mesh)] = self.dof.evaluate_normal_motion(self.submesh)
+        return normal_motion
+
+    def evaluate_sparse_normal_motion(self, mesh):
+        faces_ids = np.arange(mesh.nb_faces)[self._faces_of_submesh(mesh)]
+        if len(faces_ids) == 0:  # The submesh is not part of the mesh.
+            return faces_ids, np.zeros(0)
+        return faces_ids, self.dof.evaluate_normal_motion(self.submesh)
+
+    # The submesh is transformed together with the mesh of the joined body.
+    def translated(self, vector):
+        return DofOnSubMesh(self.dof.translated(vector), self.submesh)
+
+    def rotated(self, axis, angle):
+        return DofOnSubMesh(self.dof.rotated(axis, angle), self.submesh)
+
+    def mirrored(self, plane):
+        return DofOnSubMesh(self.dof.mirrored(plane), self.submesh)
+
+
+class _FacesSubset:
+    """Some faces of a mesh, with the properties of the faces used to evaluate the dofs."""
+
+    def __init__(self, mesh, faces_ids):
+        self.mesh = mesh
+        self.faces_ids = faces_ids
+
+    @property
+    def nb_faces(self):
+        return len(self.faces_ids)
+
+    @property
+    def faces_centers(self):
+        return self.mesh.faces_centers[self.faces_ids]
+
+    @property
+    def faces_normals(self):
+        return self.mesh.faces_normals[self.faces_ids]
+
+
+class DofOnFaces(AbstractDof):
+    """Dof that is only non-zero on some faces of the mesh, such as the dof of a body of a farm
+    after the faces of the farm have been reordered by
+    :meth:`~capytaine.bodies.bodies.FloatingBody.decomposed_as_octree`.
+
+    Parameters
+    ----------
+    dof: AbstractDof
+        a dof that does not depend on the structure of the mesh, such as a :class:`TranslationDof`
+    faces_ids: array of ints
+        the indices of the faces of the mesh on which the dof is evaluated
+    """
+
+    def __init__(self, dof, faces_ids):
+        self.dof = dof
+        self.faces_ids = np.asarray(faces_ids, dtype=int)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.dof}, nb_faces={len(self.faces_ids)})"
+
+    @staticmethod
+    def from_dof(dof, mesh):
+        """The same dof as a :class:`DofOnFaces` of the given mesh, such that it does not depend
+        on the structure of the mesh anymore (the :class:`DofOnSubMesh` are unwrapped)."""
+        faces_ids = np.arange(mesh.nb_faces)
+        while isinstance(dof, DofOnSubMesh):
+            faces_ids = faces_ids[dof._faces_of_submesh(mesh)]
+            mesh, dof = dof.submesh, dof.dof
+        if isinstance(dof, DofOnFaces):
+            faces_ids, dof = faces_ids[dof.faces_ids], dof.dof
+        return DofOnFaces(dof, faces_ids)
+
+    def evaluate_motion(self, mesh):
+        motion = np.zeros((mesh.nb_faces, 3))
+        motion[self.faces_ids] = self.dof.evaluate_motion(_FacesSubset(mesh, self.faces_ids))
+        return motion
+
+    def evaluate_normal_motion(self, mesh):
+        normal_motion = np.zeros(mesh.nb_faces)
+        normal_motion[self.faces_ids] = self.dof.evaluate_normal_motion(_FacesSubset(mesh, self.faces_ids))
+        return normal_motion
+
+    def evaluate_sparse_normal_motion(self, mesh):
+        return self.faces_ids, self.dof.evaluate_normal_motion(_FacesSubset(mesh, self.faces_ids))
+
+    # The faces are transformed together with the mesh.
+    def translated(self, vector):
+        return DofOnFaces(self.dof.translated(vector), self.faces_ids)
+
+    def rotated(self, axis, angle):
+        return DofOnFaces(self.dof.rotated(axis, angle), self.faces_ids)
+
+    def mirrored(self, plane):
+        return DofOnFaces(self.dof.mirrored(plane), self.faces_ids)
+
+
+class DofsDict(MutableMapping):
+    """Dict-like container of the dofs of a body.
+
+    The values can be set either as arrays of shape (nb_faces, 3) or as :class:`AbstractDof`.
+    When accessed, the latter are evaluated on the current mesh of the body.
+    The definitions as set by the user are returned by :meth:`definitions`.
+    """
+
+    def __init__(self, body, dofs=()):
+        self._body = body
+        self._dofs = dict(dofs)
+
+    def __getitem__(self, name):
+        dof = self._dofs[name]
+        if isinstance(dof, AbstractDof):
+            return dof.evaluate_motion(self._body.mesh)
+        else:
+            return dof
+
+    def __setitem__(self, name, dof):
+        self._dofs[name] = dof
+
+    def __delitem__(self, name):
+        del self._dofs[name]
+
+    def __contains__(self, name):
+        return name in self._dofs
+
+    def __iter__(self):
+        return iter(self._dofs)
+
+    def __len__(self):
+        return len(self._dofs)
+
+    def __repr__(self):
+        return repr(self._dofs)
+
+    def definitions(self):
+        """View of the definitions of the dofs (arrays or :class:`AbstractDof`), without evaluation."""
+        return self._dofs.items()
+
+    def normal_motion(self, name):
+        """Normal component of the motion of a dof on each face of the mesh, as an array of shape (nb_faces,)."""
+        dof = self._dofs[name]
+        if isinstance(dof, AbstractDof):
+            return dof.evaluate_normal_motion(self._body.mesh)
+        else:
+            return np.sum(dof * self._body.mesh.faces_normals, axis=1)
+
+    def sparse_normal_motion(self, name):
+        """Normal component of the motion of a dof on the faces where it might be non-zero,
+        as a couple of arrays (indices of the faces, normal motion on these faces)."""
+        dof = self._dofs[name]
+        if isinstance(dof, AbstractDof):
+            return dof.evaluate_sparse_normal_motion(self._body.mesh)
+        else:
+            return np.arange(self._body.mesh.nb_faces), np.sum(dof * self._body.mesh.faces_normals, axis=1)
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Storage on disk of precomputed numerical tables, such that they are computed only once on a given machine.
+
+The tables are saved as npz files in the directory given by the environment variable CAPYTAINE_CACHE_DIR
+(default: ~/.cache/capytaine).
+"""
+# Copyright (C) 2017-2019 Matthieu Ancellin
+# See LICENSE file at <https://github.com/mancellin/capytaine>
+
+import os
+import logging
+import tempfile
+
+import numpy as np
+
+LOG = logging.getLogger(__name__)
+
+
+def cache_directory():
+    """Directory in which the precomputed tables are stored."""
+    default = os.path.join(os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache')), 'capytaine')
+    return os.environ.get('CAPYTAINE_CACHE_DIR', default)
+
+
+def load_or_compute(filename, compute, version, directory=None):
+    """Read a table of arrays in the cache directory, or compute it and save it there.
+
+    The file is written in a temporary file and then renamed, such that several processes sharing the cache
+    directory never read a partially written file. A file that cannot be read is computed again.
+
+    Parameters
+    ----------
+    filename: string
+        name of the file, relative to the cache directory
+    compute: function
+        function without argument returning the table as a dict of arrays
+    version: int
+        version of the content of the table; a file with another version is computed again
+    directory: string, optional
+        directory in which the file is stored (default: :func:`cache_directory`)
+
+    Returns
+    -------
+    dict of arrays
+    """
+    if directory is None:
+        directory = cache_directory()
+    path = os.path.join(directory, filename)
+
+    if os.path.isfile(path):
+        try:
+            with np.load(path) as data:
+                table = {key: data[key] for key in data.files}
+            if table.pop('version') == version:
+                LOG.debug(f"Read {path}.")
+                return table
+        except Exception as error:  # Such as zipfile.BadZipFile for a truncated file.
+            LOG.warning(f"Could not read {path}: {error}")
+
+    table = compute()
+
+    temporary_path = None
+    try:
+        os.makedirs(directory, exist_ok=True)
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=directory, prefix=f".{filename}.", suffix=".tmp")
+        with os.fdopen(file_descriptor, 'wb') as f:
+            np.savez(f, version=version, **table)
+        os.replace(temporary_path, path)
+        LOG.debug(f"Saved {path}.")
+    except OSError as error:
+        LOG.warning(f"Could not save {path}: {error}")
+        if temporary_path is not None and os.path.exists(temporary_path):
+            os.remove(temporary_path)
+
+    return table
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Storage on disk of the results of a set of problems as they are solved,
+such that an interrupted computation can be resumed without solving again the finished problems.
+
+The results are appended to a file in the checkpoint directory, whose name is a fingerprint of the problems,
+of the bodies and of the settings of the solver. A computation with another test matrix, other bodies or
+other settings uses another file.
+
+Example
+-------
+
+::
+
+    dataset = Nemoh().fill_dataset(test_matrix, [body], checkpoint_directory="./checkpoints")
+
+"""
+# Copyright (C) 2017-2019 Matthieu Ancellin
+# See LICENSE file at <https://github.com/mancellin/capytaine>
+
+import os
+import re
+import json
+import pickle
+import hashlib
+import logging
+
+import attr
+import numpy as np
+
+from capytaine import __version__
+
+LOG = logging.getLogger(__name__)
+
+# Attributes of the results that are not stored in the checkpoints.
+_NOT_STORED = ('problem', 'fs_elevation')
+
+
+def problem_set_fingerprint(problem_set, settings):
+    """Hash identifying a set of problems and the settings of their resolution.
+
+    Parameters
+    ----------
+    problem_set: ProblemSet
+        the problems
+    settings: dict
+        the settings of the solver and the arguments of the resolution
+
+    Returns
+    -------
+    str
+    """
+    fingerprint = hashlib.sha256()
+    # The addresses in memory of custom functions (such as a linear solver) change between two runs.
+    fingerprint.update(re.sub(r" at 0x[0-9a-fA-F]+", "", json.dumps(settings, sort_keys=True, default=str)).encode())
+    fingerprint.update(__version__.encode())
+
+    for body in problem_set.bodies:
+        fingerprint.update(body.name.encode())
+        fingerprint.update(np.ascontiguousarray(body.mesh.vertices, dtype=np.float64).tobytes())
+        fingerprint.update(np.ascontiguousarray(body.mesh.faces, dtype=np.int64).tobytes())
+        # The results only depend on the normal component of the dofs, stored as a sparse matrix.
+        # Its dtype is hashed too, since the dofs might be complex-valued.
+        for name in body.dofs:
+            fingerprint.update(name.encode())
+        for array in (body.dofs_normals.data, body.dofs_normals.indices, body.dofs_normals.indptr):
+            fingerprint.update(array.dtype.str.encode())
+            fingerprint.update(np.ascontiguousarray(array).tobytes())
+
+    for column in (problem_set.body_id, problem_set.omega, problem_set.wave_direction, problem_set.free_surface,
+                   problem_set.sea_bottom, problem_set.g, problem_set.rho):
+        fingerprint.update(np.ascontiguousarray(column, dtype=np.float64).tobytes())
+    fingerprint.update(repr(list(problem_set.radiating_dof)).encode())
+
+    return fingerprint.hexdigest()[:32]
+
+
+class Checkpoint:
+    """Append-only file storing the results of the problems of a :class:`~capytaine.bem.problem_set.ProblemSet`.
+
+    Parameters
+    ----------
+    directory: str
+        the directory of the checkpoint files (created if needed)
+    problem_set: ProblemSet
+        the problems whose results are stored
+    settings: dict
+        the settings of the solver and the arguments of the resolution
+    """
+
+    def __init__(self, directory, problem_set, settings):
+        self.problem_set = problem_set
+        self.path = os.path.join(directory, f"{problem_set_fingerprint(problem_set, settings)}.pkl")
+        os.makedirs(directory, exist_ok=True)
+
+    def load(self):
+        """Read the results stored by a previous run.
+
+        The file is truncated after the last complete record, in case the previous run was interrupted while writing.
+
+        Returns
+        -------
+        dict
+            the stored records (see :meth:`restore`), indexed by the index of their problem in the problem set
+        """
+        stored = {}
+        if not os.path.isfile(self.path):
+            return stored
+
+        with open(self.path, 'rb') as f:
+            end_of_last_record = 0
+            while True:
+                try:
+                    index, *record = pickle.load(f)
+                except EOFError:
+                    break
+                except (pickle.UnpicklingError, ValueError, TypeError) as error:
+                    LOG.warning(f"Incomplete record in {self.path}: {error}")
+                    break
+                stored[index] = record
+                end_of_last_record = f.tell()
+
+        if end_of_last_record < os.path.getsize(self.path):
+            with open(self.path, 'r+b') as f:
+                f.truncate(end_of_last_record)
+
+        LOG.info(f"Read {len(stored)} results of {len(self.problem_set)} problems in {self.path}.")
+        return stored
+
+    def restore(self, index, record, hierarchy=None):
+        """Rebuild a result object from a record returned by :meth:`load`.
+
+        Parameters
+        ----------
+        index: int
+            the index of the problem in the problem set
+        record: list
+            the record returned by :meth:`load` for this problem
+        hierarchy: list of FloatingBody, optional
+            the coarsening hierarchy of the body of the problem (see
+            :meth:`~capytaine.bodies.bodies.FloatingBody.coarsening_hierarchy`), required if the problem
+            has been solved on a coarse body
+
+        Returns
+        -------
+        LinearPotentialFlowResult
+        """
+        fields, coarsening_level = record
+        problem = self.problem_set[index]
+        if coarsening_level > 0:
+            # The sources and the potential are defined on the faces of the coarse body.
+            problem = attr.evolve(problem, body=hierarchy[coarsening_level])
+        result = problem.make_results_container()
+        for name, value in fields.items():
+            setattr(result, name, value)
+        return result
+
+    def append(self, index, result, coarsening_level=0):
+        """Store the result of the problem of given index in the problem set.
+        The coarsening level is the position of the body of the result in the coarsening hierarchy of the body
+        of the problem, if the problem has been solved on a coarse body."""
+        fields = {field.name: getattr(result, field.name)
+                  for field in attr.fields(type(result)) if field.name not in _NOT_STORED}
+        with open(self.path, 'ab') as f:
+            pickle.dump((index, fields, coarsening_level), f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
@@ -22,6 +22,32 @@ def _check_file(filename, name=None):
     return
 
 
+def _parse_block(text, dtype, nb_columns):
+    """Parse at once a block of text containing whitespace-separated numbers.
+
+    Parameters
+    ----------
+    text: str
+        the block of text, typically several lines of a mesh file
+    dtype: numpy.dtype
+        the type of the numbers (float or int)
+    nb_columns: int
+        the number of values on each line of the block
+
+    Returns
+    -------
+    ndarray of shape (nb_lines, nb_columns)
+    """
+    if text.strip():
+        values = np.fromstring(text, dtype=dtype, sep=' ')
+    else:
+        values = np.zeros(0, dtype=dtype)
+    if values.size % nb_columns != 0:
+        raise IOError(f"Unexpected number of values in a block of a mesh file "
+                      f"(expected {nb_columns} values on each line).")
+    return values.reshape((-1, nb_columns))
+
+
 def load_mesh(filename, file_format=None, name=None):
     """Driver function that loads every mesh file format known by meshmagick.
     Dispatch to one of the other function depending on file_format.
@@ -86,22 +112,15 @@ def load_RAD(filename, name=None):
     elem_section = r'((?:' + elem_line + '){3,})'
 
     pattern_node_line = re.compile(node_line, re.MULTILINE)
-    # pattern_node_line_group = re.compile(node_line, re.MULTILINE)
-    pattern_elem_line = re.compile(elem_line, re.MULTILINE)
     pattern_node_section = re.compile(node_section, re.MULTILINE)
     pattern_elem_section = re.compile(elem_section, re.MULTILINE)
 
-    vertices = []
     node_section = pattern_node_section.search(data).group(1)
-    for node in pattern_node_line.finditer(node_section):
-        vertices.append(list(map(float, list(node.groups()))))
-    vertices = np.asarray(vertices, dtype=float)
+    # The index and the coordinates of a node might not be separated by a space, hence the use of the regex groups.
+    vertices = np.asarray(pattern_node_line.findall(node_section), dtype=float).reshape((-1, 3))
 
-    faces = []
     elem_section = pattern_elem_section.search(data).group(1)
-    for elem in pattern_elem_line.findall(elem_section):
-        faces.append(list(map(int, elem.strip().split()[3:])))
-    faces = np.asarray(faces, dtype=np.int) - 1
+    faces = _parse_block(elem_section, np.int, 7)[:, 3:] - 1
 
     return Mesh(vertices, faces, name)
 
@@ -132,45 +151,29 @@ def load_HST(filename, name=None):
     import re
 
     node_line = r'\s*\d+(?:\s+' + real_str + '){3}'
-    node_section = r'((?:' + node_line + ')+)'
+    # A section is only searched at the start of the data, after a character that is neither a blank nor a digit
+    # (first alternative) or between a digit and a blank (second alternative).
+    # A section starting in the middle of a sequence of blanks or digits would also match from the previous
+    # character, since node_line starts with \s*\d+, so the matches found by findall are the same as without the
+    # lookbehind. But the positions inside the sequences are skipped, instead of being tried one by one, which is
+    # much faster on the large connectivity section.
+    node_section = r'(?:(?<![\s\d])|(?<=\d)(?=\s))((?:' + node_line + ')+)'
 
     elem_line = r'^\s*(?:\d+\s+){3}\d+\s*[\r\n]+'
     elem_section = r'((?:' + elem_line + ')+)'
 
-    pattern_node_line = re.compile(node_line, re.MULTILINE)
-    pattern_elem_line = re.compile(elem_line, re.MULTILINE)
     pattern_node_section = re.compile(node_section, re.MULTILINE)
     pattern_elem_section = re.compile(elem_section, re.MULTILINE)
 
-    vertices_tmp = []
-    vertices = []
-    nv = 0
-    for node_section in pattern_node_section.findall(data):
-        for node in pattern_node_line.findall(node_section):
-            vertices_tmp.append(list(map(float, node.split()[1:])))
-        nv_tmp = len(vertices_tmp)
-        vertices_tmp = np.asarray(vertices_tmp, dtype=np.float)
-        if nv == 0:
-            vertices = vertices_tmp.copy()
-            nv = nv_tmp
-        else:
-            vertices = np.concatenate((vertices, vertices_tmp))
-            nv += nv_tmp
+    vertices = np.concatenate(
+        [np.zeros((0, 3))]
+        + [_parse_block(node_section, np.float, 4)[:, 1:] for node_section in pattern_node_section.findall(data)]
+    )
 
-    faces_tmp = []
-    faces = []
-    nf = 0
-    for elem_section in pattern_elem_section.findall(data):
-        for elem in pattern_elem_line.findall(elem_section):
-            faces_tmp.append(list(map(int, elem.split())))
-        nf_tmp = len(faces_tmp)
-        faces_tmp = np.asarray(faces_tmp, dtype=np.int)
-        if nf == 0:
-            faces = faces_tmp.copy()
-            nf = nf_tmp
-        else:
-            faces = np.concatenate((faces, faces_tmp))
-            nf += nf_tmp
+    faces = np.concatenate(
+        [np.zeros((0, 4), dtype=np.int)]
+        + [_parse_block(elem_section, np.int, 4) for elem_section in pattern_elem_section.findall(data)]
+    )
 
     return Mesh(vertices, faces-1, name)
 
@@ -251,8 +254,8 @@ def load_INP(filename, name=None):
     node_section = r'((?:' + node_line + ')+)'
     elem_line = r'^ +\d+(?: +\d+){3,4}[\r\n]+'  # 3 -> triangle, 4 -> quadrangle
     elem_section = r'((?:' + elem_line + ')+)'
-    pattern_node_line = re.compile(node_line, re.MULTILINE)
-    pattern_elem_line = re.compile(elem_line, re.MULTILINE)
+    elem_nodes = r'^ +\d+ +(\d+) +(\d+) +(\d+)(?: +(\d+))?[\r\n]+'  # Same as elem_line, grouping the ids of the nodes
+    pattern_elem_nodes = re.compile(elem_nodes, re.MULTILINE)
     pattern_node_section = re.compile(node_section, re.MULTILINE)
     pattern_elem_section = re.compile(elem_section, re.MULTILINE)
 
@@ -268,38 +271,24 @@ def load_INP(filename, name=None):
         if len(node_section) > 1:
             raise IOError("""Several NODE sections into a .DAT file is not supported by meshmagick
                               as it is considered as bad practice""")
-        node_array = []
-        idx_array = []
-        for node in pattern_node_line.findall(node_section[0]):
-            node = node.split()
-
-            node[0] = int(node[0])
-            idx_array.append(node[0])
-            node[1:] = list(map(float, node[1:]))
-            node_array.append(node[1:])
+        nodes_data = _parse_block(node_section[0], np.float, 4)
+        idx_array = nodes_data[:, 0].astype(np.int)
+        node_array = nodes_data[:, 1:]
 
         mesh_files[file]['NODE_SECTION'] = node_array
 
         # Detecting renumberings to do
-        real_idx = 0
-        # renumberings = []
         id_new = - np.ones(max(idx_array) + 1, dtype=np.int)
         # FIXME: cette partie est tres buggee !!!
-        for i, idx in enumerate(idx_array):
-            id_new[idx] = i+1
+        id_new[idx_array] = np.arange(1, len(idx_array)+1)
 
         mesh_files[file]['ELEM_SECTIONS'] = []
         for elem_section in pattern_elem_section.findall(data):
-
-            elem_array = []
-            for elem in pattern_elem_line.findall(elem_section):
-                elem = list(map(int, elem.split()))
-                # for node in elem[1:]:
-                elem = id_new[elem[1:]].tolist()
-                if len(elem) == 3:  # Case of a triangle, we repeat the first node at the last position
-                    elem.append(elem[0])
-
-                elem_array.append(list(map(int, elem)))
+            elem_array = np.array(pattern_elem_nodes.findall(elem_section), dtype=object).reshape((-1, 4))
+            # Case of a triangle, we repeat the first node at the last position
+            triangles = elem_array[:, 3] == ''
+            elem_array[triangles, 3] = elem_array[triangles, 0]
+            elem_array = id_new[elem_array.astype(np.int)]
             mesh_files[file]['ELEM_SECTIONS'].append(elem_array)
         mesh_files[file]['nb_elem_sections'] = len(mesh_files[file]['ELEM_SECTIONS'])
 
@@ -328,8 +317,8 @@ def load_INP(filename, name=None):
                 nb_nodes = vertices.shape[0]
                 increment = True
         else:  # this is an ELEMENT section
-            elem_section = np.asarray(mesh_files[file]['ELEM_SECTIONS'][mesh_files[file]['nb_elem_sections_used']],
-                                      dtype=np.int)
+            elem_section = np.array(mesh_files[file]['ELEM_SECTIONS'][mesh_files[file]['nb_elem_sections_used']],
+                                    dtype=np.int)
 
             mesh_files[file]['nb_elem_sections_used'] += 1
             if mesh_files[file]['nb_elem_sections_used'] == mesh_files[file]['nb_elem_sections']:
@@ -519,8 +508,10 @@ def _dump_vtk(vtk_mesh):
 def load_STL(filename, name=None):
     """Loads STL file format.
 
-    It relies on the reader from the VTK library. As STL file format maintains a redundant set of vertices for each
-    faces of the mesh, it returns a merged list of nodes and connectivity array by using the merge_duplicates function.
+    Both the ASCII and the binary variants of the format are supported.
+    The binary files are memory-mapped and decoded with numpy without any Python loop on the faces.
+    As STL file format maintains a redundant set of vertices for each faces of the mesh, the duplicate vertices are
+    merged.
 
     Parameters
     ----------
@@ -536,35 +527,62 @@ def load_STL(filename, name=None):
     ----
     STL files have a 0-indexing
     """
-    from vtk import vtkSTLReader
-    from .tools import merge_duplicate_rows
-
     _check_file(filename)
 
-    reader = vtkSTLReader()
-    reader.SetFileName(filename)
-    reader.Update()
+    if _is_binary_STL(filename):
+        triangles_vertices = _read_binary_STL_vertices(filename)
+    else:
+        triangles_vertices = _read_ascii_STL_vertices(filename)
 
-    data = reader.GetOutputDataObject(0)
+    # Merging duplicates nodes. The duplicated vertices in a STL file are exact copies of each other.
+    vertices, new_id = np.unique(triangles_vertices, axis=0, return_inverse=True)
+    triangles = new_id.reshape((-1, 3))
+    faces = np.concatenate([triangles, triangles[:, :1]], axis=1)  # always repeating the first node as stl is triangle only
 
-    nv = data.GetNumberOfPoints()
-    vertices = np.zeros((nv, 3), dtype=np.float)
-    for k in range(nv):
-        vertices[k] = np.array(data.GetPoint(k))
-    nf = data.GetNumberOfCells()
-    faces = np.zeros((nf, 4), dtype=np.int)
-    for k in range(nf):
-        cell = data.GetCell(k)
-        if cell is not None:
-            for l in range(3):
-                faces[k][l] = cell.GetPointId(l)
-                faces[k][3] = faces[k][0]  # always repeating the first node as stl is triangle only
+    return Mesh(vertices, faces, name)
 
-    # Merging duplicates nodes
-    vertices, new_id = merge_duplicate_rows(vertices, return_index=True)
-    faces = new_id[faces]
 
-    return Mesh(vertices, faces, name)
+# Layout of a triangle in a binary STL file.
+_binary_STL_triangle_dtype = np.dtype([
+    ('normal', '<f4', (3,)),
+    ('vertices', '<f4', (3, 3)),
+    ('attribute_byte_count', '<u2'),
+])
+_binary_STL_header_size = 80 + 4  # Header, then number of triangles as a 32 bits integer.
+
+
+def _is_binary_STL(filename):
+    """Check whether the STL file is binary by comparing its size with the size announced in the binary header.
+    (Looking for the word "solid" at the beginning of the file is not enough, since some binary files start with it.)"""
+    file_size = os.path.getsize(filename)
+    if file_size < _binary_STL_header_size:
+        return False
+    with open(filename, 'rb') as f:
+        f.seek(80)
+        nb_triangles = int(np.frombuffer(f.read(4), dtype='<u4')[0])
+    return file_size == _binary_STL_header_size + nb_triangles * _binary_STL_triangle_dtype.itemsize
+
+
+def _read_binary_STL_vertices(filename):
+    """Return the coordinates of the vertices of each triangle of a binary STL file as an array of shape (3*nb_triangles, 3)."""
+    nb_triangles = (os.path.getsize(filename) - _binary_STL_header_size) // _binary_STL_triangle_dtype.itemsize
+    if nb_triangles == 0:
+        return np.zeros((0, 3), dtype=np.float32)
+    triangles = np.memmap(filename, dtype=_binary_STL_triangle_dtype, mode='r',
+                          offset=_binary_STL_header_size, shape=(nb_triangles,))
+    return np.array(triangles['vertices']).reshape((3*nb_triangles, 3))
+
+
+def _read_ascii_STL_vertices(filename):
+    """Return the coordinates of the vertices of each triangle of an ASCII STL file as an array of shape (3*nb_triangles, 3)."""
+    import re
+    with open(filename, 'r') as f:
+        data = f.read()
+    coordinates = ' '.join(re.findall(r'^\s*vertex\s+(.+?)\s*$', data, re.MULTILINE))
+    vertices = np.fromstring(coordinates, dtype=np.float64, sep=' ')
+    if vertices.size % 9 != 0:
+        raise IOError(f"Unexpected number of vertex coordinates in the STL file {filename}.")
+    return vertices.reshape((-1, 3))
 
 
 def load_NAT(filename, name=None):
@@ -611,21 +629,14 @@ def load_NAT(filename, name=None):
 
     _check_file(filename)
 
-    ifile = open(filename, 'r')
-    ifile.readline()
-    nv, nf = list(map(int, ifile.readline().split()))
-
-    vertices = []
-    for i in range(nv):
-        vertices.append(list(map(float, ifile.readline().split())))
-    vertices = np.array(vertices, dtype=np.float)
+    with open(filename, 'r') as ifile:
+        ifile.readline()
+        nv, nf = list(map(int, ifile.readline().split()))
+        lines = ifile.read().splitlines()
 
-    faces = []
-    for i in range(nf):
-        faces.append(list(map(int, ifile.readline().split())))
-    faces = np.array(faces, dtype=np.int)
+    vertices = _parse_block('\n'.join(lines[:nv]), np.float, 3)
+    faces = _parse_block('\n'.join(lines[nv:nv+nf]), np.int, 4)
 
-    ifile.close()
     return Mesh(vertices, faces-1, name)
 
 
@@ -652,32 +663,15 @@ def load_GDF(filename, name=None):
 
     _check_file(filename)
 
-    ifile = open(filename, 'r')
-
-    ifile.readline()  # skip one header line
-    line = ifile.readline().split()
-    ulen = line[0]
-    grav = line[1]
-
-    line = ifile.readline().split()
-    isx = line[0]
-    isy = line[1]
-
-    line = ifile.readline().split()
-    nf = int(line[0])
+    with open(filename, 'r') as ifile:
+        ifile.readline()  # skip one header line
+        ifile.readline()  # skip ulen and grav
+        ifile.readline()  # skip isx and isy
+        nf = int(ifile.readline().split()[0])
+        lines = ifile.read().splitlines()
 
-    vertices = np.zeros((4 * nf, 3), dtype=np.float)
-    faces = np.zeros((nf, 4), dtype=np.int)
-
-    iv = -1
-    for icell in range(nf):
-
-        for k in range(4):
-            iv += 1
-            vertices[iv, :] = np.array(ifile.readline().split())
-            faces[icell, k] = iv
-
-    ifile.close()
+    vertices = _parse_block('\n'.join(lines[:4*nf]), np.float, 3)
+    faces = np.arange(4*nf).reshape((nf, 4))
 
     return Mesh(vertices, faces, name)
 
@@ -700,33 +694,21 @@ def load_MAR(filename, name=None):
     MAR files have a 1-indexing
     """
 
+    import re
+
     _check_file(filename)
 
-    ifile = open(filename, 'r')
+    with open(filename, 'r') as ifile:
+        header = ifile.readline()
+        data = ifile.read()
 
-    header = ifile.readline()
     _, symmetric_mesh = header.split()
 
-    vertices = []
-    while 1:
-        line = ifile.readline()
-        line = line.split()
-        if line[0] == '0':
-            break
-        vertices.append(list(map(float, line[1:])))
+    # The vertices and the faces sections both end with a line starting with 0.
+    vertices_section, faces_section, *_ = re.split(r'^[ \t]*0(?:[ \t\r].*)?$', data, maxsplit=2, flags=re.MULTILINE)
 
-    vertices = np.array(vertices, dtype=np.float)
-    faces = []
-    while 1:
-        line = ifile.readline()
-        line = line.split()
-        if line[0] == '0':
-            break
-        faces.append(list(map(int, line)))
-
-    faces = np.array(faces, dtype=np.int)
-
-    ifile.close()
+    vertices = _parse_block(vertices_section, np.float, 4)[:, 1:]
+    faces = _parse_block(faces_section, np.int, 4)
 
     if int(symmetric_mesh) == 1:
         if name is None:
@@ -907,25 +889,122 @@ def load_NEM(filename, name=None):
 
     _check_file(filename)
 
-    ifile = open(filename, 'r')
-
-    nv = int(ifile.readline())
-    nf = int(ifile.readline())
+    with open(filename, 'r') as ifile:
+        nv = int(ifile.readline())
+        nf = int(ifile.readline())
+        lines = ifile.read().splitlines()
 
-    vertices = []
-    for ivertex in range(nv):
-        vertices.append(list(map(float, ifile.readline().split())))
-    vertices = np.asarray(vertices, dtype=np.float)
-
-    faces = []
-    for iface in range(nf):
-        faces.append(list(map(int, ifile.readline().split())))
-    faces = np.asarray(faces, dtype=np.int)
+    vertices = _parse_block('\n'.join(lines[:nv]), np.float, 3)
+    faces = _parse_block('\n'.join(lines[nv:nv+nf]), np.int, 4)
     faces -= 1
 
     return Mesh(vertices, faces, name)
 
 
+def _memmap_npz(filename):
+    """Memory-map the arrays stored in an uncompressed .npz archive.
+
+    The pages of the file are shared between the processes opening the same file.
+    They are mapped in copy-on-write mode, so that modifying the arrays does not modify the file.
+    Compressed arrays and arrays of Python objects cannot be mapped and are read normally.
+
+    Returns
+    -------
+    dict of ndarrays
+    """
+    import struct
+    import zipfile
+
+    arrays = {}
+    with zipfile.ZipFile(filename) as archive, open(filename, 'rb') as f:
+        for info in archive.infolist():
+            key = info.filename[:-len('.npy')]
+            if info.compress_type == zipfile.ZIP_STORED:
+                # The local header of the zip file might differ from the one in the central directory.
+                f.seek(info.header_offset)
+                local_header = f.read(30)
+                filename_length, extra_length = struct.unpack('<HH', local_header[26:30])
+                f.seek(info.header_offset + 30 + filename_length + extra_length)
+                version = np.lib.format.read_magic(f)
+                if version == (1, 0):
+                    shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+                else:
+                    shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+                if not dtype.hasobject and len(shape) > 0 and np.prod(shape) > 0:
+                    arrays[key] = np.memmap(filename, dtype=dtype, mode='c', shape=shape, offset=f.tell(),
+                                            order='F' if fortran_order else 'C')
+                    continue
+            with archive.open(info) as member:
+                arrays[key] = np.lib.format.read_array(member)
+    return arrays
+
+
+def load_NPZ(filename, name=None):
+    """Loads a mesh from the native binary file format of capytaine, as written by
+    :func:`~capytaine.io.mesh_writers.write_NPZ_mesh`.
+
+    The arrays are memory-mapped from the file and the properties of the faces stored in the file are
+    put in the cache of the meshes, so that no parsing or recomputation is needed.
+
+    Parameters
+    ----------
+    filename: str
+        name of the mesh file on disk
+    name: str, optional
+        name for the created mesh object (default: the name stored in the file)
+
+    Returns
+    -------
+    Mesh or CollectionOfMeshes
+        the loaded mesh, with the same structure as the one that has been written
+    """
+    import json
+    from capytaine.meshes.collections import CollectionOfMeshes
+    from capytaine.meshes.symmetric import TranslationalSymmetricMesh, AxialSymmetricMesh
+    from capytaine.meshes.geometry import Axis, Plane
+
+    _check_file(filename)
+
+    arrays = _memmap_npz(filename)
+    tree = json.loads(str(arrays.pop('tree')))
+
+    def build(description):
+        if description['type'] == 'ReflectionSymmetricMesh':
+            return ReflectionSymmetricMesh(build(description['half']), plane=Plane(**description['plane']),
+                                           name=description['name'])
+        elif description['type'] == 'TranslationalSymmetricMesh':
+            return TranslationalSymmetricMesh(build(description['first_slice']),
+                                              translation=description['translation'],
+                                              nb_repetitions=description['nb_repetitions'],
+                                              name=description['name'])
+        elif description['type'] == 'AxialSymmetricMesh':
+            return AxialSymmetricMesh(build(description['first_slice']), axis=Axis(**description['axis']),
+                                      nb_repetitions=description['nb_repetitions'],
+                                      name=description['name'])
+        elif description['type'] == 'CollectionOfMeshes':
+            return CollectionOfMeshes([build(submesh) for submesh in description['meshes']],
+                                      name=description['name'])
+        elif description['type'] == 'Mesh':
+            key = description['arrays']
+            mesh = Mesh(name=description['name'])
+            # The setters of the Mesh class would copy the memory-mapped arrays.
+            mesh._vertices = arrays[f"{key}.vertices"]
+            mesh._faces = arrays[f"{key}.faces"]
+            for array_name in arrays:
+                if array_name.startswith(f"{key}.") and array_name not in (f"{key}.vertices", f"{key}.faces"):
+                    mesh.__internals__[array_name[len(key)+1:]] = arrays[array_name]
+            if 'hash' in description:
+                mesh.__internals__['hash'] = description['hash']
+            return mesh
+        else:
+            raise IOError(f"Unknown type of mesh in {filename}: {description['type']}")
+
+    mesh = build(tree)
+    if name is not None:
+        mesh.name = name
+    return mesh
+
+
 extension_dict = {  # keyword, reader
     'dat': load_MAR,
     'mar': load_MAR,
@@ -955,5 +1034,7 @@ extension_dict = {  # keyword, reader
     'vrml': load_WRL,
     'wrl': load_WRL,
     'nem': load_NEM,
-    'nemoh_mesh': load_NEM
+    'nemoh_mesh': load_NEM,
+    'npz': load_NPZ,
+    'capytaine': load_NPZ,
 }
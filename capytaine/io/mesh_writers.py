@@ -601,6 +601,94 @@ def write_STL(filename, vertices, faces):
     ofile.close()
 
 
+def write_NPZ(filename, vertices, faces):
+    """Writes a mesh in the native binary file format of capytaine.
+    See :func:`write_NPZ_mesh` for the storage of a whole mesh object.
+
+    Parameters
+    ----------
+    filename: str
+        name of the mesh file to be written on disk
+    vertices: ndarray
+        numpy array of the coordinates of the mesh's nodes
+    faces: ndarray
+        numpy array of the faces' nodes connectivities
+    """
+    from capytaine.meshes.meshes import Mesh
+    write_NPZ_mesh(filename, Mesh(vertices, faces), with_properties=False)
+
+
+# Cached properties of the meshes that can be stored in the native file format.
+NPZ_STORED_PROPERTIES = ('faces_areas', 'faces_centers', 'faces_normals', 'faces_radiuses', 'surface_integrals')
+
+
+def write_NPZ_mesh(filename, mesh, with_properties=True):
+    """Writes a mesh object in the native binary file format of capytaine.
+
+    The file is an uncompressed numpy .npz archive, such that its arrays can be memory-mapped by the loader.
+    It contains the vertices and faces of each elementary mesh and a description of the structure of the
+    collections of meshes and symmetric meshes, stored without their redundant parts.
+    Optionally, the properties of the faces and their surface integrals are also stored.
+
+    Parameters
+    ----------
+    filename: str
+        name of the mesh file to be written on disk
+    mesh: Mesh or CollectionOfMeshes
+        the mesh to be written
+    with_properties: bool, optional
+        if True (default), also store the precomputed properties of the faces and their surface integrals
+    """
+    import json
+    from capytaine.meshes.collections import CollectionOfMeshes
+    from capytaine.meshes.symmetric import ReflectionSymmetricMesh, TranslationalSymmetricMesh, AxialSymmetricMesh
+
+    arrays = {}
+
+    def describe(mesh):
+        if isinstance(mesh, ReflectionSymmetricMesh):
+            return {'type': 'ReflectionSymmetricMesh', 'name': mesh.name,
+                    'plane': {'normal': mesh.plane.normal.tolist(), 'point': mesh.plane.point.tolist()},
+                    'half': describe(mesh.half)}
+        elif isinstance(mesh, TranslationalSymmetricMesh):
+            return {'type': 'TranslationalSymmetricMesh', 'name': mesh.name,
+                    'translation': np.asarray(mesh.translation).tolist(), 'nb_repetitions': len(mesh) - 1,
+                    'first_slice': describe(mesh.first_slice)}
+        elif isinstance(mesh, AxialSymmetricMesh):
+            return {'type': 'AxialSymmetricMesh', 'name': mesh.name,
+                    'axis': {'vector': mesh.axis.vector.tolist(), 'point': mesh.axis.point.tolist()},
+                    'nb_repetitions': len(mesh) - 1,
+                    'first_slice': describe(mesh.first_slice)}
+        elif isinstance(mesh, CollectionOfMeshes):
+            return {'type': 'CollectionOfMeshes', 'name': mesh.name,
+                    'meshes': [describe(submesh) for submesh in mesh]}
+        else:
+            key = f"mesh_{len(arrays)}"
+            arrays[key] = {'vertices': mesh.vertices, 'faces': mesh.faces}
+            if with_properties:
+                # Make sure that the properties have been computed and cached.
+                for prop in NPZ_STORED_PROPERTIES:
+                    if prop == 'surface_integrals':
+                        mesh.get_surface_integrals()
+                    else:
+                        getattr(mesh, prop)
+                hash(mesh)
+            for prop in NPZ_STORED_PROPERTIES:
+                if prop in mesh.__internals__:
+                    arrays[key][prop] = mesh.__internals__[prop]
+            description = {'type': 'Mesh', 'name': mesh.name, 'arrays': key}
+            if 'hash' in mesh.__internals__:
+                description['hash'] = mesh.__internals__['hash']
+            return description
+
+    tree = describe(mesh)
+
+    flat_arrays = {f"{key}.{prop}": array for key in arrays for prop, array in arrays[key].items()}
+    with open(filename, 'wb') as f:
+        # Uncompressed, such that the arrays can be memory-mapped.
+        np.savez(f, tree=json.dumps(tree), **flat_arrays)
+
+
 def write_INP(filename, vertices, faces):
     raise NotImplementedError('INP writer is not implementer yet')
 
@@ -645,5 +733,7 @@ extension_dict = {  # keyword,  writer
     'vrml': write_WRL,
     'wrl': write_WRL,
     'nem': write_NEM,
-    'nemoh_mesh': write_NEM
+    'nemoh_mesh': write_NEM,
+    'npz': write_NPZ,
+    'capytaine': write_NPZ,
 }
@@ -10,7 +10,6 @@
 
 import logging
 from datetime import datetime
-from itertools import product
 from typing import Sequence, List, Union
 
 import numpy as np
@@ -21,8 +20,12 @@ from capytaine import __version__
 from capytaine.bodies.bodies import FloatingBody
 from capytaine.bem.problems_and_results import (
     LinearPotentialFlowProblem, DiffractionProblem, RadiationProblem,
-    LinearPotentialFlowResult)
-from capytaine.post_pro.kochin import compute_kochin
+    LinearPotentialFlowResult, RadiationResult)
+from capytaine.bem.problem_set import ProblemSet
+from capytaine.bem.dispersion_relation import solve_dispersion_relation
+from capytaine.bem.airy_waves import froude_krylov_forces, precompute_froude_krylov_forces
+from capytaine.post_pro.kochin import compute_kochin_of_results
+from capytaine.post_pro.haskind import compute_haskind_excitation_forces
 
 
 LOG = logging.getLogger(__name__)
@@ -48,45 +51,12 @@ def problems_from_dataset(dataset: xr.Dataset,
     Returns
     -------
     list of LinearPotentialFlowProblem
+
+    See also
+    --------
+    ProblemSet.from_dataset: for a more compact storage of large sets of problems.
     """
-    assert len(list(set(body.name for body in bodies))) == len(bodies), \
-        "All bodies should have different names."
-
-    dataset = _unsqueeze_dimensions(dataset)
-
-    omega_range = dataset['omega'].data if 'omega' in dataset else [LinearPotentialFlowProblem.default_parameters['omega']]
-    water_depth_range = dataset['water_depth'].data if 'water_depth' in dataset else [-LinearPotentialFlowProblem.default_parameters['sea_bottom']]
-    rho_range = dataset['rho'].data if 'rho' in dataset else [LinearPotentialFlowProblem.default_parameters['rho']]
-
-    wave_direction_range = dataset['wave_direction'].data if 'wave_direction' in dataset else None
-    radiating_dofs = dataset['radiating_dof'].data if 'radiating_dof' in dataset else None
-
-    if 'body_name' in dataset:
-        assert set(dataset['body_name'].data) <= {body.name for body in bodies}, \
-            "Some body named in the dataset was not given as argument to `problems_from_dataset`."
-        body_range = {body.name: body for body in bodies if body.name in dataset['body_name'].data}
-        # Only the bodies listed in the dataset have been kept
-    else:
-        body_range = {body.name: body for body in bodies}
-
-    problems = []
-    if wave_direction_range is not None:
-        for omega, wave_direction, water_depth, body_name, rho \
-                in product(omega_range, wave_direction_range, water_depth_range, body_range, rho_range):
-            problems.append(
-                DiffractionProblem(body=body_range[body_name], omega=omega,
-                                   wave_direction=wave_direction, sea_bottom=-water_depth, rho=rho)
-            )
-
-    if radiating_dofs is not None:
-        for omega, radiating_dof, water_depth, body_name, rho \
-                in product(omega_range, radiating_dofs, water_depth_range, body_range, rho_range):
-            problems.append(
-                RadiationProblem(body=body_range[body_name], omega=omega,
-                                 radiating_dof=radiating_dof, sea_bottom=-water_depth, rho=rho)
-            )
-
-    return sorted(problems)
+    return list(ProblemSet.from_dataset(dataset, bodies))
 
 
 def _squeeze_dimensions(data_array, dimensions=None):
@@ -146,13 +116,15 @@ def _dataset_from_dataframe(df: pd.DataFrame,
 
 
 def wavenumber_data_array(results: Sequence[LinearPotentialFlowResult]) -> xr.DataArray:
-    """Read the wavenumbers in a list of :class:`LinearPotentialFlowResult`
+    """Compute the wavenumbers of a list of :class:`LinearPotentialFlowResult`
     and store them into a :class:`xarray.DataArray`.
+    The dispersion relation is solved at once for all the results.
     """
     records = pd.DataFrame(
-        [dict(g=result.g, water_depth=result.depth, omega=result.omega, wavenumber=result.wavenumber)
-         for result in results]
+        [dict(g=result.g, water_depth=result.depth, omega=result.omega) for result in results]
     )
+    records['wavenumber'] = solve_dispersion_relation(records['omega'].values, records['water_depth'].values,
+                                                      records['g'].values)
     ds = _dataset_from_dataframe(records, variables=['wavenumber'], dimensions=['omega'], optional_dims=['g', 'water_depth'])
     return ds['wavenumber']
 
@@ -178,12 +150,15 @@ def kochin_data_array(results: Sequence[LinearPotentialFlowResult],
     """Compute the Kochin function for a list of results and fills a dataset.
 
     .. seealso::
-        :meth:`~capytaine.post_pro.kochin.compute_kochin`
-            The present function is just a wrapper around :code:`compute_kochin`.
+        :meth:`~capytaine.post_pro.kochin.compute_kochin_of_results`
+            The present function is just a wrapper around :code:`compute_kochin_of_results`,
+            the batched version of :code:`compute_kochin`.
     """
+    theta_range = np.asarray(theta_range, dtype=np.float64).ravel()
+    kochins = compute_kochin_of_results(results, theta_range, **kwargs)
     records = pd.DataFrame([dict(result.settings_dict, theta=theta, kochin=kochin)
-                            for result in results
-                            for theta, kochin in zip(theta_range.data, compute_kochin(result, theta_range, **kwargs))])
+                            for result, result_kochins in zip(results, kochins)
+                            for theta, kochin in zip(theta_range, result_kochins)])
 
     ds = _dataset_from_dataframe(records, ['kochin'],
                                  dimensions=['omega', 'radiating_dof', 'theta'],
@@ -191,9 +166,58 @@ def kochin_data_array(results: Sequence[LinearPotentialFlowResult],
     return ds['kochin']
 
 
+def haskind_dataset(results: Sequence[LinearPotentialFlowResult],
+                    wave_direction_range: Sequence[float],
+                    convention="Nemoh",
+                    ) -> xr.Dataset:
+    """Compute the diffraction and Froude-Krylov forces for several wave directions from the radiation results,
+    without solving the diffraction problems.
+
+    The radiation results are grouped by body and environment. In each group, the forces are computed on the
+    radiating dofs of the results, which should have been solved with :code:`keep_details=True`.
+
+    .. seealso::
+        :meth:`~capytaine.post_pro.haskind.compute_haskind_excitation_forces`
+            The present function is a wrapper around :code:`compute_haskind_excitation_forces`.
+    """
+    wave_direction_range = np.asarray(wave_direction_range, dtype=np.float64).ravel()
+
+    groups = {}
+    for result in results:
+        if isinstance(result, RadiationResult):
+            key = (id(result.body), result.omega, result.free_surface, result.sea_bottom, result.g, result.rho)
+            groups.setdefault(key, []).append(result)
+
+    records = []
+    for group in groups.values():
+        first = group[0]
+        settings = {key: value for key, value in first.settings_dict.items() if key != 'radiating_dof'}
+
+        diffraction_forces = compute_haskind_excitation_forces(group, wave_direction_range, convention=convention)
+
+        # For each dof, an array of shape (nb_directions,)
+        all_froude_krylov_forces = dict(zip(first.body.dofs, froude_krylov_forces(
+            first.body, first.omega, wave_direction_range, first.depth, first.g, first.rho, convention=convention
+        )[0].T))
+        for result in group:
+            dof = result.radiating_dof
+            records.extend(dict(settings, wave_direction=wave_direction, convention=convention, influenced_dof=dof,
+                                diffraction_force=diffraction_force, Froude_Krylov_force=froude_krylov_force)
+                           for wave_direction, diffraction_force, froude_krylov_force
+                           in zip(wave_direction_range, diffraction_forces[dof], all_froude_krylov_forces[dof]))
+
+    if len(records) == 0:
+        raise ValueError("No radiation result passed to haskind_dataset.")
+
+    return _dataset_from_dataframe(pd.DataFrame(records),
+                                   variables=['diffraction_force', 'Froude_Krylov_force'],
+                                   dimensions=['omega', 'wave_direction', 'influenced_dof'],
+                                   optional_dims=['g', 'rho', 'body_name', 'water_depth'])
+
+
 def assemble_dataset(results: Sequence[LinearPotentialFlowResult],
                      wavenumber=False, wavelength=False, mesh=False, hydrostatics=True,
-                     attrs=None) -> xr.Dataset:
+                     attrs=None, haskind_wave_direction=None, convention="Nemoh") -> xr.Dataset:
     """Transform a list of :class:`LinearPotentialFlowResult` into a :class:`xarray.Dataset`.
 
     .. todo:: The :code:`mesh` option to store informations on the mesh could be improved.
@@ -214,6 +238,11 @@ def assemble_dataset(results: Sequence[LinearPotentialFlowResult],
         If True, store the hydrostatic data in the output dataset if they exist.
     attrs: dict, optional
         Attributes that should be added to the output dataset.
+    haskind_wave_direction: array of floats, optional
+        If given, the diffraction forces for these wave directions are computed from the radiation results
+        with the Haskind relation (see :func:`haskind_dataset`), instead of being read in diffraction results.
+    convention: str, optional
+        convention for the incoming wave field of the forces computed with the Haskind relation.
     """
     dataset = xr.Dataset()
 
@@ -221,6 +250,8 @@ def assemble_dataset(results: Sequence[LinearPotentialFlowResult],
         attrs = {}
     attrs['creation_of_dataset'] = datetime.now().isoformat()
 
+    results = list(results)
+    precompute_froude_krylov_forces(results)
     records = pd.DataFrame([record for result in results for record in result.records])
     if len(records) == 0:
         raise ValueError("No result passed to assemble_dataset.")
@@ -251,12 +282,17 @@ def assemble_dataset(results: Sequence[LinearPotentialFlowResult],
             optional_dims=optional_dims)
         dataset = xr.merge([dataset, diffraction_cases])
 
-    # WAVENUMBER
-    if wavenumber:
-        dataset.coords['wavenumber'] = wavenumber_data_array(results)
+    if haskind_wave_direction is not None:
+        attrs['incoming_waves_convention'] = convention
+        dataset = xr.merge([dataset, haskind_dataset(results, haskind_wave_direction, convention=convention)])
 
-    if wavelength:
-        dataset.coords['wavelength'] = 2*np.pi/wavenumber_data_array(results)
+    # WAVENUMBER
+    if wavenumber or wavelength:
+        wavenumbers = wavenumber_data_array(results)
+        if wavenumber:
+            dataset.coords['wavenumber'] = wavenumbers
+        if wavelength:
+            dataset.coords['wavelength'] = 2*np.pi/wavenumbers
 
     if mesh:
         # TODO: Store full mesh...
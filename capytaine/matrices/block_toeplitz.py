@@ -170,6 +170,18 @@ class BlockSymmetricToeplitzMatrix(BlockToeplitzMatrix):
                 check=False)
         return self._circulant_super_matrix
 
+    # LINEAR SYSTEMS
+
+    def half_systems(self):
+        """For a 2×2 block matrix [[A1, A2], [A2, A1]], returns the two blocks A1+A2 and A1-A2 of its block
+        diagonalization. A vector (b, b) is only affected by the first one and a vector (b, -b) by the second one.
+        They are computed once and stored with the matrix."""
+        assert self.nb_blocks == (2, 2), "Half systems are only defined for 2×2 block symmetric Toeplitz matrices."
+        if not hasattr(self, '_half_systems'):
+            A1, A2 = self._stored_blocks[0, :]
+            self._half_systems = (A1 + A2, A1 - A2)
+        return self._half_systems
+
 
 ################################################################################
 #                            Block circulant matrix                            #
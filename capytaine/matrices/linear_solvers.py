@@ -19,6 +19,9 @@ from capytaine.matrices.block_toeplitz import BlockSymmetricToeplitzMatrix, Bloc
 
 LOG = logging.getLogger(__name__)
 
+# Relative norm below which one of the halves of a right-hand side is considered to be zero.
+PARITY_TOLERANCE = 1e-12
+
 
 # DIRECT SOLVER
 
@@ -38,11 +41,7 @@ def solve_directly(A, b):
     elif isinstance(A, BlockSymmetricToeplitzMatrix):
         if A.nb_blocks == (2, 2):
             LOG.debug("\tSolve linear system %s", A)
-            A1, A2 = A._stored_blocks[0, :]
-            b1, b2 = b[:len(b)//2], b[len(b)//2:]
-            x_plus = solve_directly(A1 + A2, b1 + b2)
-            x_minus = solve_directly(A1 - A2, b1 - b2)
-            return np.concatenate([x_plus + x_minus, x_plus - x_minus])/2
+            return _solve_half_systems(A, b, _solve_directly_half_system)
         else:
             # Not implemented
             LOG.debug("\tSolve linear system %s", A)
@@ -60,6 +59,53 @@ def solve_directly(A, b):
         raise ValueError(f"Unrecognized type of matrix to solve: {A}")
 
 
+def _parity(b):
+    """1 if the vector (b1, b2) is such that b1 = b2, -1 if b1 = -b2 and 0 otherwise."""
+    b1, b2 = b[:len(b)//2], b[len(b)//2:]
+    tolerance = PARITY_TOLERANCE*np.linalg.norm(b)
+    if np.linalg.norm(b1 - b2) <= tolerance:
+        return 1
+    elif np.linalg.norm(b1 + b2) <= tolerance:
+        return -1
+    else:
+        return 0
+
+
+def _solve_half_systems(A, b, solve_half_system):
+    """Solve a linear system with a 2×2 block symmetric Toeplitz matrix as two half-size systems.
+    When the right-hand side is symmetric or antisymmetric, only one of them is solved."""
+    b1, b2 = b[:len(b)//2], b[len(b)//2:]
+    parity = _parity(b)
+
+    if parity == -1:
+        LOG.debug("\tAntisymmetric right-hand side: skip the symmetric half system.")
+        x_plus = np.zeros_like(b1)
+    else:
+        x_plus = solve_half_system(A, 0, b1 + b2)
+
+    if parity == 1:
+        LOG.debug("\tSymmetric right-hand side: skip the antisymmetric half system.")
+        x_minus = np.zeros_like(x_plus)
+    else:
+        x_minus = solve_half_system(A, 1, b1 - b2)
+
+    return np.concatenate([x_plus + x_minus, x_plus - x_minus])/2
+
+
+def _solve_directly_half_system(A, i, b):
+    half_system = A.half_systems()[i]
+    if isinstance(half_system, np.ndarray):
+        # The LU decomposition is stored with the matrix, to be reused for the next right-hand sides.
+        if not hasattr(A, '_lu_of_half_systems'):
+            A._lu_of_half_systems = [None, None]
+        if A._lu_of_half_systems[i] is None:
+            LOG.debug(f"\tCompute LU decomposition of half system {i} of {A}.")
+            A._lu_of_half_systems[i] = sl.lu_factor(half_system)
+        return sl.lu_solve(A._lu_of_half_systems[i], b)
+    else:
+        return solve_directly(half_system, b)
+
+
 # EXPERIMENT: STORING THE LU DECOMPOSITION
 @lru_cache(maxsize=1)
 def lu_decomp(A):
@@ -83,6 +129,12 @@ class Counter:
 
 
 def solve_gmres(A, b):
+    if isinstance(A, BlockSymmetricToeplitzMatrix) and A.nb_blocks == (2, 2) and _parity(b) != 0:
+        # For a symmetric or antisymmetric right-hand side, the iterations of the GMRES stay in the subspace of
+        # the symmetric or antisymmetric vectors. They are done on the corresponding half system.
+        LOG.debug(f"Solve with GMRES for a half system of {A}.")
+        return _solve_half_systems(A, b, lambda A, i, b: solve_gmres(A.half_systems()[i], b))
+
     LOG.debug(f"Solve with GMRES for {A}.")
 
     if LOG.isEnabledFor(logging.DEBUG):
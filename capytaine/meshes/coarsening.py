@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""This module implements a tool to build coarser versions of a mesh by vertex clustering."""
+# Copyright (C) 2017-2019 Matthieu Ancellin
+# See LICENSE file at <https://github.com/mancellin/capytaine>
+
+import logging
+
+import numpy as np
+
+from capytaine.meshes.meshes import Mesh
+
+LOG = logging.getLogger(__name__)
+
+
+def coarsen(source_mesh: Mesh, cell_size, preserved_planes=(), vicinity_tol=1e-6, feature_angle=30.0, name=None):
+    """Return a coarser version of the mesh, built by clustering its vertices on a regular grid.
+
+    All the vertices in the same cell of the grid are replaced by a single one of them (the
+    one that is the closest to their mean), such that the new vertices are still on the surface
+    of the original body. The faces whose vertices have been merged are turned into triangles
+    or are removed.
+
+    The vertices lying on one of the preserved planes (such as the free surface or a symmetry
+    plane) are only clustered with other vertices of the same plane. Hence, the waterline of
+    the coarse mesh is a subset of the waterline of the original mesh.
+    Similarly, the vertices on the sharp edges of the mesh are only clustered with the vertices of
+    the same edge and the corners are kept, in order to limit the loss of volume of the body.
+
+    Parameters
+    ----------
+    source_mesh : Mesh
+        The mesh to be coarsened.
+    cell_size : float
+        The size of the cells of the grid, that is roughly the size of the new faces.
+    preserved_planes : iterable of Plane, optional
+        Planes whose vertices are not merged with the vertices outside of the plane.
+    vicinity_tol : float, optional
+        The absolute tolerance to consider a vertex is on a plane. Default is 1e-6.
+    feature_angle : float, optional
+        The minimal angle (in degrees) between two neighboring faces to consider their common edge is sharp.
+        Default is 30.
+    name: string, optional
+        A name for the new coarse mesh.
+
+    Returns
+    -------
+    Mesh
+    """
+    assert cell_size > 0, "The size of the cells of the coarsening grid should be positive."
+
+    if name is None:
+        name = f"coarsened_{source_mesh.name}"
+
+    vertices = source_mesh.vertices
+    if source_mesh.nb_faces == 0:
+        return source_mesh.copy(name=name)
+
+    # KEYS OF THE CLUSTERS
+    cells = np.floor((vertices - vertices.min(axis=0)) / cell_size).astype(np.int64)
+    on_planes = np.zeros(len(vertices), dtype=np.int64)
+    for i_plane, plane in enumerate(preserved_planes):
+        on_planes |= (np.abs(plane.distance_to_point(vertices)) < vicinity_tol).astype(np.int64) << i_plane
+    features = _sharp_features(source_mesh, feature_angle)
+    _, clusters = np.unique(np.column_stack([cells, on_planes, features]), axis=0, return_inverse=True)
+    clusters = clusters.ravel()
+    nb_clusters = clusters.max() + 1
+
+    # REPRESENTATIVE VERTEX OF EACH CLUSTER
+    means = np.stack([np.bincount(clusters, weights=vertices[:, j], minlength=nb_clusters) for j in range(3)], axis=1)
+    means /= np.bincount(clusters, minlength=nb_clusters)[:, np.newaxis]
+    distances = np.linalg.norm(vertices - means[clusters], axis=1)
+    order = np.lexsort((distances, clusters))
+    first_in_cluster = np.ones(len(order), dtype=bool)
+    first_in_cluster[1:] = clusters[order[1:]] != clusters[order[:-1]]
+    representatives = order[first_in_cluster]  # Sorted by cluster id.
+
+    # NEW FACES
+    # Consecutive repeated vertices are removed: a quadrangle with two merged neighboring vertices becomes
+    # a triangle. The other degenerated faces (such as a quadrangle with two merged opposite vertices) are removed.
+    faces = clusters[source_mesh.faces]
+    repeated = faces == np.roll(faces, 1, axis=1)
+    nb_remaining_vertices = 4 - np.count_nonzero(repeated, axis=1)
+    is_quadrangle = (nb_remaining_vertices == 4) & (faces[:, 0] != faces[:, 2]) & (faces[:, 1] != faces[:, 3])
+    is_triangle = nb_remaining_vertices == 3
+    triangles = faces[is_triangle][~repeated[is_triangle]].reshape((-1, 3))
+    new_faces = np.concatenate([faces[is_quadrangle], np.column_stack([triangles, triangles[:, 0]])])
+
+    coarse_mesh = Mesh(vertices[representatives], new_faces)
+
+    # Faces with the same vertices are kept once, unless they have opposite orientations and cancel each other.
+    # The faces that have been flattened by the clustering are also removed.
+    _, groups = np.unique(np.sort(new_faces, axis=1), axis=0, return_inverse=True)
+    groups = groups.ravel()
+    first_in_group = np.zeros(len(new_faces), dtype=bool)
+    first_in_group[np.unique(groups, return_index=True)[1]] = True
+    areas = coarse_mesh.faces_areas
+    weighted_normals = coarse_mesh.faces_normals * areas[:, np.newaxis]
+    group_normals = np.stack([np.bincount(groups, weights=weighted_normals[:, j]) for j in range(3)], axis=1)
+    kept = first_in_group & (np.linalg.norm(group_normals[groups], axis=1) > 0.5*areas) & (areas > 1e-8*areas.max())
+
+    coarse_mesh = coarse_mesh.extract_faces(np.where(kept)[0], name=name)  # Also removes the unused vertices.
+
+    LOG.info(f"Coarsening of {source_mesh.name} with cell size {cell_size:.2e}: "
+             f"from {source_mesh.nb_faces} to {coarse_mesh.nb_faces} faces.")
+
+    return coarse_mesh
+
+
+def _sharp_features(mesh, feature_angle):
+    """Classify the vertices of the mesh according to the normals of the faces around them.
+
+    Returns an array of ints, with one value per vertex, depending on the main direction of the normals around
+    the vertex and on whether the vertex is on a smooth part of the surface or on a sharp edge (and on the
+    direction of the edge). Each corner of the mesh gets its own unique value."""
+    nb_vertices = mesh.nb_vertices
+
+    # Sum of the normals and of the outer products of the normals of the faces around each vertex.
+    # For each face, each of its distinct vertices is counted once.
+    faces = mesh.faces
+    distinct = np.ones(faces.shape, dtype=bool)
+    distinct[:, 3] = faces[:, 3] != faces[:, 0]
+    vertices_ids = faces[distinct]
+    normals = np.repeat(mesh.faces_normals, np.count_nonzero(distinct, axis=1), axis=0)
+    mean_normals = np.zeros((nb_vertices, 3))
+    np.add.at(mean_normals, vertices_ids, normals)
+    tensors = np.zeros((nb_vertices, 3, 3))
+    np.add.at(tensors, vertices_ids, normals[:, :, np.newaxis] * normals[:, np.newaxis, :])
+
+    # Main direction of the normals: one of the six directions ±x, ±y, ±z.
+    main_directions = np.argmax(np.abs(mean_normals), axis=1)
+    features = 2*main_directions + (mean_normals[np.arange(nb_vertices), main_directions] > 0)
+
+    # The number of significant eigenvalues is the number of distinct directions of the normals.
+    eigenvalues, eigenvectors = np.linalg.eigh(tensors)
+    traces = np.maximum(eigenvalues.sum(axis=1), 1e-300)
+    threshold = np.sin(np.radians(feature_angle)/2)**2
+    nb_directions = np.count_nonzero(eigenvalues > threshold*traces[:, np.newaxis], axis=1)
+
+    edges = nb_directions == 2
+    # The direction of the edge is the eigenvector of the smallest eigenvalue.
+    features[edges] += 6*(1 + np.argmax(np.abs(eigenvectors[edges, :, 0]), axis=1))
+    corners = nb_directions >= 3
+    features[corners] = 24 + np.arange(np.count_nonzero(corners))
+    return features
@@ -201,6 +201,12 @@ class CollectionOfMeshes(Abstract3DObject):
     def sliced_by_plane(self, plane):
         return CollectionOfMeshes([mesh.sliced_by_plane(plane) for mesh in self], name=self.name)
 
+    def decomposed_as_octree(self, *args, **kwargs):
+        return self.merged().decomposed_as_octree(*args, **kwargs)
+
+    def coarsened(self, *args, **kwargs):
+        return self.merged().coarsened(*args, **kwargs)
+
     @inplace_transformation
     def translate(self, vector):
         for mesh in self:
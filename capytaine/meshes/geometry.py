@@ -22,16 +22,19 @@ e_z = np.array((0, 0, 1))
 def inplace_transformation(inplace_function):
     """Decorator for methods transforming 3D objects:
     * Add the optional argument `inplace` to return a new object instead of doing the transformation in place.
-    * If the object has properties cached in an "__internals__" dict, they are deleted.
+    * If the object has properties cached in an "__internals__" dict, they are deleted,
+      unless the transformation has replaced this dict by an updated one.
     """
     def enhanced_inplace_function(self, *args, inplace=True, name=None, **kwargs):
         if not inplace:
             object3d = self.copy(name=name)
         else:
             object3d = self
+        internals = getattr(object3d, '__internals__', None)
         inplace_function(object3d, *args, **kwargs)
-        if hasattr(object3d, '__internals__'):
-            object3d.__internals__.clear()
+        if internals is not None and object3d.__internals__ is internals:
+            # The cached properties have not been updated by the transformation itself.
+            internals.clear()
         return object3d
     return enhanced_inplace_function
 
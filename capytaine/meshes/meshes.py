@@ -12,7 +12,7 @@ from itertools import count
 import numpy as np
 
 from capytaine.meshes.geometry import Abstract3DObject, Plane, inplace_transformation
-from capytaine.meshes.properties import compute_faces_properties, compute_connectivity
+from capytaine.meshes.properties import compute_faces_properties, compute_connectivity, compute_hash_of_set_of_faces
 from capytaine.meshes.surface_integrals import compute_faces_integrals
 from capytaine.meshes.quality import (merge_duplicates, heal_normals, remove_unused_vertices,
                                       heal_triangles, remove_degenerated_faces)
@@ -233,6 +233,71 @@ class Mesh(Abstract3DObject):
             return CollectionOfMeshes([mesh_part_1, mesh_part_2],
                                       name=f"{self.name}_splitted_by_{plane}")
 
+    def decomposed_as_octree(self, leaf_size=100, name=None, return_index=False):
+        """Decompose the mesh as a balanced hierarchical structure of clusters of faces.
+
+        At each level of the tree, the faces are split in two groups of the same size at the median of the
+        coordinates of their centers, successively in each of the three directions (sorted by decreasing extent).
+        Each cluster is thus divided into (up to) eight sub-clusters with the same number of faces.
+        The faces are assigned to a cluster according to their center and they are not clipped.
+
+        Parameters
+        ----------
+        leaf_size: int, optional
+            the clusters with at most this number of faces are not split further (default: 100)
+        name: str, optional
+            a name for the new collection of meshes
+        return_index: bool, optional
+            if True, also return the indices of the faces of the original mesh in the order of the new mesh
+
+        Returns
+        -------
+        Mesh or CollectionOfMeshes
+            a nested collection of meshes whose leaves have at most leaf_size faces
+        ndarray of ints, optional
+            the indices of the faces in the original mesh
+        """
+        from capytaine.meshes.collections import CollectionOfMeshes
+
+        if name is None:
+            name = f"octree_of_{self.name}"
+
+        def split_at_medians(centers, ids, directions):
+            if len(directions) == 0 or len(ids) < 2:
+                return [ids]
+            half = len(ids)//2
+            order = np.argpartition(centers[ids, directions[0]], half)
+            return (split_at_medians(centers, ids[order[:half]], directions[1:])
+                    + split_at_medians(centers, ids[order[half:]], directions[1:]))
+
+        def decompose(mesh, ids, name):
+            # mesh is the sub-mesh of the original mesh made of the faces ids, in this order.
+            if len(ids) <= leaf_size:
+                return mesh, ids
+            centers = mesh.faces_centers
+            extents = np.ptp(centers, axis=0)
+            directions = [direction for direction in np.argsort(-extents) if extents[direction] > 0]
+            clusters = split_at_medians(centers, np.arange(len(ids)), directions)
+            if len(clusters) == 1:  # All the faces have the same center.
+                return mesh, ids
+            submeshes, submeshes_ids = [], []
+            for i, cluster in enumerate(clusters):
+                submesh = mesh.extract_faces(cluster, name=f"{name}_{i}")
+                submesh, cluster_ids = decompose(submesh, ids[cluster], f"{name}_{i}")
+                submeshes.append(submesh)
+                submeshes_ids.append(cluster_ids)
+            return CollectionOfMeshes(submeshes, name=name), np.concatenate(submeshes_ids)
+
+        if self.nb_faces <= leaf_size:
+            decomposed_mesh, ids = self.copy(name=name), np.arange(self.nb_faces)
+        else:
+            decomposed_mesh, ids = decompose(self, np.arange(self.nb_faces), name)
+
+        if return_index:
+            return decomposed_mesh, ids
+        else:
+            return decomposed_mesh
+
 
     #####################
     #  Mean and radius  #
@@ -471,7 +536,9 @@ class Mesh(Abstract3DObject):
         vector = np.asarray(vector, dtype=np.float)
         assert vector.shape == (3,), "The translation vector should be given as a 3-ple of values."
 
-        self.vertices += vector
+        new_internals = self._rigidly_transformed_internals(np.identity(3), vector)
+        self._vertices = self._vertices + vector
+        self.__internals__ = new_internals
 
         return self
 
@@ -486,7 +553,9 @@ class Mesh(Abstract3DObject):
         """
         rot_matrix = axis.rotation_matrix(angle)
 
+        new_internals = self._rigidly_transformed_internals(rot_matrix, np.zeros(3))
         self._vertices = np.transpose(np.dot(rot_matrix, self._vertices.T))
+        self.__internals__ = new_internals
 
         return self
 
@@ -508,10 +577,56 @@ class Mesh(Abstract3DObject):
         plane : Plane
             The mirroring plane
         """
-        self.vertices -= 2 * np.outer(np.dot(self.vertices, plane.normal) - plane.c, plane.normal)
-        self.flip_normals()
+        # Householder matrix of the reflection, such that x -> matrix @ x + shift.
+        matrix = np.identity(3) - 2 * np.outer(plane.normal, plane.normal)
+        shift = 2 * plane.c * plane.normal
+        # The reflection reverses the orientation of the faces, which is compensated by
+        # the flipping of the faces below. Hence the normals are simply reflected.
+        new_internals = self._rigidly_transformed_internals(matrix, shift, keep_orientation=False)
+        self._vertices = self._vertices - 2 * np.outer(np.dot(self._vertices, plane.normal) - plane.c, plane.normal)
+        self._faces = np.fliplr(self._faces)
+        self.__internals__ = new_internals
         return self
 
+    def _rigidly_transformed_internals(self, matrix, shift, keep_orientation=True):
+        """Return the cached properties of the mesh updated for the rigid transformation
+        :math:`x \\mapsto M x + s` of its vertices, without recomputing them from scratch.
+
+        Areas and radiuses are invariant, centers and normals are transformed in closed form.
+        Properties that can not be updated cheaply (e.g. surface integrals or hash) are dropped
+        and will be computed again on demand.
+
+        Parameters
+        ----------
+        matrix: array of shape (3, 3)
+            orthogonal matrix of the transformation
+        shift: array of shape (3,)
+            translation part of the transformation
+        keep_orientation: bool, optional
+            if False, the ordering of the vertices in the faces is reversed by the transformation,
+            thus the boundaries of the mesh are not kept.
+
+        Returns
+        -------
+        dict
+            the new internal cache of the mesh
+        """
+        kept_properties = ['faces_areas', 'faces_radiuses', 'diameter_of_nodes',
+                           'triangles_ids', 'quadrangles_ids', 'v_v', 'v_f', 'f_f']
+        if keep_orientation:
+            kept_properties.append('boundaries')
+
+        new_internals = {prop: self.__internals__[prop] for prop in kept_properties if prop in self.__internals__}
+
+        if 'faces_centers' in self.__internals__:
+            new_internals['faces_centers'] = self.__internals__['faces_centers'] @ matrix.T + shift
+        if 'faces_normals' in self.__internals__:
+            new_internals['faces_normals'] = self.__internals__['faces_normals'] @ matrix.T
+        if 'center_of_mass_of_nodes' in self.__internals__:
+            new_internals['center_of_mass_of_nodes'] = matrix @ self.__internals__['center_of_mass_of_nodes'] + shift
+
+        return new_internals
+
     @inplace_transformation
     def clip(self, plane) -> 'Mesh':
         from capytaine.meshes.clipper import clip
@@ -525,6 +640,27 @@ class Mesh(Abstract3DObject):
         # Same API as for the other transformations
         return self.clip(plane, inplace=False, **kwargs)
 
+    def coarsened(self, cell_size, free_surface=0.0, name=None) -> 'Mesh':
+        """Return a coarser version of the mesh, built by clustering its vertices on a grid.
+        The vertices on the free surface are kept on the free surface.
+        See :func:`~capytaine.meshes.coarsening.coarsen` for details.
+
+        Parameters
+        ----------
+        cell_size: float
+            the size of the cells of the grid, that is roughly the size of the new faces
+        free_surface: float, optional
+            position of the free surface (default: :math:`z = 0`)
+        name: str, optional
+            a name for the new mesh
+
+        Returns
+        -------
+        Mesh
+        """
+        from capytaine.meshes.coarsening import coarsen
+        return coarsen(self, cell_size, preserved_planes=[Plane(normal=(0, 0, 1), point=(0, 0, free_surface))], name=name)
+
     def symmetrized(self, plane):
         from capytaine.meshes.symmetric import ReflectionSymmetricMesh
         half = self.clipped(plane, name=f"{self.name}_half")
@@ -636,7 +772,7 @@ class Mesh(Abstract3DObject):
 
     def __hash__(self):
         if 'hash' not in self.__internals__:
-            self.__internals__['hash'] = hash(self.as_set_of_faces())
+            self.__internals__['hash'] = compute_hash_of_set_of_faces(self)
         return self.__internals__['hash']
 
     ##################
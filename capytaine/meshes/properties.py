@@ -91,6 +91,40 @@ def compute_radiuses(mesh, faces_centers):
     return faces_radiuses
 
 
+def _mix_bits(x):
+    """Scramble the bits of an array of unsigned 64-bit integers (finalizer of SplitMix64)."""
+    x = x ^ (x >> np.uint64(30))
+    x = x * np.uint64(0xbf58476d1ce4e5b9)
+    x = x ^ (x >> np.uint64(27))
+    x = x * np.uint64(0x94d049bb133111eb)
+    x = x ^ (x >> np.uint64(31))
+    return x
+
+
+def compute_hash_of_set_of_faces(mesh):
+    """Compute a hash of the mesh consistent with its representation as a set of faces.
+
+    It is equivalent in spirit to :code:`hash(mesh.as_set_of_faces())`,
+    that is it does not depend on the ordering of the faces and of the vertices,
+    but it is computed with vectorized operations instead of Python sets.
+    """
+    # Bits of the coordinates of the vertices (adding 0.0 replaces -0.0 by 0.0, since they are equal).
+    coordinates_bits = np.ascontiguousarray(mesh.vertices + 0.0, dtype=np.float64).view(np.uint64)
+
+    with np.errstate(over='ignore'):
+        vertices_hashes = _mix_bits(_mix_bits(_mix_bits(coordinates_bits[:, 0]) + coordinates_bits[:, 1])
+                                    + coordinates_bits[:, 2])
+
+        # A face is a set of vertices: repeated vertices (e.g. in triangles) are counted only once.
+        faces_vertices_hashes = np.sort(vertices_hashes[mesh.faces], axis=1)
+        repeated = np.zeros(faces_vertices_hashes.shape, dtype=bool)
+        repeated[:, 1:] = faces_vertices_hashes[:, 1:] == faces_vertices_hashes[:, :-1]
+        faces_vertices_hashes[repeated] = 0
+        faces_hashes = np.unique(_mix_bits(faces_vertices_hashes.sum(axis=1, dtype=np.uint64)))
+
+        return hash(int(_mix_bits(faces_hashes).sum(dtype=np.uint64)))
+
+
 def compute_connectivity(mesh):
     """Compute the connectivities of the mesh.
 
@@ -72,6 +72,16 @@ class ReflectionSymmetricMesh(SymmetricMesh):
     def __deepcopy__(self, *args):
         return ReflectionSymmetricMesh(self.half.copy(), self.plane, name=self.name)
 
+    def coarsened(self, cell_size, free_surface=0.0, name=None):
+        """Coarsen the half mesh and rebuild the symmetric mesh, such that the symmetry is kept."""
+        from capytaine.meshes.coarsening import coarsen
+        if name is None:
+            name = f"coarsened_{self.name}"
+        free_surface_plane = Plane(normal=(0, 0, 1), point=(0, 0, free_surface))
+        coarse_half = coarsen(self.half.merged(), cell_size, preserved_planes=[free_surface_plane, self.plane],
+                              name=f"half_of_{name}")
+        return ReflectionSymmetricMesh(coarse_half, plane=self.plane, name=name)
+
     def join_meshes(*meshes, name=None):
         assert all(isinstance(mesh, ReflectionSymmetricMesh) for mesh in meshes), \
             "Only meshes with the same symmetry can be joined together."
@@ -343,3 +353,234 @@ class AxialSymmetricMesh(SymmetricMesh):
         CollectionOfMeshes.mirror(self, plane)
         return self
 
+
+def _images_of_faces(mesh, faces_ids, matrix, shift, atol):
+    """Return the indices of the faces of the mesh that are the images of the faces faces_ids by the
+    transformation x -> matrix @ x + shift, or None if some of the images are not faces of the mesh."""
+    from scipy.spatial import cKDTree
+    distances, images_ids = cKDTree(mesh.faces_centers).query(
+        mesh.faces_centers[faces_ids] @ matrix.T + shift, distance_upper_bound=atol)
+    if not np.all(np.isfinite(distances)):
+        return None
+    if not (np.allclose(mesh.faces_normals[images_ids], mesh.faces_normals[faces_ids] @ matrix.T, atol=1e-3)
+            and np.allclose(mesh.faces_areas[images_ids], mesh.faces_areas[faces_ids], rtol=1e-3)):
+        return None
+    return images_ids
+
+
+def _find_reflection(mesh, plane, atol):
+    """Split the faces of the mesh into two halves that are the reflection of each other across the plane.
+
+    Returns
+    -------
+    pair of arrays of ints or None
+        the faces of the first half and their respective images in the second half
+    """
+    distances = plane.distance_to_point(mesh.faces_centers)
+    if np.any(np.abs(distances) <= atol):
+        return None  # Some faces are crossing the plane.
+    half_ids = np.where(distances < 0)[0]
+    if 2*len(half_ids) != mesh.nb_faces:
+        return None
+    matrix = np.identity(3) - 2*np.outer(plane.normal, plane.normal)
+    images_ids = _images_of_faces(mesh, half_ids, matrix, np.zeros(3), atol)
+    if images_ids is None or not np.all(distances[images_ids] > 0):
+        return None
+    return half_ids, images_ids
+
+
+def _find_rotation(mesh, axis, nb_slices, atol):
+    """Split the faces of the mesh into nb_slices slices that are the images of each other by rotation around the axis.
+
+    Returns
+    -------
+    pair of (array of ints, list of arrays of ints) or None
+        the angular position of the beginning of the first slice and
+        for each slice, the faces that are the images of the faces of the first slice
+    """
+    centers = mesh.faces_centers
+    if np.any(np.linalg.norm(centers[:, :2], axis=1) <= atol):
+        return None  # Some faces are on the axis.
+    angles = np.arctan2(centers[:, 1], centers[:, 0]) % (2*np.pi)
+
+    # Start the first slice in the middle of the largest angular gap between the faces (modulo the angle of a slice).
+    slice_angle = 2*np.pi/nb_slices
+    residues = np.sort(angles % slice_angle)
+    gaps = np.diff(np.append(residues, residues[0] + slice_angle))
+    start_angle = residues[np.argmax(gaps)] + np.max(gaps)/2
+
+    slice_ids = np.where((angles - start_angle) % (2*np.pi) < slice_angle)[0]
+    if nb_slices*len(slice_ids) != mesh.nb_faces:
+        return None
+
+    slices_ids = [slice_ids]
+    for i in range(1, nb_slices):
+        images_ids = _images_of_faces(mesh, slice_ids, axis.rotation_matrix(i*slice_angle), np.zeros(3), atol)
+        if images_ids is None:
+            return None
+        slices_ids.append(images_ids)
+    if len(np.unique(np.concatenate(slices_ids))) != mesh.nb_faces:
+        return None
+    return start_angle, slices_ids
+
+
+def detect_symmetries(mesh, tolerance=1e-5, name=None, return_index=False):
+    """Look for the symmetries of a mesh and return it as the corresponding symmetric mesh.
+
+    The following symmetries are tested:
+
+    * discrete rotational symmetry around the vertical axis through the center of the bounding box of the mesh,
+      with the largest possible number of slices (at least 3),
+      in which case the first slice might also be reflection symmetric;
+    * otherwise, reflection symmetry across the planes parallel to xOz and yOz through the center of the bounding box,
+      in which case the half mesh might also be reflection symmetric across the other plane.
+
+    The faces crossing a symmetry plane or a symmetry axis are not clipped, such that the symmetry is not detected
+    when they exist.
+
+    Parameters
+    ----------
+    mesh : Mesh or CollectionOfMeshes
+        the mesh to be analyzed (collections are merged first)
+    tolerance : float, optional
+        tolerance on the position of the faces, relative to the size of the mesh
+    name : str, optional
+        a name for the new mesh
+    return_index : bool, optional
+        if True, also return the indices of the faces of the original mesh in the order of the new mesh
+
+    Returns
+    -------
+    Mesh or SymmetricMesh
+        the mesh, with a structure reflecting its symmetries (or a copy of the mesh if no symmetry has been found)
+    ndarray of ints, optional
+        the indices of the faces in the original mesh
+    """
+    mesh = mesh.merged()
+    if name is None:
+        name = mesh.name
+
+    x_min, x_max, y_min, y_max, z_min, z_max = mesh.axis_aligned_bbox
+    atol = tolerance * max(x_max - x_min, y_max - y_min, z_max - z_min)
+
+    # The symmetries are looked for on a copy of the mesh centered on the vertical axis Oz,
+    # since the rotations of the meshes are always around an axis passing through the origin.
+    center = np.array([(x_min + x_max)/2, (y_min + y_max)/2, 0.0])
+    mesh = mesh.translated(-center, name=name)
+
+    def reflection_symmetric(mesh, plane, name):
+        reflection = _find_reflection(mesh, plane, atol)
+        if reflection is None:
+            return None
+        half_ids, images_ids = reflection
+        half, ids = look_for_reflections(mesh.extract_faces(half_ids, name=f"half_of_{name}"), f"half_of_{name}")
+        LOG.info(f"Detected reflection symmetry of {name} across {plane}.")
+        return ReflectionSymmetricMesh(half, plane=plane, name=name), np.concatenate([half_ids[ids], images_ids[ids]])
+
+    def look_for_reflections(mesh, name):
+        for normal in ((0, 1, 0), (1, 0, 0)):
+            symmetric_mesh = reflection_symmetric(mesh, Plane(normal=normal), name)
+            if symmetric_mesh is not None:
+                return symmetric_mesh
+        return mesh, np.arange(mesh.nb_faces)
+
+    def look_for_rotations(mesh, name):
+        axis = Oz_axis
+        for nb_slices in range(mesh.nb_faces, 2, -1):
+            if mesh.nb_faces % nb_slices != 0:
+                continue
+            rotation = _find_rotation(mesh, axis, nb_slices, atol)
+            if rotation is None:
+                continue
+            start_angle, slices_ids = rotation
+            LOG.info(f"Detected rotation symmetry of {name} of order {nb_slices}.")
+
+            mesh_slice = mesh.extract_faces(slices_ids[0], name=f"slice_of_{name}")
+            # The first slice might be reflection symmetric with respect to the plane in its middle.
+            mid_angle = start_angle + np.pi/nb_slices
+            slice_plane = Plane(normal=(-np.sin(mid_angle), np.cos(mid_angle), 0))
+            symmetric_slice = reflection_symmetric(mesh_slice, slice_plane, f"slice_of_{name}")
+            if symmetric_slice is not None:
+                mesh_slice, ids = symmetric_slice
+            else:
+                ids = np.arange(mesh_slice.nb_faces)
+
+            symmetric_mesh = AxialSymmetricMesh(mesh_slice, axis=axis, nb_repetitions=nb_slices - 1, name=name)
+            return symmetric_mesh, np.concatenate([slice_ids[ids] for slice_ids in slices_ids])
+        return None
+
+    symmetric_mesh = look_for_rotations(mesh, name)
+    if symmetric_mesh is None:
+        symmetric_mesh = look_for_reflections(mesh, name)
+
+    symmetric_mesh, ids = symmetric_mesh
+    symmetric_mesh.translate(center)
+
+    if return_index:
+        return symmetric_mesh, ids
+    else:
+        return symmetric_mesh
+
+
+def horizontal_isometries(mesh, tolerance=1e-5):
+    """List the transformations of the horizontal plane that map the mesh onto itself,
+    based on the symmetries stored in the structure of the mesh.
+
+    The vertical planes of symmetry of the :class:`ReflectionSymmetricMesh` and the rotations around the vertical
+    axes of the :class:`AxialSymmetricMesh` found in the tree of the mesh are combined together.
+    Each resulting transformation is checked on the faces of the full mesh.
+
+    Parameters
+    ----------
+    mesh : Mesh or CollectionOfMeshes
+        the mesh to be analyzed
+    tolerance : float, optional
+        tolerance on the position of the faces, relative to the size of the mesh
+
+    Returns
+    -------
+    list of triplets (3×3 array, array of size 3, array of ints)
+        for each transformation x -> matrix @ x + shift (except the identity), the matrix, the shift and
+        the indices of the images of the faces of the mesh by the transformation
+    """
+    generators = []
+
+    def walk(mesh):
+        if isinstance(mesh, ReflectionSymmetricMesh) and abs(mesh.plane.normal[2]) < 1e-12:
+            # Only the vertical planes leave the free surface unchanged.
+            normal = mesh.plane.normal
+            generators.append((np.identity(3) - 2*np.outer(normal, normal), 2*(mesh.plane.point @ normal)*normal))
+        elif isinstance(mesh, AxialSymmetricMesh) and mesh.axis.is_parallel_to(Oz_axis):
+            matrix = mesh.axis.rotation_matrix(2*np.pi/len(mesh))
+            generators.append((matrix, mesh.axis.point - matrix @ mesh.axis.point))
+        if isinstance(mesh, CollectionOfMeshes):
+            for submesh in mesh:
+                walk(submesh)
+
+    walk(mesh)
+    if len(generators) == 0:
+        return []
+
+    # Closure of the set of transformations under composition.
+    transformations = [(np.identity(3), np.zeros(3))]
+    new_transformations = list(transformations)
+    while len(new_transformations) > 0 and len(transformations) <= 4*mesh.nb_faces:
+        candidates = [(m1 @ m2, m1 @ s2 + s1) for m1, s1 in generators for m2, s2 in new_transformations]
+        new_transformations = []
+        for matrix, shift in candidates:
+            if not any(np.allclose(matrix, m) and np.allclose(shift, s) for m, s in transformations):
+                transformations.append((matrix, shift))
+                new_transformations.append((matrix, shift))
+
+    x_min, x_max, y_min, y_max, z_min, z_max = mesh.axis_aligned_bbox
+    atol = tolerance * max(x_max - x_min, y_max - y_min, z_max - z_min)
+    all_faces = np.arange(mesh.nb_faces)
+
+    isometries = []
+    for matrix, shift in transformations[1:]:
+        images_ids = _images_of_faces(mesh, all_faces, matrix, shift, atol)
+        if images_ids is not None and len(np.unique(images_ids)) == mesh.nb_faces:
+            isometries.append((matrix, shift, images_ids))
+        else:
+            LOG.debug(f"Symmetry of the structure of {mesh.name} not verified on the full mesh.")
+    return isometries
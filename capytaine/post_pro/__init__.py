@@ -2,4 +2,5 @@
 # See LICENSE file at <https://github.com/mancellin/capytaine>
 
 from capytaine.post_pro.rao import rao
-from capytaine.post_pro.kochin import compute_kochin
+from capytaine.post_pro.kochin import compute_kochin, compute_kochin_of_results
+from capytaine.post_pro.linear_combinations import add_linear_combination_of_dofs
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Computation of the excitation forces from the radiation problems with the Haskind relation."""
+# Copyright (C) 2017-2019 Matthieu Ancellin
+# See LICENSE file at <https://github.com/mancellin/capytaine>
+
+import numpy as np
+
+from capytaine.bem.airy_waves import _airy_waves_velocity
+
+
+def compute_haskind_excitation_forces(radiation_results, wave_direction, convention="Nemoh"):
+    r"""Compute the diffraction forces for several incoming wave directions
+    from the potentials of the radiation problems, without solving any diffraction problem.
+
+    By the Haskind relation, the diffraction force on the dof :math:`j` is
+
+    .. math::
+        F_j = i \omega \rho \iint_S \phi_j \frac{\partial \phi_0}{\partial n} dS
+
+    where :math:`\phi_j` is the potential of the radiation problem of the dof :math:`j`
+    and :math:`\phi_0` is the potential of the incoming waves.
+
+    Parameters
+    ----------
+    radiation_results: list of RadiationResult
+        solved radiation problems of the same body in the same environment,
+        with their potential (i.e. solved with :code:`keep_details=True`)
+    wave_direction: float or 1-dim array of floats
+        directions of the incoming waves
+    convention: str, optional
+        convention for the incoming wave field. Accepted values: "Nemoh", "WAMIT".
+
+    Returns
+    -------
+    dict
+        for each radiating dof of the results, the diffraction force(s), with the same shape as wave_direction
+    """
+    radiation_results = list(radiation_results)
+    first = radiation_results[0]
+    assert all(result.body is first.body and
+               (result.omega, result.free_surface, result.sea_bottom, result.g, result.rho) ==
+               (first.omega, first.free_surface, first.sea_bottom, first.g, first.rho)
+               for result in radiation_results), \
+        "The Haskind relation requires radiation results of the same body in the same environment."
+
+    for result in radiation_results:
+        if result.potential is None:
+            raise Exception(f"""The values of the potential of {result} cannot been found.
+            They probably have not been stored by the solver because the option keep_details=True have not been set.
+            Please re-run the resolution with this option.""")
+
+    mesh = first.body.mesh
+    wave_direction = np.asarray(wave_direction, dtype=np.float64)
+
+    # normal_velocities.shape = (nb_faces, nb_directions)
+    velocities = _airy_waves_velocity(mesh.faces_centers, wave_direction.ravel(), first.omega, first.wavenumber,
+                                      first.depth, first.g, convention=convention)
+    normal_velocities = np.einsum('ijk,ik->ij', velocities, mesh.faces_normals)
+
+    # potentials.shape = (nb_dofs, nb_faces)
+    potentials = np.array([result.potential for result in radiation_results])
+
+    forces = 1j*first.omega*first.rho * (potentials * mesh.faces_areas) @ normal_velocities
+    return {result.radiating_dof: force.reshape(wave_direction.shape)
+            for result, force in zip(radiation_results, forces)}
@@ -1,10 +1,16 @@
 #!/usr/bin/env python
 # coding: utf-8
-"""Computation of the Kochin function."""
+"""Computation of the Kochin function and of the far field potential deduced from it."""
 # Copyright (C) 2017-2019 Matthieu Ancellin
 # See LICENSE file at <https://github.com/mancellin/capytaine>
 
 import numpy as np
+from scipy.interpolate import CubicSpline
+from scipy.special import hankel1
+
+
+# Maximum number of elements of the matrix of the Kochin function evaluated at once.
+KOCHIN_BLOCK_SIZE = 1_000_000
 
 
 def compute_kochin(result, theta, ref_point=(0.0, 0.0)):
@@ -24,29 +30,122 @@ def compute_kochin(result, theta, ref_point=(0.0, 0.0)):
     H: same type as theta
         values of the Kochin function
     """
+    kochin = compute_kochin_of_results([result], np.ravel(theta), ref_point)[0]
+    if np.ndim(theta) == 0:
+        return kochin[0]
+    else:
+        return kochin
+
+
+def compute_kochin_of_results(results, theta, ref_point=(0.0, 0.0), block_size=KOCHIN_BLOCK_SIZE):
+    """Compute the far field coefficient of several results.
+
+    The results sharing the same body and the same wavenumber and water depth are grouped,
+    such that the matrix relating the sources to the Kochin function is built once for all of them.
+    This matrix is evaluated by blocks of angles of at most :code:`block_size` elements.
+
+    Parameters
+    ----------
+    results: list of LinearPotentialFlowResult
+        solved potential flow problems
+    theta: 1-dim array of floats
+        angles at which the coefficient is computed
+    ref_point: couple of float, optional
+        point of reference around which the far field coefficient is computed
+    block_size: int, optional
+        maximum number of elements of the matrix evaluated at once
+
+    Returns
+    -------
+    H: array of shape (len(results), len(theta))
+        values of the Kochin function
+    """
+    theta = np.asarray(theta, dtype=np.float64).ravel()
+
+    groups = {}
+    for i, result in enumerate(results):
+        if result.sources is None:
+            raise Exception(f"""The values of the sources of {result} cannot been found.
+            They probably have not been stored by the solver because the option keep_details=True have not been set.
+            Please re-run the resolution with this option.""")
+        groups.setdefault((id(result.body), result.wavenumber, result.depth), []).append(i)
+
+    kochin = np.empty((len(results), len(theta)), dtype=np.complex128)
+    for indices in groups.values():
+        first = results[indices[0]]
+        mesh = first.body.mesh
+        k = first.wavenumber
+        h = first.depth
 
-    if result.sources is None:
-        raise Exception(f"""The values of the sources of {result} cannot been found.
-        They probably have not been stored by the solver because the option keep_details=True have not been set.
-        Please re-run the resolution with this option.""")
+        if 0 <= k*h < 20:
+            cih = np.cosh(k*(mesh.faces_centers[:, 2]+h))/np.cosh(k*h)
+        else:
+            cih = np.exp(k*mesh.faces_centers[:, 2])
+        # cih.shape = (nb_faces,)
+        weights = cih * mesh.faces_areas/(4*np.pi)
+        horizontal_position = mesh.faces_centers[:, 0:2] - ref_point
 
+        # sources.shape = (nb_faces, nb_results_in_group)
+        sources = np.array([results[i].sources for i in indices]).T
+
+        nb_theta_per_block = max(1, block_size // max(1, mesh.nb_faces))
+        for j in range(0, len(theta), nb_theta_per_block):
+            block = slice(j, j+nb_theta_per_block)
+            # omega_bar.shape = (nb_theta_in_block, nb_faces)
+            omega_bar = np.stack([np.cos(theta[block]), np.sin(theta[block])], axis=1) @ horizontal_position.T
+            zs = np.exp(-1j * k * omega_bar) * weights
+            kochin[indices, block] = (zs @ sources).T
+
+    return kochin
+
+
+def far_field_potential(result, points, ref_point=(0.0, 0.0), nb_directions=None):
+    """Compute the potential far from the body from the asymptotic expansion of the Green function,
+    in which the contribution of the body is summarized by the Kochin function.
+
+    The Kochin function is computed on a regular sampling of the directions and interpolated,
+    such that the cost does not depend on the product of the number of points and of the number of faces.
+    The approximation is only valid for points at a distance of several wavelengths from the body,
+    and its error decreases as the inverse of this distance.
+
+    Parameters
+    ----------
+    result: LinearPotentialFlowResult
+        solved potential flow problem
+    points: array of shape (nb_points, 3)
+        the points where the potential is computed
+    ref_point: couple of float, optional
+        point of reference around which the Kochin function is computed, preferably the center of the body
+    nb_directions: int, optional
+        number of directions in which the Kochin function is computed
+        (default: based on the wavenumber and the horizontal size of the body)
+
+    Returns
+    -------
+    array of shape (nb_points,)
+        potential at the points
+    """
+    points = np.asarray(points, dtype=np.float64).reshape((-1, 3))
     k = result.wavenumber
     h = result.depth
 
-    # omega_bar.shape = (nb_faces, 2) @ (2, nb_theta)
-    omega_bar = (result.body.mesh.faces_centers[:, 0:2] - ref_point) @ (np.cos(theta), np.sin(theta))
+    if nb_directions is None:
+        # The Kochin function of a body of horizontal radius r has Fourier components up to about k*r.
+        r = np.max(np.linalg.norm(result.body.mesh.faces_centers[:, 0:2] - ref_point, axis=1))
+        nb_directions = max(64, int(np.ceil(32*k*r)))
 
-    if 0 <= k*h < 20:
-        cih = np.cosh(k*(result.body.mesh.faces_centers[:, 2]+h))/np.cosh(k*h)
-    else:
-        cih = np.exp(k*result.body.mesh.faces_centers[:, 2])
+    sampled_theta = np.linspace(0.0, 2*np.pi, nb_directions + 1)
+    sampled_kochin = compute_kochin(result, sampled_theta[:-1], ref_point)
+    kochin = CubicSpline(sampled_theta, np.append(sampled_kochin, sampled_kochin[0]), bc_type='periodic')
 
-    # cih.shape = (nb_faces,)
-    # omega_bar.T.shape = (nb_theta, nb_faces)
-    # result.body.mesh.faces_areas.shape = (nb_faces,)
-    zs = cih * np.exp(-1j * k * omega_bar.T) * result.body.mesh.faces_areas
+    horizontal_position = points[:, 0:2] - ref_point
+    R = np.linalg.norm(horizontal_position, axis=1)
+    theta = np.arctan2(horizontal_position[:, 1], horizontal_position[:, 0]) % (2*np.pi)
 
-    # zs.shape = (nb_theta, nb_faces)
-    # result.sources.shape = (nb_faces,)
-    return zs @ result.sources/(4*np.pi)
+    if 0 <= k*h < 20:
+        nu = result.omega**2/result.g
+        vertical_profile = (k**2 - nu**2)/(h*(k**2 - nu**2) + nu) * np.cosh(k*h) * np.cosh(k*(points[:, 2] + h))
+    else:
+        vertical_profile = k*np.exp(k*points[:, 2])
 
+    return -2j*np.pi * vertical_profile * kochin(theta) * hankel1(0, k*R)
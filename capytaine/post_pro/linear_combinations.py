@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""Add to a dataset a dof that is a linear combination of the dofs of the dataset, without new resolution."""
+# Copyright (C) 2017-2019 Matthieu Ancellin
+# See LICENSE file at <https://github.com/mancellin/capytaine>
+
+import logging
+
+import numpy as np
+import xarray as xr
+
+LOG = logging.getLogger(__name__)
+
+
+def add_linear_combination_of_dofs(dataset, name, coefficients):
+    """Add a new dof to a dataset, defined as a linear combination of the dofs of the dataset.
+
+    All the variables depending on the radiating dofs or on the influenced dofs (added mass, radiation damping,
+    diffraction force, ...) are linear with respect to the dofs, so that their values for the new dof
+    are computed by superposition.
+
+    Parameters
+    ----------
+    dataset: xarray Dataset
+        the hydrodynamical dataset, for instance as returned by :meth:`~capytaine.bem.nemoh.Nemoh.fill_dataset`
+    name: str
+        the name of the new dof
+    coefficients: dict
+        the real-valued coefficient of each dof of the dataset involved in the combination
+
+    Returns
+    -------
+    xarray Dataset
+        a new dataset, in which the coordinates 'radiating_dof' and 'influenced_dof' include the new dof
+    """
+    dofs = list(coefficients)
+    weights = np.array(list(coefficients.values()))
+    if np.iscomplexobj(weights):
+        # The added mass and the radiation damping are not linear with respect to complex-valued coefficients.
+        raise ValueError("Only real-valued linear combinations of dofs are supported.")
+
+    for dim in ('radiating_dof', 'influenced_dof'):
+        if dim not in dataset.dims:
+            continue
+        weights_array = xr.DataArray(weights, coords={dim: dofs}, dims=[dim])
+        dataset = dataset.reindex({dim: list(dataset[dim].values) + [name]})
+        for variable_name, variable in dataset.data_vars.items():
+            if dim in variable.dims:
+                variable.loc[{dim: name}] = (variable.sel({dim: dofs}) * weights_array).sum(dim)
+
+    return dataset
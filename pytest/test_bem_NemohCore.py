@@ -70,3 +70,81 @@ def test_green_function(omega, depth):
                            rtol=1e-4)
 
 
+def test_tabulated_prony_decomposition(tmp_path, monkeypatch):
+    from capytaine.bem.prony_decomposition import (
+        find_best_exponential_decomposition, tabulated_exponential_decompositions,
+        _decomposition_error, PRONY_TABLE_VERSION
+    )
+    monkeypatch.setenv("CAPYTAINE_CACHE_DIR", str(tmp_path))
+    table = tabulated_exponential_decompositions()
+    assert (tmp_path / f"prony_table_v{PRONY_TABLE_VERSION}.npz").is_file()
+    assert np.all(np.diff(table['dimensionless_wavenumber']) > 0)
+
+    # The decompositions read in the table are as accurate as the ones computed directly.
+    for kh in [0.137, 0.78, 2.31, 9.6]:
+        dimensionless_omega = kh*np.tanh(kh)
+        a, lamda = find_best_exponential_decomposition(dimensionless_omega, kh, method='tabulated')
+        a_ref, lamda_ref = find_best_exponential_decomposition(dimensionless_omega, kh, method='fortran')
+        assert a[-1] == 2.0 and lamda[-1] == 0.0
+        assert (_decomposition_error(dimensionless_omega, kh, a[:-1], lamda[:-1])
+                <= max(1e-2, 2*_decomposition_error(dimensionless_omega, kh, a_ref[:-1], lamda_ref[:-1])))
+
+
+@pytest.mark.parametrize("engine", ["Delhommeau", "FastInfiniteDepth"])
+def test_rows_and_columns_of_influence_matrices(engine):
+    from capytaine.bem.nemoh import Nemoh
+    from capytaine.bodies.predefined.spheres import Sphere
+    mesh = Sphere(radius=1.0, ntheta=6, nphi=8, clip_free_surface=True).mesh
+    green_function = Nemoh.available_green_functions[engine]()
+    S, K = Nemoh(green_function=green_function, hierarchical_matrices=False).build_matrices(mesh, mesh, wavenumber=1.0)
+
+    ids = [0, 5, 17]
+    S_rows, K_rows = green_function.evaluate_rows(ids, mesh, mesh, wavenumber=1.0)
+    assert np.allclose(S_rows, S[ids, :]) and np.allclose(K_rows, K[ids, :])
+    S_columns, K_columns = green_function.evaluate_columns(ids, mesh, mesh, wavenumber=1.0)
+    assert np.allclose(S_columns, S[:, ids]) and np.allclose(K_columns, K[:, ids])
+
+
+@pytest.mark.parametrize("environment", [dict(free_surface=0.0, sea_bottom=-np.infty, wavenumber=1.0),
+                                         dict(free_surface=0.0, sea_bottom=-np.infty, wavenumber=0.0),
+                                         dict(free_surface=np.infty, sea_bottom=-np.infty, wavenumber=1.0),
+                                         dict(free_surface=0.0, sea_bottom=-5.0, wavenumber=1.0)])
+def test_fused_influence_matrices(environment):
+    from capytaine.bem.green_functions import AbstractGreenFunction, DelhommeauGreenFunction
+    from capytaine.bodies.predefined.spheres import Sphere
+    mesh = Sphere(radius=1.0, ntheta=6, nphi=8, clip_free_surface=True).mesh
+    other_mesh = mesh.translated_x(3.0)
+    green_function = DelhommeauGreenFunction()
+    for mesh1, mesh2 in [(mesh, mesh), (mesh, other_mesh)]:
+        S, K = green_function.evaluate(mesh1, mesh2, **environment)
+        S_ref, K_ref = AbstractGreenFunction.evaluate(green_function, mesh1, mesh2, **environment)
+        assert np.allclose(S, S_ref, rtol=1e-12, atol=0.0) and np.allclose(K, K_ref, rtol=1e-12, atol=0.0)
+
+
+@pytest.mark.parametrize("environment", [dict(free_surface=0.0, sea_bottom=-np.infty, wavenumber=1.0),
+                                         dict(free_surface=0.0, sea_bottom=-5.0, wavenumber=1.0)])
+def test_influence_matrices_at_points(environment):
+    from capytaine.bem.green_functions import DelhommeauGreenFunction
+    from capytaine.bodies.predefined.spheres import Sphere
+    from capytaine.meshes.meshes import Mesh
+    mesh = Sphere(radius=1.0, ntheta=6, nphi=8, clip_free_surface=True).mesh
+    points = np.array([[2.0, 1.0, -0.5], [-1.5, 0.5, -2.5], [0.3, -2.0, -1.0], [0.0, 0.0, -1.05], [0.5, 0.2, -0.01]])
+    normals = np.random.default_rng(0).normal(size=points.shape)
+    normals /= np.linalg.norm(normals, axis=1)[:, np.newaxis]
+
+    # Small panels centered on the points: the matrix K is the gradient of S in the direction of their normals.
+    tangents = np.cross(normals, (1, 0, 0))
+    tangents /= np.linalg.norm(tangents, axis=1)[:, np.newaxis]
+    other_tangents = np.cross(normals, tangents)
+    vertices = np.concatenate([points + 1e-3*(a*tangents + b*other_tangents)
+                               for a, b in [(-1, -1), (1, -1), (1, 1), (-1, 1)]])
+    panels = Mesh(vertices, np.arange(len(vertices)).reshape((4, -1)).T)
+    assert np.allclose(panels.faces_centers, points) and np.allclose(panels.faces_normals, normals)
+
+    green_function = DelhommeauGreenFunction()
+    S_ref, K_ref = green_function.evaluate(panels, mesh, **environment)
+    S, grad_S = green_function.evaluate_at_points(points, mesh, gradient=True, **environment)
+    assert grad_S.shape == (len(points), mesh.nb_faces, 3)
+    assert np.allclose(S, S_ref, rtol=1e-12, atol=0.0)
+    assert np.allclose(np.einsum('ijk,ik->ij', grad_S, normals), K_ref, rtol=1e-12, atol=1e-15)
+    assert np.allclose(green_function.evaluate_at_points(points, mesh, **environment), S, rtol=1e-12, atol=0.0)
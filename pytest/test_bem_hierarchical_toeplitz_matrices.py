@@ -218,3 +218,20 @@ def test_array_of_spheres():
     assert np.isclose(result.added_masses['2_0__Heave'], result2.added_masses['2_0__Heave'], atol=15.0)
     assert np.isclose(result.radiation_dampings['2_0__Heave'], result2.radiation_dampings['2_0__Heave'], atol=15.0)
 
+
+def test_irregular_array_of_cylinders():
+    cylinder = VerticalCylinder(length=2.0, radius=1.0, center=(0.0, 0.0, -2.0),
+                                nx=3, ntheta=8, nr=1, clever=False).mesh
+    # Staggered layout: some pairs of cylinders have the same relative positions.
+    positions = [(0.0, 0.0), (4.0, 0.0), (2.0, 3.5), (6.0, 3.5)]
+    meshes = [cylinder.translated((x, y, 0.0), name=f"cylinder_{i}") for i, (x, y) in enumerate(positions)]
+    farm = CollectionOfMeshes(meshes, name="farm")
+
+    fullS, fullV = solver_without_sym.build_matrices(farm, farm, 0.0, -np.infty, 1.0)
+    S, V = solver_with_sym.build_matrices(farm, farm, 0.0, -np.infty, 1.0)
+
+    assert S.all_blocks[0, 1] is S.all_blocks[2, 3]  # Same relative position (4.0, 0.0)
+    assert S.all_blocks[0, 2] is S.all_blocks[1, 3]  # Same relative position (2.0, 3.5)
+    assert S.all_blocks[0, 0] is S.all_blocks[1, 1]  # Identical bodies
+    assert np.allclose(S.full_matrix(), fullS)
+    assert np.allclose(V.full_matrix(), fullV)
@@ -1,7 +1,9 @@
 #!/usr/bin/env python
 # coding: utf-8
 
+import pytest
 import numpy as np
+import xarray as xr
 import capytaine as cpt
 
 
@@ -55,3 +57,34 @@ def test_rotation_axis():
     P = np.array([1, -l])
     assert np.isclose(A_m, P.T @ A @ P)
 
+
+def test_superposition_of_dofs():
+    from capytaine.post_pro import add_linear_combination_of_dofs
+    body = cpt.RectangularParallelepiped(resolution=(4, 4, 4), center=(0, 0, -1), name="body")
+    body.add_translation_dof(name="Sway")
+    body.add_rotation_dof(axis=cpt.Axis(point=(0, 0, 0), vector=(0, 0, 1)), name="Yaw")
+    l = 2.0
+    body.add_rotation_dof(axis=cpt.Axis(point=(l, 0, 0), vector=(0, 0, 1)), name="other_rotation")
+
+    problems = [cpt.RadiationProblem(body=body, radiating_dof=dof, omega=1.0) for dof in body.dofs]
+    reference = cpt.Nemoh(linear_solver='direct').solve_all(problems, keep_details=True)
+    results = cpt.Nemoh(linear_solver='direct', dofs_superposition=True).solve_all(problems, keep_details=True)
+    for result, reference_result in zip(results, reference):
+        assert np.allclose(result.sources, reference_result.sources, atol=1e-10)
+        for dof in body.dofs:
+            assert np.isclose(result.added_masses[dof], reference_result.added_masses[dof], rtol=1e-8)
+            assert np.isclose(result.radiation_dampings[dof], reference_result.radiation_dampings[dof], rtol=1e-8)
+
+    test_matrix = xr.Dataset(coords={'omega': [1.0], 'radiating_dof': ["Sway", "Yaw"], 'wave_direction': [0.0]})
+    dataset = cpt.Nemoh().fill_dataset(test_matrix, [body])
+    dataset = add_linear_combination_of_dofs(dataset.sel(influenced_dof=["Sway", "Yaw"]),
+                                             "other_rotation", {"Yaw": 1.0, "Sway": -l})
+    reference_dataset = cpt.assemble_dataset(reference)
+    assert np.allclose(dataset['added_mass'].sel(radiating_dof="other_rotation"),
+                       reference_dataset['added_mass'].sel(radiating_dof="other_rotation"), rtol=1e-4)
+    diffraction = cpt.Nemoh().solve(cpt.DiffractionProblem(body=body, omega=1.0))
+    assert np.isclose(dataset['diffraction_force'].sel(influenced_dof="other_rotation").item(),
+                      diffraction.forces["other_rotation"], rtol=1e-6)
+
+    with pytest.raises(ValueError):
+        add_linear_combination_of_dofs(dataset, "complex_dof", {"Yaw": 1.0, "Sway": 1j})
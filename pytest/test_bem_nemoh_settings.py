@@ -80,6 +80,31 @@ def test_custom_linear_solver():
     assert np.isclose(reference_result.added_masses['Surge'], result.added_masses['Surge'])
 
 
+def test_adaptive_mesh_coarsening():
+    fine_sphere = Sphere(radius=1.0, ntheta=30, nphi=30, clip_free_surface=True)
+    fine_sphere.add_translation_dof(direction=(0, 0, 1), name="Heave")
+    reference_solver = Nemoh(hierarchical_matrices=False)
+    adaptive_solver = Nemoh(hierarchical_matrices=False, adaptive_mesh_coarsening=True)
+
+    # At long wavelength, the problem is solved on a coarser mesh with similar results.
+    problem = RadiationProblem(body=fine_sphere, omega=1.0, radiating_dof="Heave")
+    reference_result = reference_solver.solve(problem)
+    result = adaptive_solver.solve(problem)
+    assert result.body.name == fine_sphere.name
+    assert result.body.mesh.nb_faces < fine_sphere.mesh.nb_faces
+    assert problem.wavelength >= 8*result.body.mesh.faces_radiuses.max()
+    assert np.isclose(result.added_masses["Heave"], reference_result.added_masses["Heave"], rtol=5e-2)
+    assert np.isclose(result.radiation_dampings["Heave"], reference_result.radiation_dampings["Heave"], rtol=1e-1)
+
+    # At short wavelength, the original mesh is used.
+    problem = RadiationProblem(body=fine_sphere, omega=10.0, radiating_dof="Heave")
+    assert adaptive_solver.solve(problem).body is fine_sphere
+
+    # Only the hierarchy of the last body is kept in cache.
+    adaptive_solver.solve(RadiationProblem(body=sphere, omega=1.0))
+    assert adaptive_solver._coarsening_hierarchy.cache_info().currsize == 1
+
+
 def test_limit_frequencies():
     """Test if how the solver answers when asked for frequency of 0 or ∞."""
     solver = Nemoh()
@@ -131,6 +156,101 @@ def test_fill_dataset():
     assert np.allclose(recomputed_dataset["added_mass"].data, dataset["added_mass"].data)
 
 
+def test_fill_dataset_with_checkpoints(tmp_path):
+    body = Sphere(radius=1.0, ntheta=4, nphi=8, clip_free_surface=True)
+    body.add_translation_dof(name="Surge")
+    body.add_translation_dof(name="Heave")
+    test_matrix = xr.Dataset(coords={
+        'omega': [0.5, 1.0, 1.5],
+        'wave_direction': [0.0, pi/2],
+        'radiating_dof': list(body.dofs),
+    })
+    reference = Nemoh().fill_dataset(test_matrix, [body])
+
+    class InterruptedSolver(Nemoh):
+        def solve(self, problem, keep_details=True):
+            self.nb_resolutions += 1
+            if self.nb_resolutions > self.max_nb_resolutions:
+                raise KeyboardInterrupt
+            return super().solve(problem, keep_details=keep_details)
+
+    solver = InterruptedSolver()
+    solver.nb_resolutions, solver.max_nb_resolutions = 0, 7
+    with pytest.raises(KeyboardInterrupt):
+        solver.fill_dataset(test_matrix, [body], checkpoint_directory=tmp_path)
+    checkpoint_file, = tmp_path.iterdir()
+    with open(checkpoint_file, 'ab') as f:
+        f.write(b"\x80\x04\x95")  # Incomplete record, as if the run was interrupted while writing
+
+    solver.nb_resolutions, solver.max_nb_resolutions = 0, np.infty
+    dataset = solver.fill_dataset(test_matrix, [body], checkpoint_directory=tmp_path)
+    assert solver.nb_resolutions == 3*(2 + 2) - 7
+    for variable in ('added_mass', 'radiation_damping', 'diffraction_force', 'Froude_Krylov_force'):
+        assert np.allclose(dataset[variable], reference[variable], rtol=1e-12)
+
+    # Everything is read from the checkpoint
+    solver.nb_resolutions = 0
+    solver.fill_dataset(test_matrix, [body], checkpoint_directory=tmp_path)
+    assert solver.nb_resolutions == 0
+
+    # Other settings do not use the same checkpoint
+    Nemoh(linear_solver='direct').fill_dataset(test_matrix, [body], checkpoint_directory=tmp_path)
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_checkpoints_fingerprint_of_complex_dofs():
+    from capytaine.bem.problem_set import ProblemSet
+    from capytaine.io.checkpoints import problem_set_fingerprint
+    test_matrix = xr.Dataset(coords={'omega': [1.0], 'radiating_dof': ["Combined"]})
+    fingerprints = set()
+    for coefficient in (1.0, 1.0 + 1.0j, 1.0 + 2.0j):
+        body = Sphere(radius=1.0, ntheta=4, nphi=8, clip_free_surface=True, name="sphere")
+        body.dofs["Combined"] = np.tile((1.0, 0.0, coefficient), (body.mesh.nb_faces, 1))
+        fingerprints.add(problem_set_fingerprint(ProblemSet.from_dataset(test_matrix, [body]), {}))
+    assert len(fingerprints) == 3  # The imaginary part of the dofs is taken into account.
+
+
+def test_checkpoints_with_adaptive_mesh_coarsening(tmp_path):
+    fine_sphere = Sphere(radius=1.0, ntheta=20, nphi=20, clip_free_surface=True)
+    fine_sphere.add_translation_dof(direction=(0, 0, 1), name="Heave")
+    test_matrix = xr.Dataset(coords={
+        'omega': [0.5, 1.0],
+        'radiating_dof': ["Heave"],
+        'theta': np.linspace(0, pi, 3),
+    })
+    solver = Nemoh(adaptive_mesh_coarsening=True)
+    dataset = solver.fill_dataset(test_matrix, [fine_sphere], checkpoint_directory=tmp_path)
+    assert solver._coarsening_hierarchy(fine_sphere, 0.0)[-1].mesh.nb_faces < fine_sphere.mesh.nb_faces
+
+    # The results read from the checkpoint refer to the coarse body on which they have been solved.
+    resumed_dataset = Nemoh(adaptive_mesh_coarsening=True).fill_dataset(test_matrix, [fine_sphere],
+                                                                        checkpoint_directory=tmp_path)
+    for variable in ('added_mass', 'radiation_damping', 'kochin'):
+        assert np.allclose(resumed_dataset[variable], dataset[variable], rtol=1e-12)
+
+
+def test_fill_dataset_with_haskind_relation():
+    solver = Nemoh()
+    body = Sphere(radius=1.0, center=(0.3, 0.1, -0.2), ntheta=10, nphi=20, clip_free_surface=True)
+    body.add_translation_dof(name="Surge")
+    body.add_translation_dof(name="Heave")
+    test_matrix = xr.Dataset(coords={
+        'omega': [1.0, 1.5],
+        'wave_direction': np.linspace(0.0, pi, 5),
+        'radiating_dof': ['Heave'],
+        'water_depth': [np.infty, 5.0],
+    })
+    dataset = solver.fill_dataset(test_matrix, [body])
+    haskind_dataset = solver.fill_dataset(test_matrix, [body], haskind=True)
+
+    assert list(haskind_dataset.coords['radiating_dof']) == ['Heave']
+    assert np.allclose(haskind_dataset['added_mass'], dataset['added_mass'])
+    assert np.allclose(haskind_dataset['Froude_Krylov_force'], dataset['Froude_Krylov_force'])
+    # The two methods are equivalent up to the discretization error.
+    assert np.allclose(haskind_dataset['diffraction_force'], dataset['diffraction_force'],
+                       atol=2e-3*float(np.abs(dataset['diffraction_force']).max()))
+
+
 def test_fill_dataset_with_kochin_functions():
     solver = Nemoh()
     test_matrix = xr.Dataset(coords={
@@ -143,6 +263,170 @@ def test_fill_dataset_with_kochin_functions():
     assert 'kochin' in ds
 
 
+def _reference_kochin(result, theta, ref_point):
+    """Kochin function of a single result, evaluated directly for all the angles at once."""
+    omega_bar = (result.body.mesh.faces_centers[:, :2] - ref_point) @ np.array((np.cos(theta), np.sin(theta)))
+    k, h = result.wavenumber, result.depth
+    if 0 <= k*h < 20:
+        cih = np.cosh(k*(result.body.mesh.faces_centers[:, 2] + h))/np.cosh(k*h)
+    else:
+        cih = np.exp(k*result.body.mesh.faces_centers[:, 2])
+    zs = cih * np.exp(-1j * k * omega_bar.T) * result.body.mesh.faces_areas
+    return zs @ result.sources / (4*pi)
+
+
+@pytest.mark.parametrize("nb_angles_per_block", [1, 4, None])
+def test_batched_kochin_functions(nb_angles_per_block):
+    from capytaine.post_pro.kochin import compute_kochin, compute_kochin_of_results
+    problems = [RadiationProblem(body=sphere, omega=omega, radiating_dof=dof, sea_bottom=sea_bottom)
+                for omega in (0.8, 1.5) for dof in sphere.dofs for sea_bottom in (-np.infty, -5.0)]
+    results = Nemoh().solve_all(problems, keep_details=True)
+    theta = np.linspace(0, 2*pi, 11)  # Not a multiple of the number of angles per block.
+    ref_point = (0.3, -0.2)
+
+    if nb_angles_per_block is None:
+        kochins = compute_kochin_of_results(results, theta, ref_point)
+    else:
+        kochins = compute_kochin_of_results(results, theta, ref_point,
+                                            block_size=nb_angles_per_block*sphere.mesh.nb_faces)
+    assert kochins.shape == (len(results), len(theta))
+    for result, kochin in zip(results, kochins):
+        assert np.allclose(kochin, _reference_kochin(result, theta, ref_point), rtol=1e-12, atol=0.0)
+    assert np.isclose(compute_kochin(results[0], theta[3], ref_point), kochins[0, 3], rtol=1e-12, atol=0.0)
+
+
 # TODO: move the code below to test_io_xarray.py
     # wavenumbers = wavenumber_data_array(results)
     # assert isinstance(wavenumbers, xr.DataArray)
+
+
+def test_lazy_tabulated_integrals(tmp_path, monkeypatch):
+    from capytaine.bem.green_functions import tabulated_integrals, TABULATED_INTEGRALS_VERSION
+    monkeypatch.setenv("CAPYTAINE_CACHE_DIR", str(tmp_path))
+    solver = Nemoh(tabulation_nb_integration_points=101)
+    assert solver.green_function._tabulated_integrals is None  # Not initialized until needed.
+
+    XR, XZ, APD = solver.tabulated_integrals
+    assert (tmp_path / f"tabulated_integrals_v{TABULATED_INTEGRALS_VERSION}_328_46_101.npz").is_file()
+
+    # The tabulation read on disk is the same as the one that has been computed.
+    tabulated_integrals.cache_clear()
+    for computed, read in zip((XR, XZ, APD), tabulated_integrals(328, 46, 101)):
+        assert np.all(computed == read)
+
+
+def test_truncated_cache_file(tmp_path):
+    from capytaine.io.cache import load_or_compute
+    compute = lambda: {'a': np.arange(1000.0)}
+    load_or_compute("table.npz", compute, version=1, directory=tmp_path)
+    content = (tmp_path / "table.npz").read_bytes()
+    (tmp_path / "table.npz").write_bytes(content[:len(content)//2])  # As if written by an interrupted process.
+
+    table = load_or_compute("table.npz", compute, version=1, directory=tmp_path)
+    assert np.all(table['a'] == np.arange(1000.0))
+    assert [path.name for path in tmp_path.iterdir()] == ["table.npz"]  # No temporary file left.
+    assert np.all(load_or_compute("table.npz", lambda: None, version=1, directory=tmp_path)['a'] == table['a'])
+
+
+def test_green_function_engines():
+    from capytaine.bem.green_functions import FastInfiniteDepthGreenFunction
+    body = Sphere(radius=1.0, ntheta=10, nphi=20, clip_free_surface=True)
+    body.add_translation_dof(direction=(0, 0, 1), name="Heave")
+    problem = RadiationProblem(body=body, omega=1.0, radiating_dof="Heave")
+
+    reference = Nemoh(matrix_cache_size=0).solve(problem)
+    for solver in [Nemoh(green_function='FastInfiniteDepth', matrix_cache_size=0),
+                   Nemoh(green_function=FastInfiniteDepthGreenFunction(nb_quadrature_points=6), matrix_cache_size=0)]:
+        result = solver.solve(problem)
+        assert np.isclose(result.added_masses["Heave"], reference.added_masses["Heave"], rtol=2e-3)
+        assert np.isclose(result.radiation_dampings["Heave"], reference.radiation_dampings["Heave"], rtol=2e-3)
+
+    settings = Nemoh(green_function=FastInfiniteDepthGreenFunction(nb_quadrature_points=6)).exportable_settings()
+    assert settings['green_function'] == "FastInfiniteDepthGreenFunction(nb_quadrature_points=6)"
+
+
+def test_wave_direction_symmetries():
+    from capytaine.bem.problems_and_results import DiffractionProblem
+    from capytaine.bodies.predefined.cylinders import HorizontalCylinder
+    body = HorizontalCylinder(length=4.0, radius=1.0, center=(0.5, 0.3, -2.0), nx=8, nr=3, ntheta=8, clever=True)
+    body.add_all_rigid_body_dofs()
+    problems = [DiffractionProblem(body=body, omega=1.2, sea_bottom=-10.0, wave_direction=beta)
+                for beta in (0.3, -0.3, pi + 0.3, 1.0)]
+
+    reference = Nemoh(linear_solver='direct').solve_all(problems)
+    solver = Nemoh(linear_solver='direct', wave_direction_symmetries=True)
+    results = solver.solve_all(problems)
+    assert len(solver._horizontal_isometries(body.mesh)) == 1  # The plane y = 0.3
+    assert solver._horizontal_isometries.cache_info().currsize == 1
+    for result, reference_result in zip(results, reference):
+        assert np.allclose(result.sources, reference_result.sources, rtol=1e-10)
+        assert np.allclose(result.potential, reference_result.potential, rtol=1e-10)
+        for dof in body.dofs:
+            assert np.isclose(result.forces[dof], reference_result.forces[dof], rtol=1e-10)
+
+    sphere = Sphere(radius=1.0, center=(0, 0, -2.0), ntheta=10, nphi=12, clever=True)
+    sphere.add_all_rigid_body_dofs()
+    test_matrix = xr.Dataset(coords={'omega': [1.0], 'wave_direction': np.linspace(0, 2*pi, 12, endpoint=False)})
+    reference = Nemoh().fill_dataset(test_matrix, [sphere])
+    dataset = solver.fill_dataset(test_matrix, [sphere])
+    assert np.allclose(dataset['diffraction_force'], reference['diffraction_force'], rtol=1e-6)
+    assert solver._horizontal_isometries.cache_info().currsize == 1  # Only the symmetries of the last mesh are kept.
+
+
+def test_potential_at_points(monkeypatch):
+    from capytaine.post_pro.free_surfaces import FreeSurface
+    body = Sphere(radius=1.0, center=(0, 0, -1.0), ntheta=10, nphi=10, clip_free_surface=True)
+    body.add_translation_dof(direction=(1, 0, 0), name="Surge")
+    body.add_translation_dof(direction=(0, 0, 1), name="Heave")
+    solver = Nemoh(green_function='FastInfiniteDepth')
+    results = [solver.solve(RadiationProblem(body=body, omega=1.0, radiating_dof=dof), keep_details=True)
+               for dof in body.dofs]
+
+    # Same result as the full interaction matrix
+    fs = FreeSurface(x_range=(-4, 4), nx=5, y_range=(-4, 4), ny=5)
+    S, _ = solver.build_matrices(fs.mesh, body.mesh, wavenumber=results[0].wavenumber)
+    potential = solver.get_potential_at_points(results, fs.mesh.faces_centers, chunk_size=7)
+    assert potential.shape == (2, fs.mesh.nb_faces)
+    for phi, result in zip(potential, results):
+        assert np.allclose(phi, S @ result.sources, rtol=1e-10)
+    assert np.allclose(solver.get_potential_on_mesh(results[1], fs.mesh), potential[1], rtol=1e-10)
+
+    # The velocity is the gradient of the potential
+    points = np.array([[2.0, 1.0, -0.5], [-1.5, 0.5, -2.5], [0.3, -2.0, -1.0]])
+    phi, velocity = solver.get_potential_at_points(results[1], points, velocity=True)
+    assert velocity.shape == (3, 3)
+    h = 1e-6
+    for i in range(3):
+        shift = np.zeros(3)
+        shift[i] = h
+        finite_difference = (solver.get_potential_at_points(results[1], points + shift) - phi)/h
+        assert np.allclose(velocity[:, i], finite_difference, rtol=1e-4, atol=1e-6)
+
+    # The size of the blocks is derived from the memory budget.
+    from capytaine.bem import nemoh
+    monkeypatch.setattr(nemoh, "POTENTIAL_AT_POINTS_MEMORY_BUDGET", 16*4*body.mesh.nb_faces*2)
+    evaluate_at_points = solver.green_function.evaluate_at_points
+    nb_points_per_block = []
+    def spy(points, *args, **kwargs):
+        nb_points_per_block.append(len(points))
+        return evaluate_at_points(points, *args, **kwargs)
+    monkeypatch.setattr(solver.green_function, "evaluate_at_points", spy)
+    assert np.allclose(solver.get_potential_at_points(results[1], points, velocity=True)[1], velocity, rtol=1e-12)
+    assert nb_points_per_block == [2, 1]
+
+
+def test_far_field_free_surface_elevation():
+    from capytaine.post_pro.free_surfaces import FreeSurface
+    body = Sphere(radius=1.0, center=(0, 0, -0.5), ntheta=10, nphi=10, clip_free_surface=True)
+    body.add_translation_dof(direction=(1, 0, 0), name="Surge")
+    solver = Nemoh()
+    fs = FreeSurface(x_range=(-80, 80), nx=16, y_range=(-80, 80), ny=16)
+    far = np.linalg.norm(fs.mesh.faces_centers[:, 0:2], axis=1) > 40.0
+
+    for depth in (np.infty, 10.0):
+        problem = RadiationProblem(body=body, omega=1.5, radiating_dof="Surge", sea_bottom=-depth)
+        result = solver.solve(problem, keep_details=True)
+        exact = solver.get_free_surface_elevation(result, fs)
+        approx = solver.get_free_surface_elevation(result, fs, far_field_radius=40.0)
+        assert np.allclose(approx[~far], exact[~far], rtol=1e-10)
+        assert np.all(np.abs(approx[far] - exact[far]) < 0.1*np.abs(exact[far]))
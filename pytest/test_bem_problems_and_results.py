@@ -18,6 +18,8 @@ from capytaine.bodies.predefined.cylinders import HorizontalCylinder
 from capytaine.bem.problems_and_results import LinearPotentialFlowProblem, DiffractionProblem, RadiationProblem, \
     LinearPotentialFlowResult, DiffractionResult, RadiationResult
 from capytaine.bem.nemoh import Nemoh
+from capytaine.bem.dispersion_relation import solve_dispersion_relation
+from capytaine.bem.problem_set import ProblemSet
 from capytaine.io.xarray import problems_from_dataset
 
 from capytaine.io.legacy import import_cal_file
@@ -76,6 +78,24 @@ def test_LinearPotentialFlowProblem():
     assert res.body is pb.body
 
 
+def test_dispersion_relation():
+    omegas = np.linspace(0.1, 10.0, 50)
+    depths = np.array([0.5, 10.0, 100.0, np.infty])
+    k = solve_dispersion_relation(omegas[:, None], depths[None, :], g=9.81)
+    assert k.shape == (50, 4)
+    assert np.allclose(omegas[:, None]**2, 9.81*k*np.tanh(k*depths[None, :]), rtol=1e-12)
+    assert np.allclose(k[:, -1], omegas**2/9.81)
+    assert np.isclose(solve_dispersion_relation(omegas[3], depths[1]), k[3, 1], rtol=1e-14)
+    assert solve_dispersion_relation(0.0, 10.0) == 0.0
+    assert solve_dispersion_relation(np.infty, 10.0) == np.infty
+
+    # The wavenumber of a problem is updated when the frequency is changed.
+    pb = LinearPotentialFlowProblem(free_surface=0.0, sea_bottom=-10.0, omega=1.0)
+    assert pb.wavenumber == solve_dispersion_relation(1.0, 10.0)
+    pb.omega = 2.0
+    assert pb.wavenumber == solve_dispersion_relation(2.0, 10.0)
+
+
 def test_diffraction_problem():
     assert DiffractionProblem().body is None
 
@@ -142,6 +162,41 @@ def test_Froude_Krylov():
     assert np.isclose(froude_krylov_force(problem)['Heave'], 27610, rtol=1e-3)
 
 
+def test_batched_Froude_Krylov(monkeypatch):
+    from capytaine.bem.airy_waves import froude_krylov_force, precompute_froude_krylov_forces
+
+    sphere = Sphere(radius=1.0, center=(0.5, 0.0, 0.0), ntheta=3, nphi=12, clip_free_surface=True)
+    sphere.add_translation_dof(direction=(1, 0, 0), name="Surge")
+    sphere.add_translation_dof(direction=(0, 0, 1), name="Heave")
+
+    problems = [DiffractionProblem(body=sphere, omega=omega, wave_direction=beta, sea_bottom=sea_bottom)
+                for omega in (0.5, 1.0, 2.0) for beta in (0.0, 1.0) for sea_bottom in (-np.infty, -10.0)]
+    results = [problem.make_results_container() for problem in problems]
+    precompute_froude_krylov_forces(results)
+    for problem, result in zip(problems, results):
+        reference = froude_krylov_force(problem)
+        for dof in sphere.dofs:
+            assert np.isclose(result.froude_krylov_forces[dof], reference[dof], rtol=1e-12)
+
+    # When the test matrix is not a full grid, only the needed couples of frequency and wave direction are computed.
+    from capytaine.bem import airy_waves
+    froude_krylov_forces = airy_waves.froude_krylov_forces
+    nb_computed_forces = []
+    def spy(body, omega, wave_direction, *args, **kwargs):
+        nb_computed_forces.append(np.size(omega) * np.size(wave_direction))
+        return froude_krylov_forces(body, omega, wave_direction, *args, **kwargs)
+    monkeypatch.setattr(airy_waves, "froude_krylov_forces", spy)
+    problems = [DiffractionProblem(body=sphere, omega=omega, wave_direction=beta)
+                for omega, beta in [(0.5, 0.0), (1.0, 1.0), (2.0, 0.5), (2.0, 1.5)]]
+    results = [problem.make_results_container() for problem in problems]
+    precompute_froude_krylov_forces(results)
+    assert sum(nb_computed_forces) == len(problems)
+    for problem, result in zip(problems, results):
+        reference = froude_krylov_force(problem)
+        for dof in sphere.dofs:
+            assert np.isclose(result.froude_krylov_forces[dof], reference[dof], rtol=1e-12)
+
+
 def test_import_cal_file():
     """Test the importation of legacy Nemoh.cal files."""
     current_file_path = os.path.dirname(os.path.abspath(__file__))
@@ -227,6 +282,35 @@ def test_problems_from_dataset():
     assert len(problems) == 12
 
 
+def test_problem_set():
+    body = Sphere(center=(0, 0, -4), ntheta=6, nphi=6, name="sphere")
+    body.add_translation_dof(name="Surge")
+    body.add_translation_dof(name="Heave")
+    shifted_body = body.translated_y(5.0, name="shifted_sphere")
+    dset = xr.Dataset(coords={'omega': [1.5, 0.5, 1.0],
+                              'radiating_dof': ["Heave", "Surge"],
+                              'wave_direction': [0.0, np.pi/2],
+                              'water_depth': [np.infty, 10.0]})
+
+    problem_set = ProblemSet.from_dataset(dset, [shifted_body, body])
+    problems = problems_from_dataset(dset, [shifted_body, body])
+    assert len(problem_set) == len(problems) == 48
+    assert problems == sorted(problems)
+    assert all(type(pb) is type(problem) and pb == problem for pb, problem in zip(problem_set, problems))
+
+    groups = list(problem_set.groups())
+    assert len(groups) == 12
+    for ids in groups:
+        boundary_conditions = problem_set.boundary_conditions(ids)
+        for bc, i in zip(boundary_conditions, ids):
+            assert np.allclose(bc, problem_set[i].boundary_condition)
+
+    results = solver.solve_all(problem_set)
+    assert all(result.problem == problem for result, problem in zip(results, problems))
+    reference_results = solver.solve_all(problems[:4])
+    assert all(result.records == reference.records for result, reference in zip(results, reference_results))
+
+
 def test_fill_dataset():
     body = HorizontalCylinder(radius=1, center=(0, 0, -2))
     body.add_all_rigid_body_dofs()
@@ -8,6 +8,7 @@ import numpy as np
 from capytaine.bodies import FloatingBody
 from capytaine.meshes.meshes import Mesh
 from capytaine.meshes.geometry import Axis, Plane
+from capytaine.bodies.dofs import TranslationDof, DofOnFaces
 from capytaine.bodies.predefined.spheres import Sphere
 from capytaine.bodies.predefined.cylinders import HorizontalCylinder
 
@@ -105,3 +106,121 @@ def test_mincing():
     assert isinstance(body.mesh[0][0], Mesh)
     body = body.minced((1, 2, 2))
     assert isinstance(body.mesh[0][0][0][0], Mesh)
+
+
+def test_octree_decomposition():
+    body = HorizontalCylinder(length=10, radius=0.5, nx=40, ntheta=20, clever=False)
+    body.add_translation_dof(name="Heave")
+    decomposed_body = body.decomposed_as_octree(leaf_size=50)
+    mesh = decomposed_body.mesh
+    assert mesh.nb_faces == body.mesh.nb_faces
+    assert np.isclose(np.sum(mesh.faces_areas), np.sum(body.mesh.faces_areas))
+
+    def leaves(mesh):
+        if isinstance(mesh, Mesh):
+            return [mesh]
+        else:
+            return [leaf for submesh in mesh for leaf in leaves(submesh)]
+    leaves_sizes = [leaf.nb_faces for leaf in leaves(mesh)]
+    assert max(leaves_sizes) <= 50
+    assert max(leaves_sizes) - min(leaves_sizes) <= 1  # Balanced
+
+    # The dofs follow the new ordering of the faces
+    assert np.allclose(np.sum(decomposed_body.dofs['Heave'] * mesh.faces_normals, axis=1),
+                       mesh.faces_normals[:, 2])
+    assert isinstance(dict(decomposed_body.dofs.definitions())['Heave'], TranslationDof)
+    assert decomposed_body.__internals__ is not body.__internals__
+
+    # The dofs of the bodies of a farm are only stored on the faces of their own body.
+    buoy = Sphere(radius=1.0, center=(0, 0, -2), ntheta=6, nphi=8, clever=False, name="buoy")
+    buoy.add_translation_dof(name="Heave")
+    buoy.add_rotation_dof(Axis(vector=(0, 1, 0), point=(0, 0, -2)), name="Pitch")
+    farm = buoy + buoy.translated_x(5.0, name="other_buoy")
+    decomposed_farm = farm.decomposed_as_octree(leaf_size=20)
+    assert all(isinstance(dof, DofOnFaces) for _, dof in decomposed_farm.dofs.definitions())
+    assert decomposed_farm.dofs_normals.nnz == 2 * farm.mesh.nb_faces
+    _, ids = farm.mesh.decomposed_as_octree(leaf_size=20, return_index=True)
+    for dof_name in farm.dofs:
+        assert np.allclose(decomposed_farm.dofs[dof_name], farm.dofs[dof_name][ids])
+    assert np.allclose(decomposed_farm.dofs_normals.toarray(), farm.dofs_normals.toarray()[:, ids])
+
+    # They follow the transformations of the body.
+    decomposed_farm.translate_x(1.0)
+    decomposed_farm.keep_immersed_part(free_surface=-2.0)
+    farm.translate_x(1.0)
+    farm.keep_immersed_part(free_surface=-2.0)
+    assert decomposed_farm.mesh.nb_faces == farm.mesh.nb_faces
+    assert np.allclose(np.sort(decomposed_farm.dofs_weighted_normals.toarray(), axis=1),
+                       np.sort(farm.dofs_weighted_normals.toarray(), axis=1))
+
+    # The cached properties of a coarse body are not shared with the original body.
+    farm.dofs_normals
+    coarse_farm = farm.coarsened(1.0)
+    assert coarse_farm.__internals__ is not farm.__internals__
+    assert coarse_farm.dofs_normals.shape == (farm.nb_dofs, coarse_farm.mesh.nb_faces)
+
+
+def test_dofs_normals():
+    body = Sphere(radius=1.0, center=(0, 0, -2), ntheta=6, nphi=8, clever=False)
+    body.add_translation_dof(name="Heave")
+    body.add_rotation_dof(name="Pitch")
+    assert body.dofs_normals.shape == (2, body.mesh.nb_faces)
+    assert np.allclose(body.dofs_normals[0].toarray(), body.mesh.faces_normals[:, 2])
+    assert np.allclose(body.dofs_weighted_normals.toarray(), body.dofs_normals.toarray() * body.mesh.faces_areas)
+    assert body.dofs_normals is body.dofs_normals  # Cached
+
+    # The cache is updated when the dofs change.
+    body.add_translation_dof(name="Surge")
+    assert np.allclose(body.dofs_normals[2].toarray(), body.mesh.faces_normals[:, 0])
+    body.mirror(Plane(normal=(1, 0, 0)))
+    assert np.allclose(body.dofs_normals[2].toarray(), -body.mesh.faces_normals[:, 0])  # The dof has been mirrored too.
+    body.keep_only_dofs(["Heave"])
+    assert body.dofs_normals.shape == (1, body.mesh.nb_faces)
+
+    # The cache is updated when the mesh is transformed directly, without the body.
+    body.mesh.rotate_y(np.pi/2)
+    assert np.allclose(body.dofs_normals.toarray(), body.mesh.faces_normals[:, 2])
+    assert np.allclose(body.dofs_weighted_normals.toarray(), body.mesh.faces_normals[:, 2] * body.mesh.faces_areas)
+
+    # The cache is updated when the mesh is clipped in place without changing its number of faces.
+    vertices = np.array([[0, 0, -1], [1, 0, -1], [1, 0, 1], [0, 0, 1], [2, 0, -1], [2, 1, -1], [2, 1, 1], [2, 0, 1]])
+    body = FloatingBody(Mesh(vertices, np.array([[0, 1, 2, 3], [4, 5, 6, 7]])))
+    body.add_translation_dof(name="Sway")
+    assert np.allclose(body.dofs_weighted_normals.toarray(), [[-2.0, 0.0]])
+    body.keep_immersed_part()
+    assert body.mesh.nb_faces == 2
+    assert np.allclose(body.dofs_weighted_normals.toarray(), [[-1.0, 0.0]])
+
+
+def test_parametric_dofs_of_joined_bodies():
+    from capytaine.bodies.dofs import RotationDof, DofOnSubMesh
+    buoy = Sphere(radius=1.0, center=(0, 0, -2), ntheta=6, nphi=8, clever=False, name="buoy")
+    buoy.add_translation_dof(name="Heave")
+    buoy.add_rotation_dof(Axis(vector=(0, 1, 0), point=(0, 0, -2)), name="Pitch")
+    assert isinstance(dict(buoy.dofs.definitions())["Pitch"], RotationDof)
+    assert np.allclose(buoy.dofs["Pitch"], np.cross((0, 0, -2) - buoy.mesh.faces_centers, (0, 1, 0)))
+
+    other_buoy = buoy.translated_x(5.0, name="other_buoy")
+    assert np.allclose(other_buoy.dofs["Pitch"], np.cross((5, 0, -2) - other_buoy.mesh.faces_centers, (0, 1, 0)))
+
+    both = buoy + other_buoy
+    assert all(isinstance(dof, DofOnSubMesh) for _, dof in both.dofs.definitions())
+    pitch = both.dofs["other_buoy__Pitch"]
+    assert pitch.shape == (both.mesh.nb_faces, 3)
+    assert np.all(pitch[:buoy.mesh.nb_faces] == 0.0)
+    assert np.allclose(pitch[buoy.mesh.nb_faces:], other_buoy.dofs["Pitch"])
+    assert np.allclose(both.dofs_normals[3].toarray(), np.sum(pitch * both.mesh.faces_normals, axis=1))
+    # Each dof is only stored on the faces of its own body.
+    assert both.dofs_normals.nnz == both.dofs_weighted_normals.nnz == 2 * both.mesh.nb_faces
+    assert both.dofs_normals is both.dofs_normals  # Cached, although the mesh is a collection.
+
+    # The cache is updated when a submesh is transformed directly.
+    both.mesh[1].translate_z(-1.0)
+    assert np.allclose(both.dofs_normals[3].toarray(),
+                       np.sum(both.dofs["other_buoy__Pitch"] * both.mesh.faces_normals, axis=1))
+    both.mesh[1].translate_z(1.0)
+
+    # The dofs follow the transformations of the body.
+    both.rotate_z(np.pi/2)
+    assert np.allclose(both.dofs["other_buoy__Pitch"][buoy.mesh.nb_faces:],
+                       np.cross((0, 5, -2) - both.mesh[1].faces_centers, (-1, 0, 0)))
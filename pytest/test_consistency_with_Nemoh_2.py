@@ -2,6 +2,9 @@
 # coding: utf-8
 """Quantitatively compare the results of Capytaine with the results from Nemoh 2."""
 
+import os
+
+import pytest
 import numpy as np
 
 from capytaine.bodies.predefined.spheres import Sphere
@@ -12,6 +15,7 @@ from capytaine.bem.problems_and_results import DiffractionProblem, RadiationProb
 from capytaine.bem.nemoh import Nemoh
 from capytaine.io.xarray import assemble_dataset
 from capytaine.post_pro.kochin import compute_kochin
+from capytaine.io.legacy import import_cal_file
 
 solver = Nemoh(linear_solver='gmres', hierarchical_matrices=False, matrix_cache_size=0)
 
@@ -205,3 +209,46 @@ def test_multibody():
         atol=1e-3*total_volume*problems[0].rho
     )
 
+
+def _read_tecplot_zones(filepath):
+    """Read the numerical values of each zone of a tecplot file written by Nemoh."""
+    zones = []
+    with open(filepath, 'r') as tecplot_file:
+        for line in tecplot_file:
+            if line.startswith("Zone"):
+                zones.append([])
+            elif len(zones) > 0 and line.strip():
+                zones[-1].append([float(x) for x in line.split()])
+    return [np.array(zone) for zone in zones]
+
+
+# Largest difference with Nemoh 2 on the verification cases, relative to the largest coefficient.
+# The Fortran core is the one of Nemoh 2, while the fast engine evaluates the wave part differently.
+@pytest.mark.parametrize("engine,rtol", [("Delhommeau", 1e-4), ("FastInfiniteDepth", 2.5e-2)])
+@pytest.mark.parametrize("case", ["Cylinder", "NonSymmetrical"])  # Both in infinite depth
+def test_Nemoh_verification_cases(case, engine, rtol):
+    case_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Nemoh_verification_cases", case)
+    problems = import_cal_file(os.path.join(case_directory, "Nemoh.cal"))
+    reference_directory = os.path.join(case_directory, "reference_results")
+    radiation_coefficients = _read_tecplot_zones(os.path.join(reference_directory, "RadiationCoefficients.tec"))
+    diffraction_force, = _read_tecplot_zones(os.path.join(reference_directory, "DiffractionForce.tec"))
+
+    omega_range = radiation_coefficients[0][::10, 0]  # A subset of the frequencies
+    problems = [problem for problem in problems if np.any(np.isclose(problem.omega, omega_range))]
+    results = Nemoh(green_function=engine, matrix_cache_size=0).solve_all(problems, keep_details=False)
+
+    for result in results:
+        dofs = list(result.body.dofs)
+        i_omega = np.argmin(np.abs(radiation_coefficients[0][:, 0] - result.omega))
+        if isinstance(result.problem, RadiationProblem):
+            # Columns: omega, then added mass and radiation damping of each influenced dof.
+            reference = radiation_coefficients[dofs.index(result.radiating_dof)][i_omega, 1:].reshape(-1, 2)
+            reference = reference[:, 0] - 1j*reference[:, 1]/result.omega
+            computed = np.array([result.added_masses[dof] - 1j*result.radiation_dampings[dof]/result.omega
+                                 for dof in dofs])
+        else:
+            # Columns: omega, then modulus and phase of the force on each dof.
+            reference = diffraction_force[i_omega, 1:].reshape(-1, 2)
+            reference = reference[:, 0]*np.exp(1j*reference[:, 1])
+            computed = np.array([result.forces[dof] for dof in dofs])
+        assert np.max(np.abs(computed - reference)) <= rtol*np.max(np.abs(reference))
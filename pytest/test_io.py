@@ -1,8 +1,12 @@
 
+import pytest
 import xarray as xr
 import numpy as np
 
 from capytaine.io.xarray import separate_complex_values, merge_complex_values
+from capytaine.io.mesh_loaders import load_mesh, load_STL, load_RAD, load_INP
+from capytaine.io.mesh_writers import write_mesh, write_STL
+from capytaine.bodies.predefined.spheres import Sphere
 
 
 def test_remove_complex_values():
@@ -25,3 +29,114 @@ def test_remove_complex_values():
     complex_dataset = merge_complex_values(real_dataset)
     assert set(original_dataset.dims) == set(complex_dataset.dims)
 
+
+def test_load_STL(tmp_path):
+    mesh = Sphere(radius=1.0, ntheta=6, nphi=8, clever=False).mesh
+    mesh.triangulate_quadrangles()
+
+    # ASCII file
+    write_STL(str(tmp_path / "sphere_ascii.stl"), mesh.vertices, mesh.faces.copy())
+    ascii_mesh = load_STL(str(tmp_path / "sphere_ascii.stl"))
+    assert ascii_mesh.nb_faces == mesh.nb_faces
+    assert np.isclose(ascii_mesh.faces_areas.sum(), mesh.faces_areas.sum(), rtol=1e-5)
+
+    # Binary file
+    triangles = np.zeros(mesh.nb_faces, dtype=[('normal', '<f4', (3,)), ('vertices', '<f4', (3, 3)), ('attr', '<u2')])
+    triangles['normal'] = mesh.faces_normals
+    triangles['vertices'] = mesh.vertices[mesh.faces[:, :3]]
+    with open(tmp_path / "sphere_binary.stl", 'wb') as f:
+        f.write(b"solid but actually binary".ljust(80, b" "))
+        f.write(np.uint32(mesh.nb_faces).tobytes())
+        f.write(triangles.tobytes())
+    binary_mesh = load_STL(str(tmp_path / "sphere_binary.stl"))
+    assert binary_mesh.nb_faces == mesh.nb_faces
+    assert binary_mesh.nb_vertices == ascii_mesh.nb_vertices
+    assert np.allclose(binary_mesh.faces_centers, ascii_mesh.faces_centers, atol=1e-5)
+
+
+@pytest.mark.parametrize("file_format", ["nat", "nem", "gdf", "mar", "hst"])
+def test_text_formats_round_trip(tmp_path, file_format):
+    mesh = Sphere(radius=1.0, ntheta=6, nphi=8, clever=False).mesh
+    filename = str(tmp_path / f"sphere.{file_format}")
+    write_mesh(filename, mesh.vertices, mesh.faces, file_format)
+    loaded_mesh = load_mesh(filename, file_format)
+    assert loaded_mesh.nb_faces == mesh.nb_faces
+    assert np.allclose(loaded_mesh.faces_centers, mesh.faces_centers, atol=1e-5)
+    assert np.allclose(loaded_mesh.faces_areas, mesh.faces_areas, atol=1e-5)
+
+
+def test_load_RAD(tmp_path):
+    # The index of the fifth node is not separated from its first coordinate.
+    (tmp_path / "mesh.rad").write_text(
+        "#RADIOSS STARTER\n"
+        "/BEGIN\n"
+        "test\n"
+        "/NODE\n"
+        "         1  0.0             0.0            -1.0\n"
+        "         2  1.0             0.0            -1.0\n"
+        "         3  1.0             1.0            -1.0\n"
+        "         4  0.0             1.0            -1.0\n"
+        "         5-2.5E-01          0.5            -2.0\n"
+        "         6  1.0             0.5            -2.0\n"
+        "/SHELL/1\n"
+        "         1         0         0         1         2         3         4\n"
+        "         2         0         0         1         2         6         5\n"
+        "         3         0         0         4         3         6         6\n"
+        "/END\n"
+    )
+    mesh = load_RAD(str(tmp_path / "mesh.rad"))
+    # Same as the mesh returned by the line by line parser of the previous versions.
+    assert np.array_equal(mesh.vertices, [[0.0, 0.0, -1.0], [1.0, 0.0, -1.0], [1.0, 1.0, -1.0],
+                                          [0.0, 1.0, -1.0], [-0.25, 0.5, -2.0], [1.0, 0.5, -2.0]])
+    assert np.array_equal(mesh.faces, [[0, 1, 2, 3], [0, 1, 5, 4], [3, 2, 5, 5]])
+
+
+def test_load_INP(tmp_path):
+    (tmp_path / "mesh.inp").write_text(
+        "*FRAME,NAME=ORIGIN\n"
+        "0.0,0.0,0.0\n"
+        "*FRAME,NAME=SHIFTED\n"
+        "10.0,0.0,-1.5\n"
+        "*NODE,INPUT=hull,FRAME=SHIFTED\n"
+        "*ELEMENT,TYPE=Q4C000,ELSTRU=HULL,INPUT=hull\n"
+        "*ELEMENT,TYPE=T3C000,ELSTRU=HULL,INPUT=hull\n"
+    )
+    # The nodes are renumbered and the second section of elements contains a triangle.
+    (tmp_path / "hull.DAT").write_text(
+        "NODES\n"
+        "    10    0.0    0.0   -1.0\n"
+        "    20    1.0    0.0   -1.0\n"
+        "    30    1.0    1.0   -1.0\n"
+        "    40    0.0    1.0   -1.0\n"
+        "    50    0.5    2.0   -1.0E+00\n"
+        "ELEMENTS\n"
+        " 1 10 20 30 40\n"
+        " 2 40 30 20 10\n"
+        "TRIANGLES\n"
+        " 3 40 30 50\n"
+    )
+    mesh = load_INP(str(tmp_path / "mesh.inp"))
+    # Same as the mesh returned by the line by line parser of the previous versions.
+    assert np.array_equal(mesh.vertices, [[10.0, 0.0, -2.5], [11.0, 0.0, -2.5], [11.0, 1.0, -2.5],
+                                          [10.0, 1.0, -2.5], [10.5, 2.0, -2.5]])
+    assert np.array_equal(mesh.faces, [[0, 1, 2, 3], [3, 2, 1, 0], [3, 2, 4, 3]])
+
+
+def test_npz_round_trip(tmp_path):
+    from capytaine.io.mesh_writers import write_NPZ_mesh
+    from capytaine.meshes.symmetric import build_regular_array_of_meshes, AxialSymmetricMesh
+    sphere = Sphere(radius=1.0, ntheta=6, nphi=8, clever=True).mesh
+    mesh = build_regular_array_of_meshes(sphere, 5.0, (2, 2))
+    write_NPZ_mesh(str(tmp_path / "array.npz"), mesh)
+
+    loaded_mesh = load_mesh(str(tmp_path / "array.npz"))
+    assert loaded_mesh.tree_view() == mesh.tree_view()
+    assert isinstance(loaded_mesh.first_slice.first_slice, AxialSymmetricMesh)
+    assert np.array_equal(loaded_mesh.faces, mesh.faces)
+    assert np.allclose(loaded_mesh.faces_centers, mesh.faces_centers)
+    assert hash(loaded_mesh.merged()) == hash(mesh.merged())
+
+    # The stored properties are loaded in the cache
+    slice_mesh = loaded_mesh.first_slice.first_slice.first_slice
+    assert 'surface_integrals' in slice_mesh.__internals__
+    assert np.allclose(slice_mesh.get_surface_integrals(), sphere.first_slice.get_surface_integrals())
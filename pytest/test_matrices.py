@@ -356,6 +356,25 @@ def test_solve_2x2():
     assert np.allclose(x_toe, x_dumb, rtol=1e-6)
 
 
+def test_solve_2x2_with_symmetric_and_antisymmetric_rhs():
+    A = BlockSymmetricToeplitzMatrix([
+        [np.random.rand(3, 3) for _ in range(2)]
+    ])
+    b = np.random.rand(A.shape[0]//2)
+
+    for rhs in [np.concatenate([b, b]), np.concatenate([b, -b])]:
+        x_dumb = np.linalg.solve(A.full_matrix(), rhs)
+        assert np.allclose(solve_directly(A, rhs), x_dumb, rtol=1e-6)
+        assert np.allclose(solve_gmres(A, rhs), x_dumb, rtol=1e-4)
+
+    # Only the LU decompositions of the half systems that have been needed are stored.
+    A = BlockSymmetricToeplitzMatrix([
+        [np.random.rand(3, 3) for _ in range(2)]
+    ])
+    solve_directly(A, np.concatenate([b, b]))
+    assert A._lu_of_half_systems[0] is not None and A._lu_of_half_systems[1] is None
+
+
 def test_solve_block_circulant():
     A = BlockCirculantMatrix([
         [(lambda: np.random.rand(3, 3))() for _ in range(6)]
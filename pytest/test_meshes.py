@@ -10,7 +10,7 @@ from numpy.linalg import norm
 from capytaine.meshes.meshes import Mesh
 from capytaine.meshes.clipper import clip
 from capytaine.meshes.geometry import Plane, xOz_Plane
-from capytaine.bodies.predefined import HorizontalCylinder, Sphere, Rectangle
+from capytaine.bodies.predefined import HorizontalCylinder, Sphere, Rectangle, RectangularParallelepiped
 
 # Some meshes that will be used in the following tests.
 test_mesh = Mesh(vertices=np.random.rand(4, 3), faces=[range(4)], name="test_mesh")
@@ -192,7 +192,54 @@ def test_clipper_corner_cases():
     assert one_sphere_remaining == sphere.translated_z(10.0)
 
 
+def test_coarsening():
+    # The sharp edges and the corners of a box are preserved, and so is its volume.
+    box = RectangularParallelepiped(size=(4, 2, 2), resolution=(40, 20, 20), center=(0, 0, -0.5)).mesh.merged()
+    box.merge_duplicates()
+    box.keep_immersed_part()
+    for cell_size in [0.2, 0.4]:
+        coarse_box = box.coarsened(cell_size)
+        assert coarse_box.nb_faces < box.nb_faces/2
+        assert np.allclose(coarse_box.axis_aligned_bbox, box.axis_aligned_bbox)
+        assert np.isclose(coarse_box.faces_areas.sum(), box.faces_areas.sum())
+        assert np.isclose(coarse_box.volume, box.volume)
+
+    # The vertices of the waterline of a sphere stay on the free surface.
+    half_sphere = Sphere(radius=1.0, ntheta=30, nphi=30, clip_free_surface=True).mesh.merged()
+    coarse_sphere = half_sphere.coarsened(0.4)
+    assert coarse_sphere.nb_faces < half_sphere.nb_faces/2
+    assert np.all(coarse_sphere.vertices[:, 2] <= 1e-12)
+    assert np.count_nonzero(np.abs(coarse_sphere.vertices[:, 2]) < 1e-12) >= 8
+    assert np.isclose(coarse_sphere.volume, half_sphere.volume, rtol=5e-2)
+
+
 def test_extract_one_face():
     i = 2
     one_face = sphere.extract_one_face(i)
     assert np.all(one_face.faces_centers[0] == sphere.faces_centers[i])
+
+
+@pytest.mark.parametrize("transformation", [
+    lambda mesh: mesh.translated((1.0, -2.0, 0.5)),
+    lambda mesh: mesh.rotated_x(0.3),
+    lambda mesh: mesh.rotated_z(-1.2),
+    lambda mesh: mesh.mirrored(Plane(normal=(1, 1, 0), point=(0.5, 0.5, 0.0))),
+])
+def test_faces_properties_after_rigid_transformation(transformation):
+    """The cached faces properties are updated by the rigid transformations instead of being recomputed."""
+    mesh = sphere.copy()
+    mesh.faces_centers  # Fill the cache
+    transformed_mesh = transformation(mesh)
+    assert 'faces_centers' in transformed_mesh.__internals__
+
+    reference_mesh = Mesh(transformed_mesh.vertices, transformed_mesh.faces)
+    for prop in ['faces_areas', 'faces_centers', 'faces_normals', 'faces_radiuses', 'center_of_mass_of_nodes']:
+        assert np.allclose(getattr(transformed_mesh, prop), getattr(reference_mesh, prop))
+    assert hash(transformed_mesh) == hash(reference_mesh)
+
+
+def test_hash_independent_of_ordering():
+    shuffled_sphere = Mesh(sphere.vertices, sphere.faces[np.random.permutation(sphere.nb_faces)])
+    assert shuffled_sphere == sphere
+    assert hash(shuffled_sphere) == hash(sphere)
+    assert hash(sphere.translated_x(1.0)) != hash(sphere)
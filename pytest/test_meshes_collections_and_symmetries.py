@@ -131,3 +131,26 @@ def test_extract_one_face():
 
     for i in [5, sphere[0].nb_faces+5]:
         assert np.allclose(sphere.extract_one_face(i).faces_centers[0], sphere.faces_centers[i])
+
+
+def test_detect_symmetries():
+    from capytaine import ReflectionSymmetricMesh, RectangularParallelepiped
+    from capytaine.meshes.symmetric import detect_symmetries
+
+    # Axisymmetric mesh, not centered on the origin
+    mesh = Sphere(center=(3.0, -1.0, -2.0), ntheta=10, nphi=12, clever=False).mesh
+    symmetric_mesh, ids = detect_symmetries(mesh, return_index=True)
+    assert isinstance(symmetric_mesh, AxialSymmetricMesh)
+    assert symmetric_mesh.nb_submeshes == 12
+    assert np.allclose(symmetric_mesh.faces_centers, mesh.faces_centers[ids])
+
+    # Two reflection symmetries
+    mesh = RectangularParallelepiped(size=(4, 2, 1), resolution=(8, 4, 4), center=(1.0, 1.0, -2.0)).mesh.merged()
+    symmetric_mesh, ids = detect_symmetries(mesh, return_index=True)
+    assert isinstance(symmetric_mesh, ReflectionSymmetricMesh)
+    assert isinstance(symmetric_mesh.half, ReflectionSymmetricMesh)
+    assert np.allclose(symmetric_mesh.faces_centers, mesh.faces_centers[ids])
+    assert np.allclose(symmetric_mesh.faces_normals, mesh.faces_normals[ids])
+
+    # No symmetry
+    assert isinstance(detect_symmetries(mesh.extract_faces(np.arange(1, mesh.nb_faces))), Mesh)
@@ -18,6 +18,7 @@ NemohCore = Extension(
         "capytaine/bem/NemohCore/Initialize_Green_wave.f90",
         "capytaine/bem/NemohCore/Green_wave.f90",
         "capytaine/bem/NemohCore/old_Prony_decomposition.f90",
+        "capytaine/bem/NemohCore/Build_matrices.f90",
     ],
     extra_compile_args=['-O2', '-fopenmp'],
     extra_f90_compile_args=['-O2', '-fopenmp'],
@@ -74,7 +75,7 @@ if __name__ == "__main__":
               'capytaine.io',
           ],
           install_requires=[
-              'attrs',
+              'attrs>=21.3',
               'numpy',
               'scipy',
               'pandas',